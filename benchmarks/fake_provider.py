@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+本地模拟 new-api provider，用于基准测试
+
+实现 /login、/api/user/self 与 /api/user/sign_in，可选 WAF 挑战页，支持延迟与错误注入。
+单独运行时打印 "LISTENING <port>" 后持续提供服务：
+
+    python benchmarks/fake_provider.py --latency-ms 50 --error-rate 0.05 --waf
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.waf_solver import compute_acw_sc_v2
+
+WAF_ARG1 = '0C1A7F8C4E1FA6B03D7E2A9C5B1E4F60A2D3C8E7'
+WAF_ACW_SC_V2 = compute_acw_sc_v2(WAF_ARG1)
+WAF_CHALLENGE_PAGE = f"<html><script>\nvar arg1='{WAF_ARG1}';\n</script></html>".encode('utf-8')
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+	"""模拟 new-api 接口"""
+
+	protocol_version = 'HTTP/1.1'
+
+	def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+		self.send_response(status)
+		self.send_header('Content-Type', content_type)
+		self.send_header('Content-Length', str(len(body)))
+		for key, value in (headers or {}).items():
+			self.send_header(key, value)
+		self.end_headers()
+		self.wfile.write(body)
+
+	def _send_json(self, data: dict, status: int = 200):
+		self._send(status, json.dumps(data).encode('utf-8'), 'application/json')
+
+	def _inject(self) -> bool:
+		"""模拟网络延迟与服务端错误，返回 True 表示已返回错误响应"""
+		options = self.server.options
+		delay = options.latency_ms + random.uniform(0, options.jitter_ms)
+		if delay > 0:
+			time.sleep(delay / 1000)
+		if options.error_rate and random.random() < options.error_rate:
+			self._send(503, b'Service Unavailable', 'text/plain')
+			return True
+		return False
+
+	def _passes_waf(self) -> bool:
+		return not self.server.options.waf or f'acw_sc__v2={WAF_ACW_SC_V2}' in self.headers.get('Cookie', '')
+
+	def do_GET(self):
+		if self._inject():
+			return
+
+		if self.path.startswith('/login'):
+			if self._passes_waf():
+				self._send(
+					200,
+					b'<html><body>login</body></html>',
+					'text/html',
+					{'Set-Cookie': 'acw_tc=bench; Max-Age=1800; Path=/'},
+				)
+			else:
+				self._send(200, WAF_CHALLENGE_PAGE, 'text/html')
+			return
+
+		if self.path.startswith('/api/user/self'):
+			if not self._passes_waf():
+				self._send(200, WAF_CHALLENGE_PAGE, 'text/html')
+				return
+			api_user = self.headers.get('new-api-user')
+			if not api_user or 'session=' not in self.headers.get('Cookie', ''):
+				self._send_json({'success': False, 'message': 'unauthorized'}, status=401)
+				return
+			self._send_json({'success': True, 'data': {'quota': 500000 * (int(api_user) % 100 + 1), 'used_quota': 0}})
+			return
+
+		self._send(404, b'Not Found', 'text/plain')
+
+	def do_POST(self):
+		length = int(self.headers.get('Content-Length') or 0)
+		if length:
+			self.rfile.read(length)
+		if self._inject():
+			return
+
+		if self.path.startswith('/api/user/sign_in'):
+			if not self._passes_waf():
+				self._send(200, WAF_CHALLENGE_PAGE, 'text/html')
+				return
+			self._send_json({'success': True, 'message': 'checked in'})
+			return
+
+		self._send(404, b'Not Found', 'text/plain')
+
+	def log_message(self, format, *args):
+		pass
+
+
+class FakeProviderServer(ThreadingHTTPServer):
+	daemon_threads = True
+	request_queue_size = 1024
+
+	def __init__(self, options: argparse.Namespace, host: str = '127.0.0.1', port: int = 0):
+		super().__init__((host, port), FakeProviderHandler)
+		self.options = options
+
+	@property
+	def url(self) -> str:
+		host, port = self.server_address[:2]
+		return f'http://{host}:{port}'
+
+	def start(self) -> threading.Thread:
+		"""在后台线程中启动服务"""
+		thread = threading.Thread(target=self.serve_forever, daemon=True)
+		thread.start()
+		return thread
+
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(description='Local stand-in new-api provider for benchmarks')
+	parser.add_argument('--port', type=int, default=0, help='port to listen on (default: random free port)')
+	parser.add_argument('--latency-ms', type=float, default=0, help='fixed latency added to every response')
+	parser.add_argument('--jitter-ms', type=float, default=0, help='random extra latency, uniform in [0, jitter]')
+	parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered with HTTP 503')
+	parser.add_argument('--waf', action='store_true', help='serve an acw_sc__v2 challenge page until it is solved')
+	return parser
+
+
+if __name__ == '__main__':
+	args = build_parser().parse_args()
+	server = FakeProviderServer(args, port=args.port)
+	print(f'LISTENING {server.server_address[1]}', flush=True)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
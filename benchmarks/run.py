@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+端到端基准测试：启动本地模拟 provider，用 N 个虚拟账号驱动签到引擎
+
+    python benchmarks/run.py --accounts 1,100,1000 --latency-ms 20 --max-concurrency 10
+    python benchmarks/run.py --history
+
+每个账号数量在独立子进程中运行（保证峰值内存互不影响），结果连同 git 提交追加写入 JSONL，便于跨提交对比。
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_RESULTS_FILE = PROJECT_ROOT / 'benchmarks' / 'results.jsonl'
+
+# 添加项目根目录到 PATH
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def git_revision() -> tuple[str | None, bool]:
+	"""返回当前 git 提交与工作区是否有未提交修改"""
+	try:
+		sha = subprocess.run(
+			['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+		).stdout.strip()
+		dirty = bool(
+			subprocess.run(
+				['git', 'status', '--porcelain', '--untracked-files=no'],
+				cwd=PROJECT_ROOT,
+				capture_output=True,
+				text=True,
+			).stdout.strip()
+		)
+		return sha, dirty
+	except Exception:
+		return None, False
+
+
+def peak_rss_mb() -> float | None:
+	"""当前进程的峰值常驻内存（MB），不支持的平台返回 None"""
+	try:
+		import resource
+	except ImportError:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# Linux 单位为 KB，macOS 为字节
+	return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(values: list[float], q: float) -> float:
+	"""最近秩法计算分位数"""
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+	return ordered[index]
+
+
+def start_fake_provider(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+	"""在独立进程中启动模拟 provider，返回 (进程, 地址)"""
+	command = [
+		sys.executable,
+		str(PROJECT_ROOT / 'benchmarks' / 'fake_provider.py'),
+		'--latency-ms',
+		str(args.latency_ms),
+		'--jitter-ms',
+		str(args.jitter_ms),
+		'--error-rate',
+		str(args.error_rate),
+	]
+	if args.waf:
+		command.append('--waf')
+
+	process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+	line = process.stdout.readline().strip()
+	if not line.startswith('LISTENING '):
+		process.kill()
+		raise RuntimeError(f'Fake provider failed to start: {line!r}')
+	return process, f'http://127.0.0.1:{line.split()[1]}'
+
+
+async def drive_accounts(args: argparse.Namespace, domain: str) -> dict:
+	"""用 N 个虚拟账号运行一次签到引擎，返回测量结果"""
+	import checkin
+	from utils.config import AccountConfig, AppConfig, ProviderConfig
+	from utils.retry import RetryPolicy, RetryQueue
+	from utils.runtime import RunContext
+	from utils.scheduler import build_limiters
+	from utils.tracing import get_tracer
+	from utils.waf_cache import WafCookieCache
+
+	provider = ProviderConfig(
+		name='bench',
+		domain=domain,
+		bypass_method=None if args.bypass == 'none' else args.bypass,
+		max_concurrency=args.max_concurrency,
+		requests_per_second=args.requests_per_second,
+	)
+	app_config = AppConfig(providers={'bench': provider})
+	accounts = [
+		AccountConfig(cookies={'session': f'bench-{i}'}, api_user=str(i), provider='bench', name=f'Bench {i}')
+		for i in range(args.accounts)
+	]
+
+	# 记录每个账号每次尝试的耗时（不含排队等待限流的时间）
+	durations: dict[int, list[float]] = {}
+	check_in_account = checkin.check_in_account
+
+	async def timed_check_in_account(account, account_index, *rest, **kwargs):
+		start = time.perf_counter()
+		try:
+			return await check_in_account(account, account_index, *rest, **kwargs)
+		finally:
+			durations.setdefault(account_index, []).append(time.perf_counter() - start)
+
+	checkin.check_in_account = timed_check_in_account
+	# 基准测试不使用跨运行缓存，重试不等待（直接传入，不修改进程环境变量）
+	retry_policy = RetryPolicy.from_env()
+	for rule in retry_policy.rules.values():
+		rule.base_delay = 0
+	run_context = RunContext(
+		limiters=build_limiters(app_config.providers, args.account_gap),
+		waf_cache=WafCookieCache(ttl=0),
+		retry_policy=retry_policy,
+	)
+
+	start = time.perf_counter()
+	try:
+		results = await checkin.run_accounts(
+			list(enumerate(accounts)), app_config, run_context, queue=RetryQueue(min_gap=0)
+		)
+	finally:
+		wall_time = time.perf_counter() - start
+		browser_launches = run_context.browser_pool.stats.launches
+		await run_context.close()
+		get_tracer().close()
+		checkin.check_in_account = check_in_account
+
+	success = sum(1 for result in results.values() if isinstance(result, tuple) and result[0])
+	latencies = [sum(values) * 1000 for values in durations.values()]
+	return {
+		'wall_time': round(wall_time, 3),
+		'accounts_per_sec': round(args.accounts / wall_time, 2) if wall_time > 0 else None,
+		'success': success,
+		'failed': args.accounts - success,
+		'attempts': sum(len(values) for values in durations.values()),
+		'latency_ms': {
+			'p50': round(percentile(latencies, 50), 2),
+			'p90': round(percentile(latencies, 90), 2),
+			'p99': round(percentile(latencies, 99), 2),
+			'max': round(max(latencies, default=0.0), 2),
+		},
+		'browser_launches': browser_launches,
+	}
+
+
+def run_single(args: argparse.Namespace) -> dict:
+	"""运行单个账号数量的基准测试并写入结果"""
+	process, domain = start_fake_provider(args)
+	try:
+		if args.verbose:
+			measurement = asyncio.run(drive_accounts(args, domain))
+		else:
+			with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+				measurement = asyncio.run(drive_accounts(args, domain))
+	finally:
+		process.terminate()
+		process.wait()
+
+	sha, dirty = git_revision()
+	record = {
+		'timestamp': datetime.now().isoformat(timespec='seconds'),
+		'git_sha': sha,
+		'git_dirty': dirty,
+		'label': args.label,
+		'python': platform.python_version(),
+		'platform': sys.platform,
+		'params': {
+			'accounts': args.accounts,
+			'latency_ms': args.latency_ms,
+			'jitter_ms': args.jitter_ms,
+			'error_rate': args.error_rate,
+			'waf': args.waf,
+			'bypass': args.bypass,
+			'max_concurrency': args.max_concurrency,
+			'requests_per_second': args.requests_per_second,
+			'account_gap': args.account_gap,
+		},
+		**measurement,
+		'peak_rss_mb': round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+	}
+
+	with open(args.output, 'a', encoding='utf-8') as f:
+		f.write(json.dumps(record, ensure_ascii=False) + '\n')
+	return record
+
+
+def print_record(record: dict):
+	latency = record['latency_ms']
+	print(
+		f'[BENCH] {record["git_sha"] or "-"}{"*" if record["git_dirty"] else ""} '
+		f'accounts={record["params"]["accounts"]} wall={record["wall_time"]:.2f}s '
+		f'({record["accounts_per_sec"]}/s) ok={record["success"]} failed={record["failed"]} '
+		f'p50={latency["p50"]:.1f}ms p90={latency["p90"]:.1f}ms p99={latency["p99"]:.1f}ms '
+		f'rss={record["peak_rss_mb"]}MB browsers={record["browser_launches"]}'
+	)
+
+
+def print_history(path: Path):
+	"""按参数分组打印历史结果，便于对比不同提交"""
+	if not path.exists():
+		print(f'[INFO] No benchmark results in {path}')
+		return
+
+	groups: dict[str, list[dict]] = {}
+	with open(path, 'r', encoding='utf-8') as f:
+		for line in f:
+			if line.strip():
+				record = json.loads(line)
+				groups.setdefault(json.dumps(record['params'], sort_keys=True), []).append(record)
+
+	for params, records in groups.items():
+		print(f'\n[PARAMS] {params}')
+		for record in records:
+			print_record(record)
+
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(description='End-to-end check-in benchmark against a local fake provider')
+	parser.add_argument('--accounts', default='100', help='comma separated account counts, e.g. 1,100,10000')
+	parser.add_argument('--latency-ms', type=float, default=10)
+	parser.add_argument('--jitter-ms', type=float, default=0)
+	parser.add_argument('--error-rate', type=float, default=0)
+	parser.add_argument('--waf', action='store_true', help='fake provider serves a WAF challenge page')
+	parser.add_argument('--bypass', choices=['none', 'waf_cookies_http', 'waf_cookies'], default='none')
+	parser.add_argument('--max-concurrency', type=int, default=10)
+	parser.add_argument('--requests-per-second', type=float, default=None)
+	parser.add_argument('--account-gap', type=float, default=0)
+	parser.add_argument('--label', default=None, help='free-form label stored with the results')
+	parser.add_argument('--output', type=Path, default=DEFAULT_RESULTS_FILE, help='results JSONL file')
+	parser.add_argument('--history', action='store_true', help='print stored results grouped by parameters')
+	parser.add_argument('--verbose', action='store_true', help='show check-in logs')
+	return parser
+
+
+def main(argv: list[str] | None = None):
+	args = build_parser().parse_args(argv)
+	if args.history:
+		print_history(args.output)
+		return
+
+	sizes = [int(size) for size in str(args.accounts).split(',') if size.strip()]
+	if len(sizes) == 1:
+		args.accounts = sizes[0]
+		print_record(run_single(args))
+		return
+
+	# 多个账号数量时，每个数量在独立子进程中运行，峰值内存互不影响
+	argv = [arg for arg in (argv if argv is not None else sys.argv[1:])]
+	for size in sizes:
+		child_argv = []
+		skip = False
+		for arg in argv:
+			if skip:
+				skip = False
+				continue
+			if arg == '--accounts':
+				skip = True
+				continue
+			if arg.startswith('--accounts='):
+				continue
+			child_argv.append(arg)
+		subprocess.run([sys.executable, __file__, '--accounts', str(size), *child_argv], check=True)
+
+
+if __name__ == '__main__':
+	main()
@@ -3,52 +3,43 @@
 AnyRouter.top 自动签到脚本
 """
 
+import argparse
 import asyncio
-import hashlib
 import json
 import os
+import signal
 import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterable
 from datetime import datetime
 
-import httpx
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
 
-from utils.config import AccountConfig, AppConfig, load_accounts_config
+from utils import metrics
+from utils.browser import BrowserPool, capture_cookies
+from utils.circuit import PROVIDER_FAILURE_KINDS, CircuitBreaker, build_breakers
+from utils.config import AccountConfig, AccountSource, AppConfig, load_account_source
 from utils.notify import get_notify
+from utils.response import classify_response
+from utils.retry import RetryQueue, RetryState, classify_exception, classify_status
+from utils.runtime import RunContext
+from utils.scheduler import PACING_META_PREFIX, THROTTLE_STATUS_CODES, ProviderLimiter, build_limiters
+from utils.shard import (
+	SHARD_RESULT_DIR,
+	get_result_path,
+	load_shard_results,
+	parse_shard,
+	select_shard,
+	write_shard_result,
+)
+from utils.state import STATE_DB_FILE, StateStore
+from utils.tracing import bind, get_tracer, span
+from utils.waf_cache import WAF_COOKIE_CACHE_FILE
+from utils.waf_solver import WAF_COOKIE_NAMES, get_waf_cookies_with_http
 
 load_dotenv()
 
-BALANCE_HASH_FILE = 'balance_hash.txt'
-
-
-def load_balance_hash():
-	"""加载余额hash"""
-	try:
-		if os.path.exists(BALANCE_HASH_FILE):
-			with open(BALANCE_HASH_FILE, 'r', encoding='utf-8') as f:
-				return f.read().strip()
-	except Exception:
-		pass
-	return None
-
-
-def save_balance_hash(balance_hash):
-	"""保存余额hash"""
-	try:
-		with open(BALANCE_HASH_FILE, 'w', encoding='utf-8') as f:
-			f.write(balance_hash)
-	except Exception as e:
-		print(f'Warning: Failed to save balance hash: {e}')
-
-
-def generate_balance_hash(balances):
-	"""生成余额数据的hash"""
-	# 将包含 quota 和 used 的结构转换为简单的 quota 值用于 hash 计算
-	simple_balances = {k: v['quota'] for k, v in balances.items()} if balances else {}
-	balance_json = json.dumps(simple_balances, sort_keys=True, separators=(',', ':'))
-	return hashlib.sha256(balance_json.encode('utf-8')).hexdigest()[:16]
-
 
 def parse_cookies(cookies_data):
 	"""解析 cookies 数据"""
@@ -65,90 +56,76 @@ def parse_cookies(cookies_data):
 	return {}
 
 
-async def get_waf_cookies_with_playwright(account_name: str, login_url: str):
-	"""使用 Playwright 获取 WAF cookies（隐私模式）"""
-	print(f'[PROCESSING] {account_name}: Starting browser to get WAF cookies...')
-
-	async with async_playwright() as p:
-		import tempfile
-
-		with tempfile.TemporaryDirectory() as temp_dir:
-			context = await p.chromium.launch_persistent_context(
-				user_data_dir=temp_dir,
-				headless=False,
-				user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-				viewport={'width': 1920, 'height': 1080},
-				args=[
-					'--disable-blink-features=AutomationControlled',
-					'--disable-dev-shm-usage',
-					'--disable-web-security',
-					'--disable-features=VizDisplayCompositor',
-					'--no-sandbox',
-				],
-			)
-
-			page = await context.new_page()
-
-			try:
-				print(f'[PROCESSING] {account_name}: Access login page to get initial cookies...')
-
-				await page.goto(login_url, wait_until='networkidle')
+async def get_waf_cookies_with_playwright(account_name: str, login_url: str, browser_pool: BrowserPool):
+	"""使用共享浏览器池中的隔离 context 获取 WAF cookies
 
-				try:
-					await page.wait_for_function('document.readyState === "complete"', timeout=5000)
-				except Exception:
-					await page.wait_for_timeout(3000)
+	Returns:
+		(waf_cookies, expires) 元组，expires 为各 cookie 的过期时间戳；失败返回 None
+	"""
+	print(f'[PROCESSING] {account_name}: Acquiring browser context to get WAF cookies...')
 
-				cookies = await page.context.cookies()
+	try:
+		async with browser_pool.context() as context:
+			print(f'[PROCESSING] {account_name}: Access login page to get initial cookies...')
 
-				waf_cookies = {}
-				for cookie in cookies:
-					cookie_name = cookie.get('name')
-					cookie_value = cookie.get('value')
-					if cookie_name in ['acw_tc', 'cdn_sec_tc', 'acw_sc__v2'] and cookie_value is not None:
-						waf_cookies[cookie_name] = cookie_value
+			timeout = float(os.getenv('WAF_CAPTURE_TIMEOUT', '10'))
+			with span('browser.goto', url=login_url) as current:
+				cookies = await capture_cookies(context, login_url, WAF_COOKIE_NAMES, timeout)
+				current.set(cookies=len(cookies))
 
-				print(f'[INFO] {account_name}: Got {len(waf_cookies)} WAF cookies: {list(waf_cookies.keys())}')
+			waf_cookies = {}
+			expires = []
+			for cookie in cookies:
+				waf_cookies[cookie['name']] = cookie['value']
+				expires.append(cookie.get('expires', -1))
 
-				# 灵活的检测策略：只要获取到至少一个 WAF cookie 就算成功
-				if not waf_cookies:
-					print(f'[FAILED] {account_name}: No WAF cookies obtained')
-					await context.close()
-					return None
+			print(f'[INFO] {account_name}: Got {len(waf_cookies)} WAF cookies: {list(waf_cookies.keys())}')
 
-				# 记录缺失的 cookies（仅作为提示，不影响成功判断）
-				expected_cookies = ['acw_tc', 'cdn_sec_tc', 'acw_sc__v2']
-				missing_cookies = [c for c in expected_cookies if c not in waf_cookies]
-				if missing_cookies:
-					print(f'[INFO] {account_name}: Some cookies not found (may not be required): {missing_cookies}')
+			# 灵活的检测策略：只要获取到至少一个 WAF cookie 就算成功
+			if not waf_cookies:
+				print(f'[FAILED] {account_name}: No WAF cookies obtained')
+				return None
 
-				print(f'[SUCCESS] {account_name}: Successfully got WAF cookies')
+			# 记录缺失的 cookies（仅作为提示，不影响成功判断）
+			missing_cookies = [c for c in WAF_COOKIE_NAMES if c not in waf_cookies]
+			if missing_cookies:
+				print(f'[INFO] {account_name}: Some cookies not found (may not be required): {missing_cookies}')
 
-				await context.close()
+			print(f'[SUCCESS] {account_name}: Successfully got WAF cookies')
 
-				return waf_cookies
+			return waf_cookies, expires
 
-			except Exception as e:
-				print(f'[FAILED] {account_name}: Error occurred while getting WAF cookies: {e}')
-				await context.close()
-				return None
+	except Exception as e:
+		print(f'[FAILED] {account_name}: Error occurred while getting WAF cookies: {e}')
+		return None
 
 
-def get_user_info(client, headers, user_info_url: str, account_name: str = ''):
-	"""获取用户信息"""
+async def get_user_info(client, headers, user_info_url: str, account_name: str = ''):
+	"""获取用户信息（只读取响应前缀并分类，不完整下载 WAF 页面）"""
 	try:
-		response = client.get(user_info_url, headers=headers, timeout=30)
+		response = await client.get(user_info_url, headers=headers, timeout=30, stream=True)
+		result = await classify_response(response, label=account_name)
 
 		# 添加详细日志用于诊断
 		if account_name:
-			print(f'[DEBUG] {account_name}: Response status: {response.status_code}')
-			print(f'[DEBUG] {account_name}: Content-Type: {response.headers.get("Content-Type", "Unknown")}')
-			print(f'[DEBUG] {account_name}: Response preview: {response.text[:300]}...')
+			print(f'[DEBUG] {account_name}: Response status: {result.status_code}, Content-Type: {result.content_type}')
 
-		if response.status_code == 200:
-			# 首先尝试解析 JSON，失败后再检查是否是 HTML 验证页面
-			try:
-				data = response.json()
+		if result.kind == 'login':
+			return {'success': False, 'error': 'Failed to get user info: redirected to login', 'kind': 'auth'}
+
+		# 检测是否为 WAF 验证/拦截页面（WAF 也可能以 403/405 等状态码返回拦截页）
+		if result.kind == 'waf':
+			print(f'[WARNING] {account_name}: WAF verification page detected (HTTP {result.status_code})')
+			return {
+				'success': False,
+				'error': 'WAF verification page detected',
+				'kind': 'waf',
+				'status_code': result.status_code,
+			}
+
+		if result.status_code == 200:
+			if result.kind == 'json':
+				data = result.data
 				if data.get('success'):
 					user_data = data.get('data', {})
 					quota = round(user_data.get('quota', 0) / 500000, 2)
@@ -159,49 +136,89 @@ def get_user_info(client, headers, user_info_url: str, account_name: str = ''):
 						'used_quota': used_quota,
 						'display': f':money: Current balance: ${quota}, Used: ${used_quota}',
 					}
-			except json.JSONDecodeError:
-				# JSON 解析失败，检查是否是 HTML 验证页面
-				content_type = response.headers.get('Content-Type', '').lower()
-				response_text = response.text.lower()
-
-				# 检测是否为 WAF 验证页面
-				if ('html' in content_type or
-					'<html' in response_text[:100] or
-					'verification' in response_text[:200] or
-					'cloudflare' in response_text[:200] or
-					'acw_tc' in response_text[:200] or
-					'sorry, you have been blocked' in response_text or
-					'access denied' in response_text):
-
-					print(f'[WARNING] {account_name}: WAF verification page detected')
-					return {'success': False, 'error': 'WAF verification page detected'}
-				else:
-					# 不是验证页面，但解析 JSON 失败
-					print(f'[ERROR] {account_name}: Invalid response format (not JSON, not HTML verification)')
-					return {'success': False, 'error': 'Invalid response format'}
-
-		return {'success': False, 'error': f'Failed to get user info: HTTP {response.status_code}'}
-	except Exception as e:
-		return {'success': False, 'error': f'Failed to get user info: {str(e)[:50]}...'}
 
+				message = data.get('message') or 'success is false'
+				return {'success': False, 'error': f'Failed to get user info: {message}', 'kind': 'auth'}
 
-async def prepare_cookies(account_name: str, provider_config, user_cookies: dict) -> dict | None:
-	"""准备请求所需的 cookies（可能包含 WAF cookies）"""
-	waf_cookies = {}
+			# 不是验证页面，但也不是 JSON
+			print(f'[ERROR] {account_name}: Invalid response format (not JSON, not HTML verification)')
+			return {'success': False, 'error': 'Invalid response format', 'kind': 'format'}
 
-	if provider_config.needs_waf_cookies():
-		login_url = f'{provider_config.domain}{provider_config.login_path}'
-		waf_cookies = await get_waf_cookies_with_playwright(account_name, login_url)
-		if not waf_cookies:
+		return {
+			'success': False,
+			'error': f'Failed to get user info: HTTP {result.status_code}',
+			'kind': classify_status(result.status_code),
+			'status_code': result.status_code,
+		}
+	except Exception as e:
+		return {'success': False, 'error': f'Failed to get user info: {str(e)[:50]}...', 'kind': classify_exception(e)}
+
+
+async def fetch_waf_cookies(account_name: str, provider_config, run_context: RunContext):
+	"""获取 WAF cookies（HTTP 求解失败时回退到浏览器），返回 (cookies, expires) 或 None"""
+	login_url = f'{provider_config.domain}{provider_config.login_path}'
+	# 挑战与验证请求同样访问受 WAF 保护的地址，与 API 请求共用 provider 的速率限制
+	limiter = run_context.limiter(provider_config.name)
+	result = None
+	if provider_config.uses_http_waf_solver():
+		with (
+			span('waf.http_solver') as current,
+			metrics.WAF_COOKIE_SECONDS.time(provider=provider_config.name, method='http'),
+		):
+			result = await get_waf_cookies_with_http(
+				account_name, login_url, run_context.http_pool.get(provider_config.domain), acquire=limiter.acquire
+			)
+			current.set(solved=bool(result))
+		if not result:
+			print(f'[INFO] {account_name}: HTTP WAF solver failed, falling back to browser')
+	if not result:
+		with (
+			span('waf.browser') as current,
+			metrics.WAF_COOKIE_SECONDS.time(provider=provider_config.name, method='browser'),
+		):
+			await limiter.acquire()
+			result = await get_waf_cookies_with_playwright(account_name, login_url, run_context.browser_pool)
+			current.set(solved=bool(result))
+	return result
+
+
+async def prepare_cookies(
+	account_name: str, provider_config, user_cookies: dict, run_context: RunContext
+) -> dict | None:
+	"""准备请求所需的 cookies（可能包含 WAF cookies）
+
+	缓存未命中时按域名加锁，同一 provider 并发的账号只有一个去获取 WAF cookies，其余等待后直接使用缓存；
+	缓存关闭时不加锁。
+	"""
+	if not provider_config.needs_waf_cookies():
+		print(f'[INFO] {account_name}: Using user cookies directly (no WAF bypass needed)')
+		return dict(user_cookies)
+
+	waf_cache = run_context.waf_cache
+	waf_cookies = waf_cache.get(provider_config.domain)
+	if waf_cookies:
+		print(f'[INFO] {account_name}: Using cached WAF cookies: {list(waf_cookies.keys())}')
+		return {**waf_cookies, **user_cookies}
+
+	async with waf_cache.lock(provider_config.domain):
+		# 等待期间其他账号可能已获取并写入缓存
+		waf_cookies = waf_cache.get(provider_config.domain)
+		if waf_cookies:
+			print(f'[INFO] {account_name}: Using WAF cookies fetched by another account: {list(waf_cookies.keys())}')
+			return {**waf_cookies, **user_cookies}
+
+		result = await fetch_waf_cookies(account_name, provider_config, run_context)
+		if not result:
 			print(f'[FAILED] {account_name}: Unable to get WAF cookies')
 			return None
-	else:
-		print(f'[INFO] {account_name}: Using user cookies directly (no WAF bypass needed)')
+
+		waf_cookies, expires = result
+		waf_cache.set(provider_config.domain, waf_cookies, expires)
 
 	return {**waf_cookies, **user_cookies}
 
 
-def execute_check_in(client, account_name: str, provider_config, headers: dict):
+async def execute_check_in(client, account_name: str, provider_config, headers: dict):
 	"""执行签到请求"""
 	print(f'[NETWORK] {account_name}: Executing check-in')
 
@@ -209,13 +226,14 @@ def execute_check_in(client, account_name: str, provider_config, headers: dict):
 	checkin_headers.update({'Content-Type': 'application/json', 'X-Requested-With': 'XMLHttpRequest'})
 
 	sign_in_url = f'{provider_config.domain}{provider_config.sign_in_path}'
-	response = client.post(sign_in_url, headers=checkin_headers, timeout=30)
+	response = await client.post(sign_in_url, headers=checkin_headers, timeout=30, stream=True)
+	classified = await classify_response(response, label=account_name)
 
-	print(f'[RESPONSE] {account_name}: Response status code {response.status_code}')
+	print(f'[RESPONSE] {account_name}: Response status code {classified.status_code}')
 
-	if response.status_code == 200:
-		try:
-			result = response.json()
+	if classified.status_code == 200:
+		if classified.kind == 'json':
+			result = classified.data
 			if result.get('ret') == 1 or result.get('code') == 0 or result.get('success'):
 				print(f'[SUCCESS] {account_name}: Check-in successful!')
 				return True
@@ -223,21 +241,28 @@ def execute_check_in(client, account_name: str, provider_config, headers: dict):
 				error_msg = result.get('msg', result.get('message', 'Unknown error'))
 				print(f'[FAILED] {account_name}: Check-in failed - {error_msg}')
 				return False
-		except json.JSONDecodeError:
-			# 如果不是 JSON 响应，检查是否包含成功标识
-			if 'success' in response.text.lower():
-				print(f'[SUCCESS] {account_name}: Check-in successful!')
-				return True
-			else:
-				print(f'[FAILED] {account_name}: Check-in failed - Invalid response format')
-				return False
+		# 如果不是 JSON 响应，检查是否包含成功标识（WAF 页面不算）
+		if classified.kind == 'text' and b'success' in classified.body.lower():
+			print(f'[SUCCESS] {account_name}: Check-in successful!')
+			return True
+		print(f'[FAILED] {account_name}: Check-in failed - Invalid response format')
+		return False
 	else:
-		print(f'[FAILED] {account_name}: Check-in failed - HTTP {response.status_code}')
+		print(f'[FAILED] {account_name}: Check-in failed - HTTP {classified.status_code}')
 		return False
 
 
-async def check_in_account(account: AccountConfig, account_index: int, app_config: AppConfig):
-	"""为单个账号执行签到操作"""
+async def check_in_account(
+	account: AccountConfig,
+	account_index: int,
+	app_config: AppConfig,
+	run_context: RunContext,
+	state: RetryState | None = None,
+):
+	"""为单个账号执行一轮签到操作
+
+	失败时返回的 user_info 带有 kind 字段（失败类型），供重试队列判断是否重试。
+	"""
 	account_name = account.get_display_name(account_index)
 	print(f'\n[PROCESSING] Starting to process {account_name}')
 
@@ -253,264 +278,883 @@ async def check_in_account(account: AccountConfig, account_index: int, app_confi
 		print(f'[FAILED] {account_name}: Invalid configuration format')
 		return False, None
 
-	# 重试配置
-	max_retries = int(os.getenv('MAX_RETRIES', '2'))
-	retry_delay = float(os.getenv('RETRY_DELAY', '5'))
-
-	for attempt in range(max_retries + 1):
-		if attempt > 0:
-			print(f'[RETRY] {account_name}: Attempt {attempt + 1}/{max_retries + 1} after {retry_delay}s delay...')
-			await asyncio.sleep(retry_delay)
-
-		all_cookies = await prepare_cookies(account_name, provider_config, user_cookies)
+	headers = {
+		'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
+		'Accept': 'application/json, text/plain, */*',
+		'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+		'Accept-Encoding': 'gzip, deflate, br, zstd',
+		'Referer': provider_config.domain,
+		'Origin': provider_config.domain,
+		'Connection': 'keep-alive',
+		'Sec-Fetch-Dest': 'empty',
+		'Sec-Fetch-Mode': 'cors',
+		'Sec-Fetch-Site': 'same-origin',
+		provider_config.api_user_key: account.api_user,
+	}
+	user_info_url = f'{provider_config.domain}{provider_config.user_info_path}'
+	limiter = run_context.limiter(account.provider)
+
+	# 本次只执行一轮；失败后由 run_accounts 放入重试队列，非 WAF 失败时复用上次的 cookies
+	state = state or RetryState()
+	state.attempts += 1
+
+	if state.cookies is None:
+		with span('prepare_cookies') as current:
+			all_cookies = await prepare_cookies(account_name, provider_config, user_cookies, run_context)
+			current.set(obtained=bool(all_cookies))
 		if not all_cookies:
-			if attempt < max_retries:
-				continue
-			return False, None
+			return False, {'success': False, 'error': 'Unable to get WAF cookies', 'kind': 'waf'}
+		state.cookies = all_cookies
 
-		client = httpx.Client(http2=True, timeout=30.0)
+	# 复用 provider 共享的连接，cookies 保存在账号自己的会话中
+	client = run_context.http_pool.session(provider_config.domain, state.cookies)
 
-		try:
-			client.cookies.update(all_cookies)
-
-			headers = {
-				'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-				'Accept': 'application/json, text/plain, */*',
-				'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-				'Accept-Encoding': 'gzip, deflate, br, zstd',
-				'Referer': provider_config.domain,
-				'Origin': provider_config.domain,
-				'Connection': 'keep-alive',
-				'Sec-Fetch-Dest': 'empty',
-				'Sec-Fetch-Mode': 'cors',
-				'Sec-Fetch-Site': 'same-origin',
-				provider_config.api_user_key: account.api_user,
-			}
+	try:
+		await limiter.acquire()
+		with span('get_user_info') as current, metrics.USER_INFO_SECONDS.time(provider=account.provider):
+			user_info = await get_user_info(client, headers, user_info_url, account_name)
+			current.set(success=bool(user_info.get('success')), kind=user_info.get('kind'))
+		update_pacing(limiter, user_info)
 
-			user_info_url = f'{provider_config.domain}{provider_config.user_info_path}'
-			user_info = get_user_info(client, headers, user_info_url, account_name)
-
-			# 检查是否因为 WAF 失败
-			if user_info and not user_info.get('success'):
-				error = user_info.get('error', '')
-				if ('WAF' in error or
-					'verification' in error.lower() or
-					'HTML' in error):
-					if attempt < max_retries:
-						print(f'[WARNING] {account_name}: WAF/verification detected, will retry...')
-						client.close()
-						continue
-
-			if user_info and user_info.get('success'):
-				print(user_info['display'])
-			elif user_info:
-				print(user_info.get('error', 'Unknown error'))
+		if user_info and user_info.get('success'):
+			print(user_info['display'])
 
 			if provider_config.needs_manual_check_in():
-				success = execute_check_in(client, account_name, provider_config, headers)
-				return success, user_info
-			else:
-				print(f'[INFO] {account_name}: Check-in completed automatically (triggered by user info request)')
-				# 只有成功获取用户信息才算成功
-				success = user_info and user_info.get('success', False)
+				await limiter.acquire()
+				with span('execute_check_in') as current, metrics.SIGN_IN_SECONDS.time(provider=account.provider):
+					success = await execute_check_in(client, account_name, provider_config, headers)
+					current.set(success=success)
 				return success, user_info
 
+			print(f'[INFO] {account_name}: Check-in completed automatically (triggered by user info request)')
+			return True, user_info
+
+		kind = user_info.get('kind', 'format')
+		print(user_info.get('error', 'Unknown error'))
+
+		if kind == 'waf':
+			metrics.WAF_DETECTIONS.inc(provider=account.provider)
+			# WAF cookies 已失效，清除缓存，重试时重新获取
+			if provider_config.needs_waf_cookies():
+				run_context.waf_cache.invalidate(provider_config.domain)
+			state.cookies = None
+			return False, user_info
+
+		# 没有重试机会（重试预算用完或重试队列不再接受该账号）时仍尝试签到一次（签到接口可能仍然可用）
+		no_retry = state.last_attempt or not run_context.retry_policy.can_retry(kind, state.retries)
+		if provider_config.needs_manual_check_in() and no_retry:
+			await limiter.acquire()
+			with (
+				span('execute_check_in', fallback=True) as current,
+				metrics.SIGN_IN_SECONDS.time(provider=account.provider),
+			):
+				success = await execute_check_in(client, account_name, provider_config, headers)
+				current.set(success=success)
+			return success, user_info
+
+		return False, user_info
+
+	except Exception as e:
+		print(f'[FAILED] {account_name}: Error occurred during check-in process - {str(e)[:50]}...')
+		return False, {'success': False, 'error': f'Exception: {str(e)[:100]}', 'kind': classify_exception(e)}
+
+
+def update_pacing(limiter: ProviderLimiter, user_info: dict):
+	"""根据用户信息请求的结果调整 provider 的账号间隔：正常时缩短，WAF 页面或 429/403 时退避"""
+	if user_info.get('kind') == 'waf':
+		limiter.record_throttle('WAF page detected')
+	elif user_info.get('status_code') in THROTTLE_STATUS_CODES:
+		limiter.record_throttle(f'HTTP {user_info["status_code"]}')
+	elif user_info.get('success'):
+		limiter.record_clean()
+
+
+def update_breaker(breaker: CircuitBreaker, outcome: tuple):
+	"""根据单次尝试的结果更新 provider 熔断器"""
+	success, user_info = outcome
+	kind = (user_info or {}).get('kind')
+	# 403/429 多为 WAF 封禁 IP 或限流，即使响应不是 WAF 页面（失败类型为 auth）也视为 provider 不可用
+	if kind in PROVIDER_FAILURE_KINDS or (user_info or {}).get('status_code') in THROTTLE_STATUS_CODES:
+		breaker.record_failure(user_info.get('error', kind))
+	elif success or kind == 'auth' or (user_info or {}).get('success'):
+		# 账号级失败（cookies 失效、签到接口拒绝）说明 provider 仍可访问
+		breaker.record_success()
+	else:
+		breaker.release_probe()
+
+
+async def run_accounts(
+	entries: Iterable[tuple[int, AccountConfig]],
+	app_config: AppConfig,
+	run_context: RunContext,
+	on_result: Callable[[int, AccountConfig, tuple | BaseException], None] | None = None,
+	queue: RetryQueue | None = None,
+) -> dict[int, tuple | BaseException]:
+	"""并发处理账号
+
+	entries 为 (账号序号, 账号配置) 的可迭代对象，按需读取，已读取但未完成的账号不超过 ACCOUNT_MAX_PENDING 个。
+	不同 provider 的账号互不等待，同一 provider 内受并发数、请求速率与账号间隔限制；
+	账号获得 provider 槽位后再占用全局槽位，同时签到中的账号不超过 ACCOUNT_MAX_IN_FLIGHT 个，
+	慢 provider 排队中的账号不会占满全局槽位。
+	第一轮结束后，可重试的失败账号进入延后重试队列，按最小间隔与退避时间再次处理。
+	返回 {账号序号: check_in_account 的最终结果或其抛出的异常}；
+	指定 on_result 时改为在每个账号得到最终结果时回调，不再保留全部结果（返回空字典）。
+	queue 为 None 时按环境变量创建重试队列。
+	"""
+	results: dict[int, tuple | BaseException] = {}
+	states: dict[int, RetryState] = {}
+	if queue is None:
+		queue = RetryQueue()
+	max_in_flight = max(1, int(os.getenv('ACCOUNT_MAX_IN_FLIGHT', '1000')))
+	max_pending = max(max_in_flight, int(os.getenv('ACCOUNT_MAX_PENDING', str(max_in_flight * 10))))
+	# 单次尝试（含获取 WAF cookies、启动浏览器与各个请求）的总时长上限，不大于 0 时不限制
+	attempt_timeout = float(os.getenv('ACCOUNT_ATTEMPT_TIMEOUT', '120'))
+	in_flight = asyncio.Semaphore(max_in_flight)
+
+	def finish(index: int, account: AccountConfig, outcome: tuple | BaseException):
+		states.pop(index, None)
+		if on_result is None:
+			results[index] = outcome
+		else:
+			on_result(index, account, outcome)
+
+	def reject(index: int, account: AccountConfig, breaker: CircuitBreaker) -> tuple:
+		"""provider 熔断时账号直接失败"""
+		reason = breaker.describe()
+		metrics.CIRCUIT_REJECTIONS.inc(provider=account.provider)
+		print(f'[CIRCUIT] {account.get_display_name(index)}: {reason}, skipping')
+		return False, {'success': False, 'error': reason, 'kind': 'circuit'}
+
+	async def run_one(index: int, account: AccountConfig):
+		state = states.setdefault(index, RetryState())
+		state.last_attempt = not queue.can_push(index)
+		attributes = {'account': account.get_display_name(index), 'provider': account.provider}
+		breaker = run_context.breaker(account.provider)
+		if breaker.is_open():
+			finish(index, account, reject(index, account, breaker))
+			return
+
+		try:
+			with bind(**attributes, attempt=state.attempts + 1), span('account.attempt') as current:
+				queued_at = time.perf_counter()
+				async with run_context.limiter(account.provider).slot(skip_gap=breaker.is_open), in_flight:
+					# 等待 provider 并发槽位、账号间隔与全局槽位的时间
+					current.set(slot_wait_ms=round((time.perf_counter() - queued_at) * 1000, 3))
+					if not breaker.allow():
+						current.set(circuit='open')
+						outcome = reject(index, account, breaker)
+					else:
+						try:
+							async with asyncio.timeout(attempt_timeout if attempt_timeout > 0 else None):
+								outcome = await check_in_account(account, index, app_config, run_context, state)
+						except TimeoutError:
+							error = f'Attempt timed out after {attempt_timeout:g}s'
+							print(f'[FAILED] {account.get_display_name(index)}: {error}')
+							outcome = False, {'success': False, 'error': error, 'kind': 'transport'}
+						except Exception as e:
+							breaker.record_failure(f'Exception: {str(e)[:100]}')
+							raise
+						update_breaker(breaker, outcome)
+				current.set(success=bool(outcome[0]))
 		except Exception as e:
-			print(f'[FAILED] {account_name}: Error occurred during check-in process - {str(e)[:50]}...')
-			if attempt < max_retries:
-				print(f'[WARNING] {account_name}: Exception occurred, will retry...')
-				client.close()
-				continue
-			return False, None
-		finally:
-			client.close()
+			finish(index, account, e)
+			return
+
+		success, user_info = outcome
+		kind = user_info.get('kind') if user_info else None
+		if success or not kind:
+			finish(index, account, outcome)
+			return
+
+		delay = run_context.retry_policy.next_delay(kind, state.retries)
+		if delay is not None and queue.push(index, account, delay):
+			metrics.RETRIES.inc(provider=account.provider, kind=kind)
+			print(f'[RETRY] {account.get_display_name(index)}: "{kind}" failure, deferred to retry queue')
+		else:
+			finish(index, account, outcome)
 
-	# 所有重试都失败
-	print(f'[FAILED] {account_name}: All retry attempts exhausted')
-	return False, None
+	pending = asyncio.Semaphore(max_pending)
+	tasks: set[asyncio.Task] = set()
 
+	def release(task: asyncio.Task):
+		tasks.discard(task)
+		pending.release()
 
-async def main():
-	"""主函数"""
-	print('[SYSTEM] AnyRouter.top multi-account auto check-in script started (using Playwright)')
-	print(f'[TIME] Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+	try:
+		for i, account in entries:
+			await pending.acquire()
+			task = asyncio.create_task(run_one(i, account))
+			tasks.add(task)
+			task.add_done_callback(release)
+		await asyncio.gather(*tasks)
+	finally:
+		for task in list(tasks):
+			task.cancel()
+
+	while queue:
+		wait = queue.next_ready_in()
+		if wait > 0:
+			print(f'[RETRY] {len(queue)} account(s) in retry queue, next retry in {wait:.1f}s')
+			with span('retry.backoff', queued=len(queue)):
+				await asyncio.sleep(wait)
+		await asyncio.gather(*(run_one(entry.index, entry.account) for entry in queue.pop_ready()))
+
+	return results
+
+
+def checked_in_outcome(
+	account: AccountConfig, index: int, app_config: AppConfig, state_store: StateStore
+) -> tuple | None:
+	"""账号自 provider 最近一次重置后已成功签到时，返回 (True, user_info)，user_info 使用上次记录的余额
+
+	按账号标识逐个查询运行状态，不一次性加载全部账号状态。
+	"""
+	provider_config = app_config.get_provider(account.provider)
+	if not provider_config:
+		return None
+	stored = state_store.get_account(account.get_account_key())
+	if not stored or not stored['last_success_at'] or stored['quota'] is None:
+		return None
+	if stored['last_success_at'] < provider_config.last_reset_time().timestamp():
+		return None
+
+	quota, used_quota = stored['quota'], stored['used_quota']
+	print(f'[SKIP] {account.get_display_name(index)}: Already checked in since last reset, skipping')
+	return (
+		True,
+		{
+			'success': True,
+			'quota': quota,
+			'used_quota': used_quota,
+			'display': f':money: Current balance: ${quota}, Used: ${used_quota}',
+			'skipped': True,
+		},
+	)
+
+
+def build_account_record(account: AccountConfig, index: int, outcome) -> dict:
+	"""将单个账号的处理结果整理为统一的记录格式"""
+	record = {
+		'key': account.get_account_key(),
+		'api_user': account.api_user,
+		'name': account.get_display_name(index),
+		'provider': account.provider,
+		'success': False,
+		'skipped': False,
+		'quota': None,
+		'used_quota': None,
+		'error': None,
+		'kind': None,
+	}
+
+	if isinstance(outcome, BaseException):
+		print(f'[FAILED] {record["name"]} processing exception: {outcome}')
+		record['error'] = f'Exception: {str(outcome)[:100]}'
+		record['kind'] = 'exception'
+		return record
+
+	success, user_info = outcome
+	record['success'] = bool(success)
+	if user_info and user_info.get('success'):
+		record['quota'] = user_info['quota']
+		record['used_quota'] = user_info['used_quota']
+		record['skipped'] = bool(user_info.get('skipped'))
+	if not success:
+		if user_info and user_info.get('success'):
+			# 用户信息获取成功，签到请求失败
+			record['error'] = 'Check-in request failed'
+		else:
+			record['error'] = user_info.get('error', 'Unknown error') if user_info else 'Unknown error'
+		# 用户信息获取成功但签到接口失败时没有 kind
+		record['kind'] = (user_info or {}).get('kind') or (
+			'sign_in' if user_info and user_info.get('success') else 'unknown'
+		)
+		print(f'[NOTIFY] {record["name"]} failed, will send notification')
+	return record
+
+
+def diff_balances(records: list[dict], previous_accounts: dict[str, dict]) -> list[dict]:
+	"""找出余额与上次记录不同的账号（新账号也算变化），并附上上次余额"""
+	changed = []
+	for record in records:
+		if record['quota'] is None or record['skipped']:
+			continue
+		previous = previous_accounts.get(record['key'])
+		previous_quota = previous['quota'] if previous else None
+		if previous_quota is None or previous_quota != record['quota']:
+			changed.append({**record, 'previous_quota': previous_quota})
+	return changed
+
+
+def format_balance(record: dict) -> str:
+	"""余额行，余额变化时附上上次余额"""
+	line = f':money: Current balance: ${record["quota"]}, Used: ${record["used_quota"]}'
+	if record.get('previous_quota') is not None:
+		line += f' (was ${record["previous_quota"]})'
+	return line
+
+
+async def send_report(records: list[dict], changed: list[dict], first_run: bool = False, state_store=None):
+	"""仅针对失败与余额变化的账号构建并发送通知"""
+	failed = [record for record in records if not record['success']]
+	success_count = len(records) - len(failed)
+	total_count = len(records)
+
+	if changed:
+		if first_run:
+			print('[NOTIFY] First run detected, will send notification with current balances')
+		else:
+			print(f'[NOTIFY] Balance changes detected for {len(changed)} account(s), will send notification')
+	else:
+		print('[INFO] No balance changes detected')
+
+	if not failed and not changed:
+		print('[INFO] All accounts successful and no balance changes detected, notification skipped')
+		return
+
+	notification_content = []
+	accounts_data = []
 
+	# 每个账号只出现一次：失败账号附带余额（及变化），余额变化列表不再重复失败账号
+	changed_by_key = {record['key']: record for record in changed}
+	failed_keys = {record['key'] for record in failed}
+
+	for record in failed:
+		account_result = f'[FAIL] {record["name"]}'
+		if record['quota'] is not None:
+			account_result += '\n' + format_balance(changed_by_key.get(record['key'], record))
+		account_result += f'\n{record["error"]}'
+		notification_content.append(account_result)
+		accounts_data.append(
+			{
+				'name': record['name'],
+				'success': False,
+				'quota': record['quota'] or 0,
+				'used_quota': record['used_quota'] or 0,
+				'error': record['error'],
+			}
+		)
+
+	for record in changed:
+		if record['key'] in failed_keys:
+			continue
+		notification_content.append(f'[BALANCE] {record["name"]}\n{format_balance(record)}')
+		accounts_data.append(
+			{
+				'name': record['name'],
+				'success': record['success'],
+				'quota': record['quota'],
+				'used_quota': record['used_quota'],
+			}
+		)
+
+	# 构建文本通知内容（用于非邮件通知渠道）
+	summary = [
+		'[STATS] Check-in result statistics:',
+		f'[SUCCESS] Success: {success_count}/{total_count}',
+		f'[FAIL] Failed: {total_count - success_count}/{total_count}',
+	]
+
+	if success_count == total_count:
+		summary.append('[SUCCESS] All accounts check-in successful!')
+	elif success_count > 0:
+		summary.append('[WARN] Some accounts check-in successful')
+	else:
+		summary.append('[ERROR] All accounts check-in failed')
+
+	time_info = f'[TIME] Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+
+	notify_content = '\n\n'.join([time_info, '\n'.join(notification_content), '\n'.join(summary)])
+
+	print(notify_content)
+
+	# 构建 HTML 邮件数据（仅包含失败与余额变化的账号）
+	html_data = {
+		'accounts': accounts_data,
+		'summary': {
+			'total': total_count,
+			'success_count': success_count,
+			'failed_count': total_count - success_count,
+			'success_rate': (success_count / total_count * 100) if total_count > 0 else 0,
+		},
+		'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+	}
+
+	if os.getenv('HTTP_REPLAY'):
+		print('[REPLAY] Replay mode, notification skipped')
+		return
+
+	# HTML 邮件与其他通知（钉钉、飞书等）并发发送，其他通知跳过邮件避免重复发送
+	notify = get_notify()
+	await asyncio.gather(
+		notify.send_html_email_async('AnyRouter 签到结果', html_data, state_store=state_store),
+		notify.push_message_async(
+			'AnyRouter Check-in Alert', notify_content, msg_type='text', skip_email=True, data=html_data
+		),
+	)
+	print('[NOTIFY] Notification sent due to failures or balance changes')
+
+
+def isolate_replay() -> str | None:
+	"""HTTP_REPLAY 设置时把运行状态、WAF cookies 缓存与分片结果改到临时目录，返回该目录；未回放时返回 None
+
+	回放的结果不是真实签到结果，不能覆盖真实的账号状态与缓存；通知在 send_report 中跳过。
+	"""
+	if not os.getenv('HTTP_REPLAY'):
+		return None
+
+	directory = tempfile.mkdtemp(prefix='checkin-replay-')
+	os.environ['STATE_DB_PATH'] = os.path.join(directory, STATE_DB_FILE)
+	os.environ['WAF_COOKIE_CACHE_FILE'] = os.path.join(directory, WAF_COOKIE_CACHE_FILE)
+	os.environ['SHARD_RESULT_DIR'] = os.path.join(directory, SHARD_RESULT_DIR)
+	print(f'[REPLAY] Replay mode, state and caches are kept in {directory}')
+	return directory
+
+
+def load_run_config() -> tuple[AppConfig, AccountSource] | None:
+	"""加载 provider 与账号配置，失败返回 None
+
+	账号文件在这里只做一次流式校验与计数，实际处理时再逐行读取。
+	"""
 	app_config = AppConfig.load_from_env()
 	print(f'[INFO] Loaded {len(app_config.providers)} provider configuration(s)')
 
-	accounts = load_accounts_config()
-	if not accounts:
+	accounts = load_account_source()
+	account_count = accounts.count() if accounts else 0
+	if not account_count:
 		print('[FAILED] Unable to load account configuration, program exits')
-		sys.exit(1)
-
-	print(f'[INFO] Found {len(accounts)} account configurations')
+		return None
 
-	# 配置：每个账号之间的延迟（秒）- GitHub Actions 环境建议使用更长的延迟
-	DELAY_BETWEEN_ACCOUNTS = float(os.getenv('DELAY_BETWEEN_ACCOUNTS', '5'))
-	print(f'[INFO] Delay between accounts: {DELAY_BETWEEN_ACCOUNTS} seconds')
+	print(f'[INFO] Found {account_count} account configurations')
+	if accounts.errors:
+		print(f'[WARNING] Skipped {accounts.errors} invalid account line(s)')
+	return app_config, accounts
 
-	last_balance_hash = load_balance_hash()
 
-	success_count = 0
-	total_count = len(accounts)
-	notification_content = []
-	current_balances = {}
-	need_notify = False  # 是否需要发送通知
-	balance_changed = False  # 余额是否有变化
+def get_account_delay() -> float:
+	"""同一 provider 内相邻账号之间的延迟（秒）- GitHub Actions 环境建议使用更长的延迟"""
+	return float(os.getenv('DELAY_BETWEEN_ACCOUNTS', '5'))
 
-	# 用于构建 HTML 邮件的账号数据
-	accounts_data = []
 
-	for i, account in enumerate(accounts):
-		account_key = f'account_{i + 1}'
-		account_name = account.get_display_name(i)
+def load_pacing(state_store: StateStore | None, providers, delay: float) -> dict[str, float]:
+	"""读取上次运行学到的各 provider 账号间隔
 
+	保存时的 DELAY_BETWEEN_ACCOUNTS 与 delay 不同（或为旧格式）时丢弃，重新从 delay 开始。
+	"""
+	learned = {}
+	if state_store is None:
+		return learned
+	for name in providers:
+		value = state_store.get_meta(f'{PACING_META_PREFIX}{name}')
+		if value is None:
+			continue
 		try:
-			success, user_info = await check_in_account(account, i, app_config)
-			if success:
-				success_count += 1
-
-			should_notify_this_account = False
-
-			if not success:
-				should_notify_this_account = True
-				need_notify = True
-				print(f'[NOTIFY] {account_name} failed, will send notification')
-
-			if user_info and user_info.get('success'):
-				current_quota = user_info['quota']
-				current_used = user_info['used_quota']
-				current_balances[account_key] = {'quota': current_quota, 'used': current_used}
-
-				# 添加到 HTML 数据
-				accounts_data.append({
-					'name': account_name,
-					'success': success,
-					'quota': current_quota,
-					'used_quota': current_used,
-				})
+			stored = json.loads(value)
+			gap, stored_delay = float(stored['gap']), float(stored['delay'])
+		except (ValueError, TypeError, KeyError):
+			print(f'[WARNING] Ignoring invalid learned gap for provider "{name}": {value}')
+			continue
+		if stored_delay != delay:
+			print(f'[PACING] Provider "{name}": delay between accounts changed, discarding learned gap')
+			continue
+		learned[name] = gap
+	return learned
+
+
+def save_pacing(pacing: dict[str, float], state_store: StateStore):
+	"""保存各 provider 当前的账号间隔与 DELAY_BETWEEN_ACCOUNTS（随 finish_run 一起提交）"""
+	delay = get_account_delay()
+	for name, gap in pacing.items():
+		state_store.set_meta(f'{PACING_META_PREFIX}{name}', json.dumps({'gap': round(gap, 3), 'delay': delay}))
+
+
+def current_pacing(run_context: RunContext) -> dict[str, float]:
+	"""启用自适应间隔且本次运行有请求的各 provider 当前账号间隔"""
+	return {
+		name: limiter.account_gap
+		for name, limiter in run_context.limiters.items()
+		if limiter.pacer and limiter.pacer.samples
+	}
+
+
+def create_run_context(app_config: AppConfig, state_store: StateStore | None = None) -> RunContext:
+	"""创建共享资源（浏览器实例、WAF cookies 缓存、连接池与各 provider 的限流器与熔断器）
+
+	ADAPTIVE_PACING 为 true（默认）时，账号间隔从上次运行保存的值（没有时为 DELAY_BETWEEN_ACCOUNTS）开始自适应调整，
+	不低于 DELAY_BETWEEN_ACCOUNTS。
+	"""
+	delay_between_accounts = get_account_delay()
+	adaptive = os.getenv('ADAPTIVE_PACING', 'true').lower() == 'true'
+	learned_gaps = load_pacing(state_store, app_config.providers, delay_between_accounts) if adaptive else {}
+	print(f'[INFO] Delay between accounts of the same provider: {delay_between_accounts} seconds')
+	limiters = build_limiters(app_config.providers, delay_between_accounts, adaptive, learned_gaps)
+	if adaptive:
+		for name, limiter in limiters.items():
+			source = 'learned' if name in learned_gaps else 'initial'
+			print(f'[PACING] Provider "{name}": adaptive gap, {source} {limiter.account_gap:.1f}s')
+	return RunContext(limiters=limiters, breakers=build_breakers(app_config.providers))
+
+
+async def collect_records(
+	accounts: Iterable[AccountConfig],
+	app_config: AppConfig,
+	run_context: RunContext,
+	state_store: StateStore,
+	force_full_run: bool = False,
+	indices: set[int] | None = None,
+) -> list[dict]:
+	"""处理账号（indices 为 None 时处理全部账号）并返回各账号记录，同时更新签到指标
+
+	账号逐个从 accounts 中读取并交给 run_accounts，不会一次性加载全部账号配置。
+	"""
+	# 跳过自上次重置以来已签到成功的账号
+	skip_checked_in = os.getenv('SKIP_CHECKED_IN', 'false').lower() == 'true' and not force_full_run
+	indexed_records: list[tuple[int, dict]] = []
+	skipped_count = 0
+
+	def add_record(index: int, account: AccountConfig, outcome):
+		record = build_account_record(account, index, outcome)
+		indexed_records.append((index, record))
+		if record['quota'] is not None:
+			metrics.ACCOUNT_QUOTA.set(record['quota'], provider=account.provider, api_user=account.api_user)
+			metrics.ACCOUNT_USED_QUOTA.set(record['used_quota'], provider=account.provider, api_user=account.api_user)
+		if not record['skipped']:
+			if record['success']:
+				metrics.CHECKIN_SUCCESS.inc(provider=account.provider)
 			else:
-				# 失败的账号
-				error_msg = user_info.get('error', 'Unknown error') if user_info else 'Unknown error'
-				accounts_data.append({
-					'name': account_name,
-					'success': False,
-					'quota': 0,
-					'used_quota': 0,
-					'error': error_msg,
-				})
-
-			if should_notify_this_account:
-				status = '[SUCCESS]' if success else '[FAIL]'
-				account_result = f'{status} {account_name}'
-				if user_info and user_info.get('success'):
-					account_result += f'\n{user_info["display"]}'
-				elif user_info:
-					account_result += f'\n{user_info.get("error", "Unknown error")}'
-				notification_content.append(account_result)
+				metrics.CHECKIN_FAILURE.inc(provider=account.provider, kind=record['kind'])
 
-		except Exception as e:
-			print(f'[FAILED] {account_name} processing exception: {e}')
-			need_notify = True  # 异常也需要通知
-			notification_content.append(f'[FAIL] {account_name} exception: {str(e)[:50]}...')
+	def pending():
+		nonlocal skipped_count
+		for i, account in enumerate(accounts):
+			if indices is not None and i not in indices:
+				continue
+			outcome = checked_in_outcome(account, i, app_config, state_store) if skip_checked_in else None
+			if outcome:
+				add_record(i, account, outcome)
+				skipped_count += 1
+				continue
+			yield i, account
+
+	with span('run') as current:
+		await run_accounts(pending(), app_config, run_context, on_result=add_record)
+		current.set(accounts=len(indexed_records) - skipped_count, skipped=skipped_count)
+	if skip_checked_in:
+		print(f'[INFO] Skipped {skipped_count} account(s) already checked in since last reset')
+
+	indexed_records.sort(key=lambda item: item[0])
+	return [record for _, record in indexed_records]
+
+
+async def finalize_run(records: list[dict], state_store: StateStore, metadata: dict | None = None) -> int:
+	"""记录账号状态、计算余额变化并发送通知，返回成功账号数
+
+	单进程运行与分片合并（merge）共用，保证每次运行只发送一次通知。调用前需先 state_store.begin_run()。
+	"""
+	# 上次记录的各账号余额（按稳定账号标识），用于计算本次余额变化
+	previous_accounts = state_store.get_accounts()
+
+	for record in records:
+		if record['skipped']:
+			continue
+		state_store.record_account(
+			record['key'],
+			record['provider'],
+			record['api_user'],
+			record['name'],
+			record['success'],
+			{
+				'success': record['quota'] is not None,
+				'quota': record['quota'],
+				'used_quota': record['used_quota'],
+				'error': record['error'],
+			},
+		)
+
+	changed = diff_balances(records, previous_accounts)
+	success_count = sum(1 for record in records if record['success'])
+
+	with span('notify', changed=len(changed)):
+		await send_report(records, changed, first_run=not previous_accounts, state_store=state_store)
+	get_tracer().flush()
+
+	# 通知发送完成后再提交，以便一并保存邮件连接方式等状态
+	skipped_count = sum(1 for record in records if record['skipped'])
+	state_store.finish_run(
+		{
+			'total': len(records),
+			'success': success_count,
+			'skipped': skipped_count,
+			'changed': len(changed),
+			'providers': sorted({record['provider'] for record in records}),
+			'github_run_id': os.getenv('GITHUB_RUN_ID'),
+			**(metadata or {}),
+		},
+		skipped=skipped_count,
+	)
+	return success_count
+
+
+async def run_once(
+	accounts: Iterable[AccountConfig],
+	app_config: AppConfig,
+	run_context: RunContext,
+	state_store: StateStore,
+	force_full_run: bool = False,
+) -> int:
+	"""执行一轮签到：处理账号、记录状态、发送通知
+
+	不关闭 run_context 与 state_store，也不退出进程，常驻模式下各轮之间复用。
+	返回成功账号数。
+	"""
+	run_started = time.perf_counter()
+	get_tracer().new_trace()
+	state_store.begin_run()
+
+	records = await collect_records(accounts, app_config, run_context, state_store, force_full_run)
+	save_pacing(current_pacing(run_context), state_store)
+	success_count = await finalize_run(records, state_store, {'forced': force_full_run})
+
+	metrics.RUN_DURATION.set(time.perf_counter() - run_started)
+	metrics.LAST_RUN.set(time.time())
+	await metrics.export_metrics()
+	return success_count
+
+
+async def run_shard(index: int, count: int, force_full_run: bool = False):
+	"""分片模式：只处理属于该分片的账号，把结果写入分片结果文件，不发送通知也不写入运行状态"""
+	print(f'[SYSTEM] AnyRouter.top check-in shard {index}/{count} started')
+
+	loaded = load_run_config()
+	if not loaded:
+		sys.exit(1)
+	app_config, accounts = loaded
 
-			# 添加异常账号到 HTML 数据
-			accounts_data.append({
-				'name': account_name,
-				'success': False,
-				'quota': 0,
-				'used_quota': 0,
-				'error': f'Exception: {str(e)[:100]}',
-			})
-
-		# 添加延迟，避免触发 WAF（最后一个账号不需要延迟）
-		if i < len(accounts) - 1 and DELAY_BETWEEN_ACCOUNTS > 0:
-			print(f'[INFO] Waiting {DELAY_BETWEEN_ACCOUNTS} seconds before processing next account...')
-			await asyncio.sleep(DELAY_BETWEEN_ACCOUNTS)
-
-	# 检查余额变化
-	current_balance_hash = generate_balance_hash(current_balances) if current_balances else None
-	if current_balance_hash:
-		if last_balance_hash is None:
-			# 首次运行
-			balance_changed = True
-			need_notify = True
-			print('[NOTIFY] First run detected, will send notification with current balances')
-		elif current_balance_hash != last_balance_hash:
-			# 余额有变化
-			balance_changed = True
-			need_notify = True
-			print('[NOTIFY] Balance changes detected, will send notification')
-		else:
-			print('[INFO] No balance changes detected')
+	indices = select_shard(accounts, index, count)
+	print(f'[INFO] Shard {index}/{count} owns {len(indices)} account(s)')
 
-	# 为有余额变化的情况添加所有成功账号到通知内容
-	if balance_changed:
-		for i, account in enumerate(accounts):
-			account_key = f'account_{i + 1}'
-			if account_key in current_balances:
-				account_name = account.get_display_name(i)
-				# 只添加成功获取余额的账号，且避免重复添加
-				account_result = f'[BALANCE] {account_name}'
-				account_result += f'\n:money: Current balance: ${current_balances[account_key]["quota"]}, Used: ${current_balances[account_key]["used"]}'
-				# 检查是否已经在通知内容中（避免重复）
-				if not any(account_name in item for item in notification_content):
-					notification_content.append(account_result)
-
-	# 保存当前余额hash
-	if current_balance_hash:
-		save_balance_hash(current_balance_hash)
-
-	if need_notify and notification_content:
-		# 构建文本通知内容（用于非邮件通知渠道）
-		summary = [
-			'[STATS] Check-in result statistics:',
-			f'[SUCCESS] Success: {success_count}/{total_count}',
-			f'[FAIL] Failed: {total_count - success_count}/{total_count}',
-		]
-
-		if success_count == total_count:
-			summary.append('[SUCCESS] All accounts check-in successful!')
-		elif success_count > 0:
-			summary.append('[WARN] Some accounts check-in successful')
-		else:
-			summary.append('[ERROR] All accounts check-in failed')
+	started_at = time.time()
+	run_started = time.perf_counter()
+	state_store = StateStore()
+	run_context = create_run_context(app_config, state_store)
+	try:
+		records = await collect_records(accounts, app_config, run_context, state_store, force_full_run, indices)
+		pacing = current_pacing(run_context)
+	finally:
+		await run_context.close()
+		state_store.close()
+		get_tracer().close()
+
+	path = get_result_path(index, count)
+	write_shard_result(path, index, count, records, started_at, pacing)
+	print(f'[SHARD] Wrote {len(records)} result(s) to {path}')
+
+	metrics.RUN_DURATION.set(time.perf_counter() - run_started)
+	metrics.LAST_RUN.set(time.time())
+	await metrics.export_metrics()
+
+	# 分片内没有账号时不算失败
+	sys.exit(0 if not records or any(record['success'] for record in records) else 1)
+
+
+async def merge(paths: list[str]):
+	"""合并各分片结果：统一计算余额变化、写入运行状态并发送一次通知"""
+	print('[SYSTEM] Merging shard results')
+	records, info = load_shard_results(paths)
+	if not info['shards']:
+		print('[FAILED] No shard results found, nothing to merge')
+		sys.exit(1)
+
+	print(f'[INFO] Loaded {len(records)} result(s) from {len(info["shards"])}/{info["total_shards"]} shard(s)')
+	if info['missing']:
+		print(f'[WARNING] Missing shard result(s): {", ".join(map(str, info["missing"]))}')
 
-		time_info = f'[TIME] Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+	state_store = StateStore()
+	try:
+		state_store.begin_run(started_at=info['started_at'])
+		save_pacing(info['pacing'], state_store)
+		success_count = await finalize_run(
+			records,
+			state_store,
+			{'shards': info['total_shards'], 'missing_shards': info['missing']},
+		)
+	finally:
+		state_store.close()
+		get_tracer().close()
+
+	print(f'[INFO] Merged result: {success_count}/{len(records)} account(s) successful')
+	sys.exit(0 if success_count > 0 else 1)
 
-		notify_content = '\n\n'.join([time_info, '\n'.join(notification_content), '\n'.join(summary)])
 
-		print(notify_content)
+async def main(force_full_run: bool = False):
+	"""主函数
 
-		# 构建 HTML 邮件数据
-		html_data = {
-			'accounts': accounts_data,
-			'summary': {
-				'total': total_count,
-				'success_count': success_count,
-				'failed_count': total_count - success_count,
-				'success_rate': (success_count / total_count * 100) if total_count > 0 else 0,
-			},
-			'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-		}
+	Args:
+		force_full_run: 忽略 SKIP_CHECKED_IN，处理所有账号
+	"""
+	print('[SYSTEM] AnyRouter.top multi-account auto check-in script started (using Playwright)')
+	print(f'[TIME] Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
 
-		# 发送 HTML 邮件
-		get_notify().send_html_email('AnyRouter 签到结果', html_data)
+	loaded = load_run_config()
+	if not loaded:
+		sys.exit(1)
+	app_config, accounts = loaded
 
-		# 发送其他通知（钉钉、飞书等），跳过邮件通知避免重复发送
-		get_notify().push_message('AnyRouter Check-in Alert', notify_content, msg_type='text', skip_email=True)
-		print('[NOTIFY] Notification sent due to failures or balance changes')
-	else:
-		print('[INFO] All accounts successful and no balance changes detected, notification skipped')
+	state_store = StateStore()
+	run_context = create_run_context(app_config, state_store)
+	try:
+		success_count = await run_once(accounts, app_config, run_context, state_store, force_full_run)
+	finally:
+		await run_context.close()
+		state_store.close()
+		get_tracer().close()
 
 	# 设置退出码
 	sys.exit(0 if success_count > 0 else 1)
 
 
+async def run_daemon(interval: float, force_full_run: bool = False):
+	"""常驻模式：按固定间隔循环执行签到
+
+	浏览器实例、HTTP 连接池、WAF cookies 缓存与限流器在各轮之间保持复用，
+	收到 SIGTERM / SIGINT 后取消正在进行的一轮（如有），释放资源后退出。
+	force_full_run 只作用于第一轮。
+	"""
+	print(f'[DAEMON] AnyRouter.top check-in daemon started, interval {interval} seconds')
+
+	loaded = load_run_config()
+	if not loaded:
+		sys.exit(1)
+	app_config, accounts = loaded
+
+	stop = asyncio.Event()
+	remove_signal_handlers = install_stop_handlers(stop)
+
+	state_store = StateStore()
+	run_context = create_run_context(app_config, state_store)
+	cycle = 0
+	try:
+		while not stop.is_set():
+			cycle += 1
+			cycle_started = time.monotonic()
+			print(f'\n[DAEMON] Starting cycle {cycle} at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+
+			cycle_task = asyncio.create_task(
+				run_once(accounts, app_config, run_context, state_store, force_full_run and cycle == 1)
+			)
+			stop_task = asyncio.create_task(stop.wait())
+			await asyncio.wait({cycle_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+			stop_task.cancel()
+
+			if not cycle_task.done():
+				print(f'[DAEMON] Stop requested, cancelling cycle {cycle}')
+				cycle_task.cancel()
+				try:
+					await cycle_task
+				except asyncio.CancelledError:
+					pass
+				break
+
+			if cycle_task.exception():
+				print(f'[ERROR] Cycle {cycle} failed: {cycle_task.exception()}')
+			else:
+				print(f'[DAEMON] Cycle {cycle} finished: {cycle_task.result()} account(s) successful')
+
+			wait = max(0.0, interval - (time.monotonic() - cycle_started))
+			print(f'[DAEMON] Next cycle in {wait:.0f} seconds')
+			try:
+				await asyncio.wait_for(stop.wait(), timeout=wait)
+			except asyncio.TimeoutError:
+				pass
+	finally:
+		remove_signal_handlers()
+		await run_context.close()
+		state_store.close()
+		get_tracer().close()
+
+	print(f'[DAEMON] Stopped after {cycle} cycle(s)')
+
+
+def install_stop_handlers(stop: asyncio.Event):
+	"""收到 SIGTERM / SIGINT 时设置 stop，返回移除处理器的函数"""
+	loop = asyncio.get_running_loop()
+	signals = [signal.SIGINT] + ([signal.SIGTERM] if hasattr(signal, 'SIGTERM') else [])
+	installed = []
+
+	for sig in signals:
+		try:
+			loop.add_signal_handler(sig, stop.set)
+			installed.append((sig, None))
+		except (NotImplementedError, RuntimeError):
+			# Windows 的事件循环不支持 add_signal_handler
+			previous = signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+			installed.append((sig, previous))
+
+	def remove():
+		for sig, previous in installed:
+			if previous is None:
+				loop.remove_signal_handler(sig)
+			else:
+				signal.signal(sig, previous)
+
+	return remove
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+	"""解析命令行参数"""
+	parser = argparse.ArgumentParser(description='AnyRouter.top multi-account auto check-in')
+	parser.add_argument(
+		'--force', action='store_true', help='process every account even if already checked in since last reset'
+	)
+	parser.add_argument('--daemon', action='store_true', help='keep running and check in on a fixed interval')
+	parser.add_argument(
+		'--interval',
+		type=float,
+		default=float(os.getenv('DAEMON_INTERVAL', '21600')),
+		help='seconds between daemon cycles (default: DAEMON_INTERVAL or 21600)',
+	)
+	parser.add_argument(
+		'--shard',
+		metavar='I/N',
+		help='only process shard I of N (by account identity) and write a result file instead of notifying',
+	)
+	parser.add_argument(
+		'--startup-report', action='store_true', help='print an -X importtime report for `import checkin` and exit'
+	)
+	subparsers = parser.add_subparsers(dest='command')
+	merge_parser = subparsers.add_parser('merge', help='merge shard result files, record state and notify once')
+	merge_parser.add_argument(
+		'paths',
+		nargs='*',
+		help='shard result files or directories (default: SHARD_RESULT_DIR or shard_results)',
+	)
+	args = parser.parse_args(argv)
+	if args.shard:
+		try:
+			args.shard = parse_shard(args.shard)
+		except ValueError as e:
+			parser.error(str(e))
+	return args
+
+
 def run_main():
 	"""运行主函数的包装函数"""
+	args = parse_args()
+	if args.startup_report:
+		from utils.startup import print_startup_report
+
+		sys.exit(print_startup_report())
+
+	isolate_replay()
 	try:
-		asyncio.run(main())
+		if args.command == 'merge':
+			asyncio.run(merge(args.paths or [os.getenv('SHARD_RESULT_DIR', SHARD_RESULT_DIR)]))
+		elif args.shard:
+			asyncio.run(run_shard(*args.shard, force_full_run=args.force))
+		elif args.daemon:
+			asyncio.run(run_daemon(args.interval, force_full_run=args.force))
+		else:
+			asyncio.run(main(force_full_run=args.force))
 	except KeyboardInterrupt:
 		print('\n[WARNING] Program interrupted by user')
 		sys.exit(1)
@@ -0,0 +1,38 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.run import build_parser, percentile, run_single
+
+
+def test_percentile():
+	values = [float(v) for v in range(1, 101)]
+	assert percentile(values, 50) == 50
+	assert percentile(values, 99) == 99
+	assert percentile([], 50) == 0
+
+
+def test_benchmark_against_fake_provider(monkeypatch, tmp_path):
+	overrides = ('WAF_COOKIE_TTL', 'RETRY_DELAY', 'RETRY_QUEUE_MIN_GAP')
+	for name in overrides:
+		monkeypatch.delenv(name, raising=False)
+	output = tmp_path / 'results.jsonl'
+	args = build_parser().parse_args(
+		['--latency-ms', '0', '--waf', '--bypass', 'waf_cookies_http', '--output', str(output)]
+	)
+	args.accounts = 5
+
+	record = run_single(args)
+
+	assert record['success'] == 5
+	assert record['attempts'] == 5
+	assert record['browser_launches'] == 0
+	assert record['params']['accounts'] == 5
+	assert json.loads(output.read_text(encoding='utf-8').strip()) == record
+	# 基准测试的参数不应泄漏到同一进程中后续运行的测试
+	assert not any(name in os.environ for name in overrides)
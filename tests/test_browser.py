@@ -0,0 +1,215 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.browser import BLOCKED_RESOURCE_TYPES, BrowserPool, _block_resources, capture_cookies
+
+WAF_COOKIE_NAMES = ['acw_tc', 'cdn_sec_tc', 'acw_sc__v2']
+
+
+class FakePage:
+	"""按脚本依次设置 cookies 并触发 response / load 事件"""
+
+	def __init__(self, context, script):
+		self.context = context
+		self.script = script
+		self.handlers = {}
+		self.html = ''
+
+	def on(self, event, handler):
+		self.handlers.setdefault(event, []).append(handler)
+
+	async def goto(self, url, wait_until=None, timeout=None):
+		asyncio.get_running_loop().create_task(self.play())
+
+	async def play(self):
+		for delay, cookies, html in self.script:
+			await asyncio.sleep(delay)
+			self.context.jar.update(cookies)
+			for handler in self.handlers.get('response', []):
+				handler(None)
+			if html is not None:
+				self.html = html
+				for handler in self.handlers.get('load', []):
+					handler(None)
+
+	async def content(self):
+		return self.html
+
+
+class FakeContext:
+	def __init__(self, script):
+		self.jar = {}
+		self.script = script
+
+	async def new_page(self):
+		return FakePage(self, self.script)
+
+	async def cookies(self):
+		return [{'name': name, 'value': value, 'expires': -1} for name, value in self.jar.items()]
+
+
+def run_capture(script, timeout=2.0):
+	async def run():
+		start = time.perf_counter()
+		cookies = await capture_cookies(FakeContext(script), 'https://test.example/login', WAF_COOKIE_NAMES, timeout)
+		return {cookie['name'] for cookie in cookies}, time.perf_counter() - start
+
+	return asyncio.run(run())
+
+
+def test_capture_waits_through_challenge_until_cookies_appear():
+	names, elapsed = run_capture(
+		[
+			(0.01, {'acw_tc': 'tc'}, "<script>var arg1='abc';</script>"),
+			(0.05, {'acw_sc__v2': 'v2', 'cdn_sec_tc': 'sec'}, None),
+		]
+	)
+
+	assert names == set(WAF_COOKIE_NAMES)
+	assert elapsed < 0.5
+
+
+def test_capture_returns_once_page_without_challenge_loads():
+	names, elapsed = run_capture([(0.01, {'acw_tc': 'tc'}, None), (0.02, {}, '<html>login</html>')])
+
+	assert names == {'acw_tc'}
+	assert elapsed < 0.5
+
+
+def test_capture_has_hard_deadline():
+	names, elapsed = run_capture([(0.01, {'acw_tc': 'tc'}, "<script>var arg1='abc';</script>")], timeout=0.2)
+
+	assert names == {'acw_tc'}
+	assert 0.2 <= elapsed < 0.5
+
+
+def test_capture_deadline_covers_browser_calls():
+	class HangingContext(FakeContext):
+		async def cookies(self):
+			await asyncio.sleep(10)
+			return []
+
+	async def run():
+		start = time.perf_counter()
+		cookies = await capture_cookies(HangingContext([]), 'https://test.example/login', WAF_COOKIE_NAMES, 0.1)
+		return cookies, time.perf_counter() - start
+
+	cookies, elapsed = asyncio.run(run())
+
+	assert cookies == []
+	assert elapsed < 0.5
+
+
+def test_block_resources():
+	class FakeRoute:
+		def __init__(self, resource_type):
+			self.request = type('Request', (), {'resource_type': resource_type})
+			self.action = None
+
+		async def abort(self):
+			self.action = 'abort'
+
+		async def continue_(self):
+			self.action = 'continue'
+
+	routes = [FakeRoute(resource_type) for resource_type in ('document', 'script', *sorted(BLOCKED_RESOURCE_TYPES))]
+
+	async def run():
+		for route in routes:
+			await _block_resources(route)
+
+	asyncio.run(run())
+
+	assert [route.action for route in routes] == ['continue', 'continue'] + ['abort'] * len(BLOCKED_RESOURCE_TYPES)
+
+
+class FakePoolContext:
+	async def route(self, pattern, handler):
+		pass
+
+	async def close(self):
+		pass
+
+
+class FakeBrowser:
+	def __init__(self):
+		self.connected = True
+
+	def is_connected(self):
+		return self.connected
+
+	async def new_context(self, **kwargs):
+		return FakePoolContext()
+
+	async def close(self):
+		self.connected = False
+
+
+class FakeChromium:
+	def __init__(self):
+		self.browsers = []
+
+	async def launch(self, headless=None, args=None):
+		self.browsers.append(FakeBrowser())
+		return self.browsers[-1]
+
+
+class FakePlaywright:
+	def __init__(self):
+		self.chromium = FakeChromium()
+
+	async def stop(self):
+		pass
+
+
+def test_browser_pool_shares_one_browser_and_limits_contexts():
+	async def run():
+		pool = BrowserPool(size=2, headless=True)
+		pool._playwright = FakePlaywright()
+		active = 0
+		peak = 0
+
+		async def worker():
+			nonlocal active, peak
+			async with pool.context():
+				active += 1
+				peak = max(peak, active)
+				await asyncio.sleep(0.02)
+				active -= 1
+
+		await asyncio.gather(*(worker() for _ in range(6)))
+		return pool, peak
+
+	pool, peak = asyncio.run(run())
+
+	assert peak == 2
+	assert len(pool._playwright.chromium.browsers) == 1
+	assert pool.stats.launches == 1
+	assert pool.stats.reuses == 5
+	assert pool.stats.contexts == 6
+	# 后 4 个 context 需要等待槽位
+	assert pool.stats.wait_time >= 0.03
+
+
+def test_browser_pool_relaunches_disconnected_browser():
+	async def run():
+		pool = BrowserPool(size=1, headless=True)
+		pool._playwright = FakePlaywright()
+		async with pool.context():
+			pass
+		pool._browser.connected = False
+		async with pool.context():
+			pass
+		return pool
+
+	pool = asyncio.run(run())
+
+	assert len(pool._playwright.chromium.browsers) == 2
+	assert pool.stats.launches == 2
+	assert pool.stats.reuses == 0
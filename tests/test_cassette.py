@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+from benchmarks.fake_provider import FakeProviderServer
+from utils.cassette import REDACTED, Cassette, _redact_json
+from utils.config import AccountConfig, AppConfig, ProviderConfig
+from utils.http_pool import ClientPool
+from utils.runtime import RunContext
+from utils.state import StateStore
+from utils.waf_cache import WafCookieCache
+
+
+def record_cassette(path, tmp_path):
+	server = FakeProviderServer(argparse.Namespace(latency_ms=0, jitter_ms=0, error_rate=0, waf=True))
+	server.start()
+	try:
+		return server.url, run_accounts(server.url, Cassette(path, 'record'), tmp_path / 'record.json')
+	finally:
+		server.shutdown()
+		server.server_close()
+
+
+def run_accounts(domain, cassette, cache_path):
+	async def main():
+		provider = ProviderConfig(name='test', domain=domain, bypass_method='waf_cookies_http')
+		app_config = AppConfig(providers={'test': provider})
+		run_context = RunContext(waf_cache=WafCookieCache(str(cache_path)), http_pool=ClientPool(cassette=cassette))
+		accounts = [
+			(i, AccountConfig(cookies={'session': f'secret-{i}'}, api_user=str(i), provider='test')) for i in range(3)
+		]
+		try:
+			return await checkin.run_accounts(accounts, app_config, run_context)
+		finally:
+			await run_context.close()
+
+	return asyncio.run(main())
+
+
+def test_record_then_replay_offline(tmp_path):
+	path = str(tmp_path / 'cassette.jsonl.gz')
+	url, recorded = record_cassette(path, tmp_path)
+
+	cassette = Cassette(path, 'replay', latency_scale=0)
+	dump = json.dumps(cassette.interactions)
+	assert 'secret-' not in dump
+	assert 'acw_tc=REDACTED' in dump
+	assert any('/login' in interaction['request'] for interaction in cassette.interactions)
+
+	# 服务已关闭，只能由 cassette 回放
+	replayed = run_accounts(url, cassette, tmp_path / 'replay.json')
+
+	assert all(success for success, _ in recorded.values())
+	assert {i: info['quota'] for i, (_, info) in replayed.items()} == {
+		i: info['quota'] for i, (_, info) in recorded.items()
+	}
+
+
+def test_identity_hash_is_salted_per_cassette(tmp_path):
+	path = str(tmp_path / 'cassette.jsonl')
+	request = httpx.Request('GET', 'https://test.example/api/user/self', headers={'new-api-user': '1'})
+	response = httpx.Response(200, json={'success': True})
+	first = Cassette(path, 'record')
+	first.record(request, response, response.content, 0)
+	first.save()
+	second = Cassette(str(tmp_path / 'other.jsonl'), 'record')
+	second.record(request, response, response.content, 0)
+
+	identity = first.interactions[0]['identity']
+	# 小数字 api_user 的哈希不能被直接枚举还原，不同 cassette 之间也无法关联
+	assert identity != hashlib.sha256(b'1').hexdigest()[:16]
+	assert identity != second.interactions[0]['identity']
+	assert Cassette(path, 'replay').match(request) is not None
+
+
+def test_replay_leaves_state_untouched(monkeypatch, tmp_path):
+	path = str(tmp_path / 'cassette.jsonl')
+	url, _ = record_cassette(path, tmp_path)
+
+	state_path = tmp_path / 'state.db'
+	cache_path = tmp_path / 'cache.json'
+	with StateStore(str(state_path)) as store:
+		store.begin_run()
+		store.finish_run({})
+	state = state_path.read_bytes()
+
+	monkeypatch.setenv('HTTP_REPLAY', path)
+	monkeypatch.setenv('REPLAY_LATENCY_SCALE', '0')
+	monkeypatch.setenv('STATE_DB_PATH', str(state_path))
+	monkeypatch.setenv('WAF_COOKIE_CACHE_FILE', str(cache_path))
+	monkeypatch.setenv('SHARD_RESULT_DIR', str(tmp_path / 'shards'))
+	monkeypatch.setenv('DELAY_BETWEEN_ACCOUNTS', '0')
+	monkeypatch.setenv('PROVIDERS', json.dumps({'test': {'domain': url, 'bypass_method': 'waf_cookies_http'}}))
+	monkeypatch.setenv(
+		'ANYROUTER_ACCOUNTS', json.dumps([{'cookies': {'session': 's'}, 'api_user': '1', 'provider': 'test'}])
+	)
+	monkeypatch.setattr(checkin, 'get_notify', lambda: pytest.fail('notification sent during replay'))
+
+	directory = checkin.isolate_replay()
+	with pytest.raises(SystemExit) as exit_info:
+		asyncio.run(checkin.main(force_full_run=True))
+
+	assert exit_info.value.code == 0
+	assert state_path.read_bytes() == state
+	assert not cache_path.exists()
+	assert Path(directory, 'checkin_state.db').exists()
+
+
+def test_redact_json():
+	data = {
+		'success': True,
+		'data': {'quota': 1, 'email': 'a@example.com', 'access_token': '', 'items': [{'token': 't'}]},
+	}
+
+	assert _redact_json(data) == {
+		'success': True,
+		'data': {'quota': 1, 'email': REDACTED, 'access_token': '', 'items': [{'token': REDACTED}]},
+	}
@@ -0,0 +1,134 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+from utils import metrics
+from utils.circuit import CircuitBreaker, build_breakers
+from utils.config import AccountConfig, AppConfig, ProviderConfig
+from utils.runtime import RunContext
+
+
+class FakeClock:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+
+def test_breaker_opens_and_probes_after_cooldown():
+	clock = FakeClock()
+	breaker = CircuitBreaker('test', threshold=2, cooldown=10, clock=clock)
+
+	breaker.record_failure('HTTP 503')
+	assert breaker.allow()
+	breaker.record_failure('HTTP 503')
+	assert breaker.state == 'open'
+	assert not breaker.allow()
+	assert 'HTTP 503' in breaker.describe()
+
+	clock.now = 10
+	assert breaker.allow()
+	assert breaker.state == 'half_open'
+	# 探测期间其他账号仍直接失败
+	assert breaker.is_open()
+	assert not breaker.allow()
+	breaker.record_failure('timeout')
+	assert breaker.state == 'open'
+
+	clock.now = 20
+	assert breaker.allow()
+	breaker.record_success()
+	assert breaker.state == 'closed'
+	assert breaker.failures == 0
+	assert breaker.allow()
+
+
+def test_breaker_disabled_and_configured_per_provider(monkeypatch):
+	breaker = CircuitBreaker('test', threshold=0)
+	for _ in range(10):
+		breaker.record_failure('HTTP 503')
+	assert breaker.allow()
+
+	monkeypatch.setenv('CIRCUIT_BREAKER_THRESHOLD', '7')
+	providers = {
+		'a': ProviderConfig.from_dict('a', {'domain': 'https://a.example'}),
+		'b': ProviderConfig.from_dict(
+			'b', {'domain': 'https://b.example', 'circuit_threshold': 2, 'circuit_cooldown': 5}
+		),
+	}
+	breakers = build_breakers(providers)
+	assert breakers['a'].threshold == 7
+	assert (breakers['b'].threshold, breakers['b'].cooldown) == (2, 5)
+
+
+def test_open_circuit_fails_remaining_accounts_fast(monkeypatch):
+	monkeypatch.setenv('MAX_RETRIES', '0')
+	requests = []
+
+	def handler(request: httpx.Request):
+		requests.append(request.url.path)
+		return httpx.Response(503, text='down')
+
+	async def main():
+		provider = ProviderConfig(name='down', domain='https://down.example')
+		run_context = RunContext(breakers={'down': CircuitBreaker('down', threshold=3, cooldown=60)})
+		run_context.http_pool._clients[provider.domain] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+		accounts = [(i, AccountConfig(cookies={'session': 's'}, api_user=str(i), provider='down')) for i in range(20)]
+		try:
+			return await checkin.run_accounts(accounts, AppConfig(providers={'down': provider}), run_context)
+		finally:
+			await run_context.http_pool.close()
+
+	rejections = metrics.CIRCUIT_REJECTIONS.get(provider='down')
+	results = asyncio.run(main())
+	kinds = [user_info['kind'] for _, user_info in results.values()]
+
+	assert len(requests) == 3
+	assert kinds.count('server') == 3
+	assert kinds.count('circuit') == 17
+	assert 'circuit open' in results[19][1]['error']
+	assert metrics.CIRCUIT_REJECTIONS.get(provider='down') == rejections + 17
+
+
+@pytest.mark.parametrize(
+	'blocked',
+	[
+		httpx.Response(403, html='<html>Sorry, you have been blocked</html>'),
+		httpx.Response(403, json={'success': False, 'message': 'forbidden'}),
+	],
+)
+def test_blocked_ip_403_opens_circuit(monkeypatch, blocked):
+	monkeypatch.setenv('MAX_RETRIES', '0')
+	requests = []
+
+	def handler(request: httpx.Request):
+		requests.append(request.url.path)
+		return httpx.Response(blocked.status_code, headers=blocked.headers, content=blocked.content)
+
+	async def main():
+		provider = ProviderConfig(name='blocked', domain='https://blocked.example')
+		breaker = CircuitBreaker('blocked', threshold=2, cooldown=60)
+		run_context = RunContext(breakers={'blocked': breaker})
+		run_context.http_pool._clients[provider.domain] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+		accounts = [(i, AccountConfig(cookies={'session': 's'}, api_user=str(i), provider='blocked')) for i in range(6)]
+		try:
+			results = await checkin.run_accounts(accounts, AppConfig(providers={'blocked': provider}), run_context)
+			return results, breaker
+		finally:
+			await run_context.http_pool.close()
+
+	results, breaker = asyncio.run(main())
+	kinds = [user_info['kind'] for _, user_info in results.values()]
+
+	assert len(requests) == 2
+	assert breaker.state == 'open'
+	assert kinds.count('circuit') == 4
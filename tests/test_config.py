@@ -0,0 +1,79 @@
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import AccountConfig, AccountSource, ProviderConfig, load_account_source, parse_timezone
+
+
+def test_parse_timezone_offsets():
+	assert parse_timezone('+08:00') == timezone(timedelta(hours=8))
+	assert parse_timezone('UTC-5:30') == timezone(-timedelta(hours=5, minutes=30))
+	assert parse_timezone('UTC') == timezone.utc
+
+
+def test_last_reset_time():
+	provider = ProviderConfig(name='test', domain='https://test.example', reset_timezone='+08:00', reset_hour=8)
+	tz = timezone(timedelta(hours=8))
+
+	assert provider.last_reset_time(datetime(2025, 1, 2, 9, 0, tzinfo=tz)) == datetime(2025, 1, 2, 8, 0, tzinfo=tz)
+	assert provider.last_reset_time(datetime(2025, 1, 2, 7, 0, tzinfo=tz)) == datetime(2025, 1, 1, 8, 0, tzinfo=tz)
+	# 不同时区的当前时间会先换算到重置时区
+	assert provider.last_reset_time(datetime(2025, 1, 2, 0, 30, tzinfo=timezone.utc)) == datetime(
+		2025, 1, 2, 8, 0, tzinfo=tz
+	)
+
+
+def test_account_source_reads_jsonl_lazily_and_skips_bad_lines(tmp_path):
+	first = tmp_path / 'a.jsonl'
+	first.write_text(
+		'\n'.join(
+			[
+				json.dumps({'cookies': {'session': 'a'}, 'api_user': '1'}),
+				'# comment',
+				'',
+				'{not json',
+				json.dumps({'cookies': {'session': 'b'}}),
+				json.dumps({'cookies': 's=c', 'api_user': '2', 'provider': 'agentrouter', 'name': 'Two'}),
+			]
+		),
+		encoding='utf-8',
+	)
+	second = tmp_path / 'b.jsonl'
+	second.write_text(json.dumps({'cookies': {}, 'api_user': '3'}) + '\n', encoding='utf-8')
+
+	env_account = AccountConfig(cookies={}, api_user='0')
+	source = AccountSource([env_account], [str(first), str(tmp_path / 'missing.jsonl'), str(second)])
+
+	iterator = iter(source)
+	assert next(iterator) is env_account
+	assert next(iterator).api_user == '1'
+	# 读取到第一个账号时还没有解析后面的行
+	assert source.errors == 0
+
+	accounts = list(source)
+	assert [a.api_user for a in accounts] == ['0', '1', '2', '3']
+	assert [a.get_display_name(i) for i, a in enumerate(accounts)][2:] == ['Two', 'Account 4']
+	assert source.errors == 3
+	assert source.count() == 4
+	assert not hasattr(accounts[1], '__dict__')
+
+
+def test_load_account_source_from_files(monkeypatch, tmp_path):
+	for name in ('x.jsonl', 'y.jsonl'):
+		(tmp_path / name).write_text(json.dumps({'cookies': {}, 'api_user': name}) + '\n', encoding='utf-8')
+	monkeypatch.delenv('ANYROUTER_ACCOUNTS', raising=False)
+	monkeypatch.setenv('ACCOUNTS_FILE', str(tmp_path / '*.jsonl'))
+
+	assert [a.api_user for a in load_account_source()] == ['x.jsonl', 'y.jsonl']
+
+	monkeypatch.setenv('ANYROUTER_ACCOUNTS', '[{"cookies": {}}]')
+	assert load_account_source() is None
+
+	monkeypatch.delenv('ANYROUTER_ACCOUNTS')
+	monkeypatch.delenv('ACCOUNTS_FILE')
+	assert load_account_source() is None
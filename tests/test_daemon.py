@@ -0,0 +1,35 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+
+
+def test_daemon_reuses_resources_and_stops_on_sigterm(monkeypatch, tmp_path):
+	monkeypatch.setenv('ANYROUTER_ACCOUNTS', json.dumps([{'cookies': {'session': 's'}, 'api_user': '1'}]))
+	monkeypatch.setenv('STATE_DB_PATH', str(tmp_path / 'state.db'))
+	cycles = []
+
+	async def fake_run_once(accounts, app_config, run_context, state_store, force_full_run=False):
+		cycles.append((id(run_context), id(state_store), force_full_run))
+		if len(cycles) == 2:
+			os.kill(os.getpid(), signal.SIGTERM)
+			# 收到信号时本轮仍在进行，应被取消
+			await asyncio.sleep(10)
+		return 1
+
+	monkeypatch.setattr(checkin, 'run_once', fake_run_once)
+
+	asyncio.run(asyncio.wait_for(checkin.run_daemon(0, force_full_run=True), timeout=5))
+
+	assert len(cycles) == 2
+	assert cycles[0][:2] == cycles[1][:2]
+	assert [force for _, _, force in cycles] == [True, False]
+	assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
@@ -0,0 +1,62 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.http_pool import AccountSession, ClientPool, _shared_cookie_jar
+
+
+def make_client(seen_cookies: list):
+	def handler(request: httpx.Request):
+		seen_cookies.append(set(request.headers.get('Cookie', '').split('; ')))
+		if request.url.path == '/redirect':
+			return httpx.Response(302, headers={'Location': '/final', 'Set-Cookie': 'acw_tc=tc; Path=/'})
+		return httpx.Response(200, json={'success': True}, headers={'Set-Cookie': 'refreshed=1; Path=/'})
+
+	return httpx.AsyncClient(transport=httpx.MockTransport(handler), cookies=_shared_cookie_jar())
+
+
+def test_sessions_keep_separate_cookie_jars():
+	async def run():
+		seen = []
+		async with make_client(seen) as client:
+			first = AccountSession(client, {'session': 'a'})
+			second = AccountSession(client, {'session': 'b'})
+			await first.get('https://example.com/api/user/self')
+			await second.get('https://example.com/api/user/self')
+			await first.get('https://example.com/api/user/self')
+			return seen, list(client.cookies.jar), first.cookies.get('refreshed')
+
+	seen, shared_cookies, refreshed = asyncio.run(run())
+	assert seen == [{'session=a'}, {'session=b'}, {'refreshed=1', 'session=a'}]
+	assert shared_cookies == []
+	assert refreshed == '1'
+
+
+def test_session_follows_redirects_with_account_cookies():
+	async def run():
+		seen = []
+		async with make_client(seen) as client:
+			session = AccountSession(client, {'session': 'a'})
+			response = await session.get('https://example.com/redirect', follow_redirects=True)
+			return seen, response.status_code
+
+	seen, status = asyncio.run(run())
+	assert status == 200
+	assert seen == [{'session=a'}, {'acw_tc=tc', 'session=a'}]
+
+
+def test_pool_reuses_client_per_domain():
+	async def run():
+		pool = ClientPool()
+		same = pool.get('https://a.example') is pool.get('https://a.example')
+		different = pool.get('https://a.example') is not pool.get('https://b.example')
+		await pool.close()
+		return same, different
+
+	assert asyncio.run(run()) == (True, True)
@@ -0,0 +1,73 @@
+import asyncio
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.metrics import Registry, export_metrics
+
+
+def make_registry() -> Registry:
+	registry = Registry()
+	success = registry.counter('checkin_success_total', 'Successes', ('provider',))
+	latency = registry.histogram('checkin_user_info_seconds', 'Latency', ('provider',), buckets=(0.1, 1.0))
+	quota = registry.gauge('checkin_account_quota_dollars', 'Quota', ('provider', 'api_user'))
+
+	success.inc(provider='anyrouter')
+	success.inc(provider='anyrouter')
+	latency.observe(0.1, provider='anyrouter')
+	latency.observe(0.5, provider='anyrouter')
+	latency.observe(3, provider='anyrouter')
+	quota.set(12.5, provider='anyrouter', api_user='1"2')
+	return registry
+
+
+def test_render_text_format():
+	text = make_registry().render()
+
+	assert '# TYPE checkin_success_total counter' in text
+	assert 'checkin_success_total{provider="anyrouter"} 2' in text
+	assert 'checkin_user_info_seconds_bucket{provider="anyrouter",le="0.1"} 1' in text
+	assert 'checkin_user_info_seconds_bucket{provider="anyrouter",le="1"} 2' in text
+	assert 'checkin_user_info_seconds_bucket{provider="anyrouter",le="+Inf"} 3' in text
+	assert 'checkin_user_info_seconds_count{provider="anyrouter"} 3' in text
+	assert 'checkin_user_info_seconds_sum{provider="anyrouter"} 3.6' in text
+	assert 'checkin_account_quota_dollars{provider="anyrouter",api_user="1\\"2"} 12.5' in text
+
+
+def test_export_textfile_and_pushgateway(tmp_path, monkeypatch):
+	pushed = []
+
+	class GatewayHandler(BaseHTTPRequestHandler):
+		def do_PUT(self):
+			body = self.rfile.read(int(self.headers['Content-Length']))
+			pushed.append((self.path, body.decode('utf-8')))
+			self.send_response(200)
+			self.send_header('Content-Length', '0')
+			self.end_headers()
+
+		def log_message(self, format, *args):
+			pass
+
+	server = ThreadingHTTPServer(('127.0.0.1', 0), GatewayHandler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+
+	textfile = tmp_path / 'checkin.prom'
+	monkeypatch.setenv('METRICS_TEXTFILE', str(textfile))
+	monkeypatch.setenv('METRICS_PUSHGATEWAY', f'http://127.0.0.1:{server.server_address[1]}')
+	monkeypatch.setenv('METRICS_GROUP', 'group-a')
+
+	registry = make_registry()
+	try:
+		asyncio.run(export_metrics(registry))
+	finally:
+		server.shutdown()
+		server.server_close()
+
+	assert textfile.read_text(encoding='utf-8') == registry.render()
+	assert pushed == [('/metrics/job/anyrouter_checkin/group/group-a', registry.render())]
+	assert [p.name for p in tmp_path.iterdir()] == ['checkin.prom']
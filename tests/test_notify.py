@@ -1,9 +1,12 @@
+import asyncio
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 from dotenv import load_dotenv
 
@@ -132,3 +135,112 @@ def test_push_message_skip_email(
 	assert mock_feishu.called
 	assert mock_server_push.called
 	assert mock_telegram.called
+
+
+def test_push_message_async_runs_channels_concurrently(monkeypatch):
+	monkeypatch.setenv('NOTIFY_TIMEOUTS', '{"Feishu": 0.1}')
+
+	async def handler(request: httpx.Request):
+		if request.url.host == 'feishu.example':
+			await asyncio.sleep(1)
+		await asyncio.sleep(0.2)
+		return httpx.Response(500 if request.url.host == 'wecom.example' else 200)
+
+	kit = NotificationKit()
+	for attr in ('email_user', 'pushplus_token', 'server_push_key', 'telegram_bot_token'):
+		setattr(kit, attr, None)
+	kit.dingding_webhook = 'https://dingtalk.example/send'
+	kit.feishu_webhook = 'https://feishu.example/send'
+	kit.weixin_webhook = 'https://wecom.example/send'
+
+	async def run():
+		async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+			start = time.perf_counter()
+			results = await kit.push_message_async('测试标题', '测试内容', client=client)
+			return results, time.perf_counter() - start
+
+	results, elapsed = asyncio.run(run())
+	by_channel = {result.channel: result for result in results}
+
+	assert elapsed < 0.5
+	assert by_channel['Email'].status == 'skipped'
+	assert by_channel['DingTalk'].status == 'success'
+	assert by_channel['DingTalk'].status_code == 200
+	assert by_channel['DingTalk'].latency >= 0.2
+	assert by_channel['WeChat Work'].status == 'failed'
+	assert by_channel['WeChat Work'].status_code == 500
+	assert by_channel['Feishu'].status == 'failed'
+	assert 'Timed out' in by_channel['Feishu'].error
+
+
+class FakeSMTP:
+	"""模拟 SMTP 连接，记录所有实例"""
+
+	instances = []
+	fail = False
+	delay = 0.0
+
+	def __init__(self, host, port, timeout=None):
+		time.sleep(self.delay)
+		if self.fail:
+			raise TimeoutError(f'{port} filtered')
+		self.port = port
+		self.sent = []
+		self.closed = False
+		FakeSMTP.instances.append(self)
+
+	def starttls(self):
+		pass
+
+	def login(self, user, password):
+		pass
+
+	def send_message(self, msg, to_addrs=None):
+		self.sent.append(to_addrs)
+
+	def quit(self):
+		self.closed = True
+
+
+class FakeStateStore:
+	def __init__(self):
+		self.meta = {}
+
+	def get_meta(self, key):
+		return self.meta.get(key)
+
+	def set_meta(self, key, value):
+		self.meta[key] = value
+
+
+def test_send_html_email_races_transports_and_remembers_winner(monkeypatch):
+	FakeSMTP.instances = []
+	filtered_ssl = type('FilteredSSL', (FakeSMTP,), {'fail': True, 'delay': 0.3})
+	monkeypatch.setattr('smtplib.SMTP_SSL', filtered_ssl)
+	monkeypatch.setattr('smtplib.SMTP', FakeSMTP)
+
+	kit = NotificationKit()
+	kit.email_user = 'bot@example.com'
+	kit.email_pass = 'secret'
+	kit.email_to = 'a@example.com, b@example.com'
+	kit.smtp_server = ''
+	store = FakeStateStore()
+	data = {
+		'accounts': [],
+		'summary': {'total': 0, 'success_count': 0, 'failed_count': 0, 'success_rate': 0},
+		'timestamp': '',
+	}
+
+	start = time.perf_counter()
+	transport = asyncio.run(kit.send_html_email_async('测试标题', data, state_store=store))
+
+	assert transport == 'starttls'
+	assert time.perf_counter() - start < 0.3
+	assert store.meta == {'smtp_transport:smtp.example.com': 'starttls'}
+	assert FakeSMTP.instances[0].sent == [['a@example.com', 'b@example.com']]
+	assert FakeSMTP.instances[0].closed
+
+	# 第二次直接使用记住的连接方式，不再尝试 465
+	monkeypatch.setattr('smtplib.SMTP_SSL', None)
+	assert asyncio.run(kit.send_html_email_async('测试标题', data, state_store=store)) == 'starttls'
+	assert len(FakeSMTP.instances) == 2
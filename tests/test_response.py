@@ -0,0 +1,74 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+from utils.http_pool import AccountSession
+from utils.response import classify, classify_response
+
+
+def headers(content_type='', **extra):
+	return httpx.Headers({'Content-Type': content_type, **extra} if content_type else extra)
+
+
+def test_classify():
+	assert classify(200, headers('application/json'), b'{"success": true}').data == {'success': True}
+	assert classify(200, headers(), b' {"a": 1}').kind == 'json'
+	# Content-Type 不允许时不解析 JSON
+	assert classify(200, headers('text/html'), b'{"success": true}').kind == 'waf'
+	assert classify(200, headers('application/json'), b'{"success": tr', truncated=True).kind == 'error'
+	assert classify(200, headers('text/plain'), b'<HTML><title>Verification</title>').kind == 'waf'
+	assert classify(403, headers('text/plain'), b'Sorry, you have been blocked').kind == 'waf'
+	assert classify(302, headers(Location='/login?expired=1'), b'').kind == 'login'
+	assert classify(502, headers('text/plain'), b'Bad Gateway').kind == 'error'
+	# 5xx 的 HTML 错误页不是 WAF，只有带挑战脚本或拦截页文字时才是
+	assert classify(502, headers('text/html'), b'<html><h1>502 Bad Gateway</h1>nginx</html>').kind == 'error'
+	assert classify(503, headers('text/html'), b"<html><script>var arg1='ABC';</script></html>").kind == 'waf'
+	assert classify(200, headers('text/plain'), b'check-in success').kind == 'text'
+
+
+def test_classify_response_reads_bounded_prefix(monkeypatch):
+	monkeypatch.setenv('DEBUG_RESPONSE_PREVIEW', 'true')
+	sent = []
+
+	async def body():
+		yield b'<html><head><title>verification</title></head>'
+		for _ in range(1000):
+			sent.append(1)
+			yield b'x' * 1024
+
+	async def run():
+		def handler(request):
+			return httpx.Response(200, headers={'Content-Type': 'text/html'}, content=body())
+
+		async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+			session = AccountSession(client)
+			response = await session.get('https://test.example/api/user/self', stream=True)
+			return await classify_response(response, max_bytes=4096, label='Account 1')
+
+	result = asyncio.run(run())
+
+	assert result.kind == 'waf'
+	assert result.truncated
+	assert len(result.body) == 4096
+	assert len(sent) < 10
+
+
+def test_get_user_info_treats_login_redirect_as_auth():
+	def handler(request):
+		return httpx.Response(302, headers={'Location': 'https://test.example/login'})
+
+	async def run():
+		async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+			return await checkin.get_user_info(AccountSession(client), {}, 'https://test.example/api/user/self')
+
+	user_info = asyncio.run(run())
+
+	assert not user_info['success']
+	assert user_info['kind'] == 'auth'
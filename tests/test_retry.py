@@ -0,0 +1,206 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+from utils import metrics
+from utils.config import AccountConfig, AppConfig, ProviderConfig
+from utils.retry import RetryPolicy, RetryQueue, RetryRule, classify_exception, classify_status
+from utils.runtime import RunContext
+from utils.waf_cache import WafCookieCache
+
+USER_INFO_OK = {'success': True, 'data': {'quota': 500000, 'used_quota': 0}}
+
+
+def test_classify():
+	assert classify_status(401) == 'auth'
+	assert classify_status(503) == 'server'
+	assert classify_status(429) == 'server'
+	assert classify_status(404) == 'format'
+	assert classify_exception(httpx.ConnectTimeout('timeout')) == 'transport'
+	assert classify_exception(ValueError('bad')) == 'format'
+
+
+def test_policy_budgets_are_per_kind():
+	policy = RetryPolicy(rules={'waf': RetryRule(1, 1.0), 'server': RetryRule(2, 1.0, max_delay=1.5)})
+	retries = {}
+
+	assert policy.next_delay('waf', retries) is not None
+	assert policy.next_delay('waf', retries) is None
+	assert 0.5 <= policy.next_delay('server', retries) <= 1.0
+	assert 0.75 <= policy.next_delay('server', retries) <= 1.5
+	assert policy.next_delay('auth', retries) is None
+
+
+def test_policy_from_env(monkeypatch):
+	monkeypatch.setenv('MAX_RETRIES', '3')
+	monkeypatch.setenv('RETRY_POLICY', '{"waf": {"max_retries": 5}}')
+	policy = RetryPolicy.from_env()
+
+	assert policy.rules['waf'].max_retries == 5
+	assert policy.rules['transport'].max_retries == 3
+	assert policy.rules['auth'].max_retries == 0
+
+
+def test_retry_queue_orders_and_limits_attempts():
+	queue = RetryQueue(min_gap=0, max_attempts=1)
+
+	assert queue.push(1, 'b', delay=0.02)
+	assert queue.push(0, 'a', delay=0)
+	assert not queue.push(0, 'a', delay=0)
+	assert [entry.index for entry in queue.pop_ready()] == [0]
+	assert 0 < queue.next_ready_in() <= 0.02
+	assert len(queue) == 1
+
+
+@pytest.fixture
+def run_check_in(monkeypatch, tmp_path):
+	"""使用模拟 provider 执行单个账号签到，返回 (结果, 浏览器调用次数)"""
+	monkeypatch.setenv('RETRY_DELAY', '0')
+	monkeypatch.setenv('MAX_RETRIES', '2')
+	monkeypatch.setenv('RETRY_QUEUE_MIN_GAP', '0')
+
+	browser_calls = []
+
+	async def fake_playwright(account_name, login_url, browser_pool):
+		browser_calls.append(login_url)
+		return {'acw_tc': f'tc{len(browser_calls)}'}, [-1]
+
+	monkeypatch.setattr(checkin, 'get_waf_cookies_with_playwright', fake_playwright)
+
+	def run(responses: list, queue: RetryQueue | None = None):
+		def handler(request: httpx.Request):
+			if request.url.path == '/api/user/sign_in':
+				return httpx.Response(200, json={'success': True})
+			return responses.pop(0)
+
+		async def main():
+			provider = ProviderConfig(name='test', domain='https://test.example', bypass_method='waf_cookies')
+			app_config = AppConfig(providers={'test': provider})
+			run_context = RunContext(waf_cache=WafCookieCache(str(tmp_path / 'cache.json')))
+			run_context.http_pool._clients[provider.domain] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+			account = AccountConfig(cookies={'session': 's'}, api_user='1', provider='test')
+			try:
+				results = await checkin.run_accounts([(0, account)], app_config, run_context, queue=queue)
+				return results[0]
+			finally:
+				await run_context.http_pool.close()
+
+		return asyncio.run(main()), len(browser_calls)
+
+	return run
+
+
+def test_server_error_does_not_refresh_waf_cookies(run_check_in):
+	(success, user_info), browser_calls = run_check_in(
+		[httpx.Response(503, text='busy'), httpx.Response(200, json=USER_INFO_OK)]
+	)
+
+	assert success
+	assert browser_calls == 1
+
+
+def test_html_server_error_page_does_not_refresh_waf_cookies(run_check_in):
+	(success, user_info), browser_calls = run_check_in(
+		[
+			httpx.Response(502, html='<html><h1>502 Bad Gateway</h1><hr>nginx</html>'),
+			httpx.Response(200, json=USER_INFO_OK),
+		]
+	)
+
+	assert success
+	assert browser_calls == 1
+	assert metrics.RETRIES.get(provider='test', kind='server') >= 1
+
+
+def test_run_accounts_uses_given_empty_queue(run_check_in):
+	queue = RetryQueue(min_gap=0, max_attempts=1)
+	(success, user_info), browser_calls = run_check_in(
+		[httpx.Response(503, text='busy'), httpx.Response(200, json=USER_INFO_OK)], queue=queue
+	)
+
+	# 传入的空队列不能被替换为按环境变量新建的队列
+	assert success
+	assert not queue.can_push(0)
+
+
+def test_waf_page_refreshes_waf_cookies(run_check_in):
+	detections = metrics.WAF_DETECTIONS.get(provider='test')
+	(success, user_info), browser_calls = run_check_in(
+		[httpx.Response(200, html='<html>verification</html>'), httpx.Response(200, json=USER_INFO_OK)]
+	)
+
+	assert success
+	assert browser_calls == 2
+	assert metrics.WAF_DETECTIONS.get(provider='test') == detections + 1
+	assert metrics.RETRIES.get(provider='test', kind='waf') >= 1
+
+
+def test_waf_block_page_with_error_status_refreshes_waf_cookies(run_check_in):
+	(success, user_info), browser_calls = run_check_in(
+		[
+			httpx.Response(403, html='<html>Sorry, you have been blocked</html>'),
+			httpx.Response(200, json=USER_INFO_OK),
+		]
+	)
+
+	assert success
+	assert browser_calls == 2
+
+
+def test_fallback_sign_in_runs_when_queue_attempts_run_out(run_check_in, monkeypatch):
+	monkeypatch.setenv('MAX_RETRIES', '3')
+	monkeypatch.setenv('RETRY_QUEUE_MAX_ATTEMPTS', '1')
+	responses = [httpx.Response(503, text='busy'), httpx.Response(503, text='busy')]
+
+	(success, user_info), browser_calls = run_check_in(responses)
+
+	# 重试队列只允许重试一次，最后一次尝试仍调用签到接口
+	assert success
+	assert user_info['kind'] == 'server'
+	assert responses == []
+
+
+def test_auth_failure_is_not_retried(run_check_in):
+	responses = [httpx.Response(401, json={'success': False}), httpx.Response(200, json=USER_INFO_OK)]
+	(success, user_info), browser_calls = run_check_in(responses)
+
+	assert user_info['kind'] == 'auth'
+	assert len(responses) == 1
+
+
+def test_attempt_timeout_covers_whole_attempt(monkeypatch):
+	monkeypatch.setenv('ACCOUNT_ATTEMPT_TIMEOUT', '0.1')
+	monkeypatch.setenv('MAX_RETRIES', '0')
+
+	async def hanging_cookies(*args, **kwargs):
+		# 模拟卡住的浏览器启动
+		await asyncio.sleep(10)
+
+	monkeypatch.setattr(checkin, 'prepare_cookies', hanging_cookies)
+
+	async def main():
+		provider = ProviderConfig(name='test', domain='https://test.example', bypass_method='waf_cookies')
+		run_context = RunContext()
+		account = AccountConfig(cookies={'session': 's'}, api_user='1', provider='test')
+		try:
+			return await checkin.run_accounts(
+				[(0, account)], AppConfig(providers={'test': provider}), run_context, queue=RetryQueue(max_attempts=0)
+			)
+		finally:
+			await run_context.close()
+
+	start = time.perf_counter()
+	success, user_info = asyncio.run(main())[0]
+
+	assert not success
+	assert user_info['kind'] == 'transport'
+	assert time.perf_counter() - start < 1
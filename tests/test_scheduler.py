@@ -0,0 +1,237 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+from utils.config import AccountConfig, AppConfig, ProviderConfig
+from utils.runtime import RunContext
+from utils.scheduler import AimdPacer, ProviderLimiter, TokenBucket, build_limiters
+from utils.state import StateStore
+
+
+def test_token_bucket_paces_requests():
+	async def run():
+		bucket = TokenBucket(rate=20, capacity=1)
+		start = time.monotonic()
+		for _ in range(5):
+			await bucket.acquire()
+		return time.monotonic() - start
+
+	# 第一个令牌立即可用，其余 4 个按 20/s 补充
+	assert asyncio.run(run()) >= 0.19
+
+
+def test_token_bucket_unlimited():
+	async def run():
+		bucket = TokenBucket(rate=None)
+		start = time.monotonic()
+		for _ in range(100):
+			await bucket.acquire()
+		return time.monotonic() - start
+
+	assert asyncio.run(run()) < 0.05
+
+
+def test_limiter_caps_concurrency():
+	async def run():
+		limiter = ProviderLimiter('test', max_concurrency=2)
+		active = 0
+		peak = 0
+
+		async def worker():
+			nonlocal active, peak
+			async with limiter.slot():
+				active += 1
+				peak = max(peak, active)
+				await asyncio.sleep(0.01)
+				active -= 1
+
+		await asyncio.gather(*(worker() for _ in range(6)))
+		return peak
+
+	assert asyncio.run(run()) == 2
+
+
+def test_providers_do_not_wait_on_each_other():
+	async def run():
+		providers = {
+			'a': ProviderConfig(name='a', domain='https://a.example'),
+			'b': ProviderConfig(name='b', domain='https://b.example'),
+		}
+		limiters = build_limiters(providers, account_gap=0.1)
+
+		async def worker(name):
+			async with limiters[name].slot():
+				return time.monotonic()
+
+		start = time.monotonic()
+		starts = await asyncio.gather(worker('a'), worker('b'), worker('a'))
+		return [t - start for t in starts]
+
+	a1, b1, a2 = asyncio.run(run())
+	assert b1 < 0.05
+	assert a2 >= 0.09
+
+
+def test_aimd_pacer_shrinks_additively_and_backs_off_multiplicatively():
+	now = [0.0]
+	pacer = AimdPacer(2.0, min_gap=0.5, max_gap=10, step=0.5, factor=2, clock=lambda: now[0])
+
+	for _ in range(5):
+		pacer.on_clean()
+	assert pacer.gap == 0.5
+
+	assert pacer.on_throttle()
+	assert pacer.gap == 1.0
+	# 同一间隔内的多次限流只退避一次
+	assert not pacer.on_throttle()
+	assert pacer.gap == 1.0
+
+	for _ in range(5):
+		now[0] += 20
+		pacer.on_throttle()
+	assert pacer.gap == 10
+
+
+def test_aimd_pacer_backs_off_from_zero_gap():
+	pacer = AimdPacer(0, step=0.5)
+	pacer.on_throttle()
+	assert pacer.gap == 0.5
+
+
+def test_update_pacing_signals():
+	limiter = ProviderLimiter('test', account_gap=1.0, pacer=AimdPacer(1.0, step=0.5, max_gap=60))
+
+	checkin.update_pacing(limiter, {'success': True})
+	assert limiter.account_gap == 0.5
+	checkin.update_pacing(limiter, {'success': False, 'kind': 'format'})
+	assert limiter.account_gap == 0.5
+	checkin.update_pacing(limiter, {'success': False, 'kind': 'auth', 'status_code': 429})
+	assert limiter.account_gap == 1.0
+
+	fixed = ProviderLimiter('fixed', account_gap=1.0)
+	checkin.update_pacing(fixed, {'success': False, 'kind': 'waf'})
+	assert fixed.account_gap == 1.0
+
+
+def test_learned_gap_is_persisted_between_runs(monkeypatch, tmp_path):
+	monkeypatch.setenv('STATE_DB_PATH', str(tmp_path / 'state.db'))
+	monkeypatch.setenv('DELAY_BETWEEN_ACCOUNTS', '5')
+	app_config = AppConfig(
+		providers={
+			'a': ProviderConfig(name='a', domain='https://a.example'),
+			'idle': ProviderConfig(name='idle', domain='https://idle.example'),
+		}
+	)
+
+	with StateStore() as store:
+		run_context = checkin.create_run_context(app_config, store)
+		assert run_context.limiters['a'].account_gap == 5
+		run_context.limiters['a'].record_throttle('HTTP 429')
+		store.begin_run()
+		# 本次运行没有请求的 provider 不保存
+		assert checkin.current_pacing(run_context) == {'a': 10}
+		checkin.save_pacing(checkin.current_pacing(run_context), store)
+		store.finish_run({})
+
+	with StateStore() as store:
+		limiter = checkin.create_run_context(app_config, store).limiters['a']
+		assert limiter.account_gap == 10
+		# 间隔不低于 DELAY_BETWEEN_ACCOUNTS
+		for _ in range(20):
+			limiter.record_clean()
+		assert limiter.account_gap == 5
+
+	# DELAY_BETWEEN_ACCOUNTS 改变后丢弃学到的间隔
+	monkeypatch.setenv('DELAY_BETWEEN_ACCOUNTS', '2')
+	with StateStore() as store:
+		assert checkin.create_run_context(app_config, store).limiters['a'].account_gap == 2
+
+	monkeypatch.setenv('ADAPTIVE_PACING', 'false')
+	with StateStore() as store:
+		run_context = checkin.create_run_context(app_config, store)
+		assert run_context.limiters['a'].pacer is None
+		assert run_context.limiters['a'].account_gap == 2
+
+
+def test_run_accounts_streams_with_bounded_in_flight(monkeypatch):
+	monkeypatch.setenv('ACCOUNT_MAX_IN_FLIGHT', '3')
+	monkeypatch.setenv('ACCOUNT_MAX_PENDING', '3')
+	active = 0
+	peak = 0
+	consumed = []
+
+	async def fake_check_in(account, index, app_config, run_context, state=None):
+		nonlocal active, peak
+		active += 1
+		peak = max(peak, active)
+		await asyncio.sleep(0.01)
+		active -= 1
+		return True, {'success': True, 'quota': 1.0, 'used_quota': 0.0}
+
+	monkeypatch.setattr(checkin, 'check_in_account', fake_check_in)
+
+	def entries():
+		for i in range(10):
+			consumed.append(i)
+			# 同时处理中的账号不超过 3 个，未开始的账号不会被提前读取
+			assert len(consumed) - len(finished) <= 4
+			yield i, AccountConfig(cookies={}, api_user=str(i), provider='test')
+
+	finished = []
+
+	async def main():
+		run_context = RunContext()
+		try:
+			return await checkin.run_accounts(
+				entries(), AppConfig(providers={}), run_context, on_result=lambda i, a, o: finished.append(i)
+			)
+		finally:
+			await run_context.close()
+
+	assert asyncio.run(main()) == {}
+	assert sorted(finished) == list(range(10))
+	assert peak <= 3
+
+
+def test_slow_provider_does_not_starve_other_providers(monkeypatch):
+	monkeypatch.setenv('ACCOUNT_MAX_IN_FLIGHT', '2')
+	monkeypatch.setenv('DELAY_BETWEEN_ACCOUNTS', '0')
+	monkeypatch.setenv('ADAPTIVE_PACING', 'false')
+	finished_at: dict[str, list[float]] = {'slow': [], 'fast': []}
+
+	async def fake_check_in(account, index, app_config, run_context, state=None):
+		await asyncio.sleep(0.2 if account.provider == 'slow' else 0)
+		finished_at[account.provider].append(time.monotonic())
+		return True, {'success': True, 'quota': 1.0, 'used_quota': 0.0}
+
+	monkeypatch.setattr(checkin, 'check_in_account', fake_check_in)
+	app_config = AppConfig(
+		providers={
+			'slow': ProviderConfig(name='slow', domain='https://slow.example', max_concurrency=1),
+			'fast': ProviderConfig(name='fast', domain='https://fast.example', max_concurrency=2),
+		}
+	)
+	# 慢 provider 的账号排在前面，超过全局槽位数
+	entries = [(i, AccountConfig(cookies={}, api_user=str(i), provider='slow')) for i in range(3)]
+	entries += [(i, AccountConfig(cookies={}, api_user=str(i), provider='fast')) for i in range(3, 6)]
+
+	async def main():
+		run_context = checkin.create_run_context(app_config)
+		start = time.monotonic()
+		try:
+			await checkin.run_accounts(entries, app_config, run_context)
+		finally:
+			await run_context.close()
+		return start
+
+	start = asyncio.run(main())
+	assert len(finished_at['fast']) == 3
+	# 快 provider 的账号不必等慢 provider 排队中的账号处理完
+	assert max(finished_at['fast']) - start < 0.3
+	assert max(finished_at['slow']) - start >= 0.6
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+from utils.config import AccountConfig
+from utils.shard import load_shard_results, parse_shard, select_shard, shard_of, write_shard_result
+from utils.state import StateStore
+
+
+def record(api_user, success=True, quota=10.0):
+	return {
+		'key': f'anyrouter:{api_user}',
+		'api_user': api_user,
+		'name': f'Account {api_user}',
+		'provider': 'anyrouter',
+		'success': success,
+		'skipped': False,
+		'quota': quota if success else None,
+		'used_quota': 1.0 if success else None,
+		'error': None if success else 'HTTP 500',
+		'kind': None if success else 'server',
+	}
+
+
+def test_parse_shard():
+	assert parse_shard('1/4') == (1, 4)
+	assert parse_shard('4/4') == (4, 4)
+	for value in ('0/4', '5/4', '1/0', 'a/b', '3'):
+		with pytest.raises(ValueError):
+			parse_shard(value)
+
+
+def test_shards_partition_accounts_by_identity():
+	accounts = [AccountConfig(cookies={}, api_user=str(i), provider='anyrouter') for i in range(200)]
+	shards = [select_shard(accounts, i, 4) for i in range(1, 5)]
+
+	assert set().union(*shards) == set(range(200))
+	assert sum(len(shard) for shard in shards) == 200
+	assert all(shard for shard in shards)
+	# 与账号顺序无关
+	assert shard_of('anyrouter:7', 4) == next(i for i, shard in enumerate(shards, 1) if 7 in shard)
+
+
+def test_load_shard_results_reports_missing_and_keeps_latest(tmp_path):
+	write_shard_result(str(tmp_path / 'shard-1-of-3.json'), 1, 3, [record('1', quota=1.0)], 100.0)
+	write_shard_result(str(tmp_path / 'shard-2-of-3.json'), 2, 3, [record('2')], 50.0, {'anyrouter': 4.0})
+	rerun = tmp_path / 'rerun'
+	rerun.mkdir()
+	write_shard_result(str(rerun / 'shard-1-of-3.json'), 1, 3, [record('1', quota=2.0)], 200.0)
+	(tmp_path / 'shard-9-of-9.json').write_text('{"version": 1, "shard": 9, "total_shards": 9}')
+
+	records, info = load_shard_results([str(tmp_path), str(rerun)])
+
+	assert [r['quota'] for r in records] == [2.0, 10.0]
+	assert info['total_shards'] == 3
+	assert info['shards'] == [1, 2]
+	assert info['missing'] == [3]
+	assert info['started_at'] == 50.0
+	assert info['pacing'] == {'anyrouter': 4.0}
+
+
+def test_merge_records_state_and_notifies_once(monkeypatch, tmp_path):
+	monkeypatch.setenv('STATE_DB_PATH', str(tmp_path / 'state.db'))
+	result_dir = tmp_path / 'results'
+	write_shard_result(str(result_dir / 'shard-1-of-2.json'), 1, 2, [record('1')], 100.0)
+	write_shard_result(str(result_dir / 'shard-2-of-2.json'), 2, 2, [record('2', success=False)], 100.0)
+	reports = []
+
+	async def fake_send_report(records, changed, first_run=False, state_store=None):
+		reports.append((records, changed))
+
+	monkeypatch.setattr(checkin, 'send_report', fake_send_report)
+
+	with pytest.raises(SystemExit) as exit_info:
+		asyncio.run(checkin.merge([str(result_dir)]))
+
+	assert exit_info.value.code == 0
+	assert len(reports) == 1
+	assert [r['key'] for r in reports[0][0]] == ['anyrouter:1', 'anyrouter:2']
+	assert [r['key'] for r in reports[0][1]] == ['anyrouter:1']
+
+	with StateStore() as store:
+		accounts = store.get_accounts()
+		assert accounts['anyrouter:1']['quota'] == 10.0
+		assert accounts['anyrouter:2']['last_error'] == 'HTTP 500'
+		run = store.conn.execute('SELECT started_at, total, metadata FROM runs').fetchone()
+		assert run['started_at'] == 100.0
+		assert run['total'] == 2
+		assert json.loads(run['metadata'])['shards'] == 2
+
+
+def test_parse_args_shard_and_merge():
+	assert checkin.parse_args(['--shard', '2/3']).shard == (2, 3)
+	args = checkin.parse_args(['merge', 'a', 'b'])
+	assert args.command == 'merge'
+	assert args.paths == ['a', 'b']
+	assert checkin.parse_args([]).command is None
@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.startup import measure_imports, parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        900 |     playwright._impl
+import time:      1000 |       1900 |   playwright
+import time:       500 |       2520 | checkin
+"""
+
+
+def test_parse_importtime():
+	timings = parse_importtime(SAMPLE)
+
+	assert [t.module for t in timings] == ['_io', 'playwright._impl', 'playwright', 'checkin']
+	assert timings[1].self_us == 300
+	assert timings[1].depth == 2
+	assert timings[3].cumulative_us == 2520
+	assert timings[3].depth == 0
+
+
+def test_checkin_startup_skips_optional_modules():
+	modules = {t.module for t in measure_imports('checkin')}
+
+	assert 'checkin' in modules
+	assert not any(m.split('.')[0] in ('playwright', 'jinja2', 'smtplib') for m in modules)
+	assert 'email.mime.text' not in modules
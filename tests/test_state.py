@@ -0,0 +1,166 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.state import StateStore
+
+
+def record(store, key, success, quota=None):
+	user_info = {'success': True, 'quota': quota, 'used_quota': 1.0} if quota is not None else None
+	store.record_account(key, 'anyrouter', key.split(':')[1], key, success, user_info)
+
+
+def test_finish_run_persists_accounts_history_and_meta(tmp_path):
+	path = str(tmp_path / 'state.db')
+	with StateStore(path) as store:
+		store.begin_run()
+		record(store, 'anyrouter:1', True, 10.0)
+		record(store, 'anyrouter:2', False)
+		store.set_meta('balance_hash', 'abc')
+		assert store.get_meta('balance_hash') == 'abc'
+		run_id = store.finish_run({'total': 2})
+
+	with StateStore(path) as store:
+		accounts = store.get_accounts()
+		assert accounts['anyrouter:1']['last_result'] == 'success'
+		assert accounts['anyrouter:1']['quota'] == 10.0
+		assert accounts['anyrouter:2']['last_result'] == 'failed'
+		assert accounts['anyrouter:2']['last_success_at'] is None
+		assert store.get_meta('balance_hash') == 'abc'
+
+	conn = sqlite3.connect(path)
+	assert conn.execute('SELECT total, success FROM runs WHERE id = ?', (run_id,)).fetchone() == (2, 1)
+	assert conn.execute('SELECT COUNT(*) FROM balance_history').fetchone() == (1,)
+	assert conn.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+
+
+def test_failed_run_keeps_last_success_and_balance(tmp_path):
+	path = str(tmp_path / 'state.db')
+	with StateStore(path) as store:
+		store.begin_run()
+		record(store, 'anyrouter:1', True, 10.0)
+		store.finish_run()
+		first_success_at = store.get_account('anyrouter:1')['last_success_at']
+
+		store.begin_run()
+		record(store, 'anyrouter:1', False)
+		store.finish_run()
+		account = store.get_account('anyrouter:1')
+
+	assert account['last_result'] == 'failed'
+	assert account['last_success_at'] == first_success_at
+	assert account['quota'] == 10.0
+
+
+def test_checked_in_outcome_uses_stored_state(tmp_path):
+	from checkin import checked_in_outcome
+	from utils.config import AccountConfig, AppConfig, ProviderConfig
+
+	app_config = AppConfig(providers={'anyrouter': ProviderConfig(name='anyrouter', domain='https://a.example')})
+	accounts = [
+		AccountConfig(cookies={}, api_user='1'),
+		AccountConfig(cookies={}, api_user='2'),
+		AccountConfig(cookies={}, api_user='3'),
+	]
+
+	with StateStore(str(tmp_path / 'state.db')) as store:
+		store.begin_run()
+		record(store, 'anyrouter:1', True, 10.0)
+		record(store, 'anyrouter:2', False)
+		store.finish_run()
+		outcomes = [checked_in_outcome(account, i, app_config, store) for i, account in enumerate(accounts)]
+
+	assert outcomes[1:] == [None, None]
+	assert outcomes[0][0] is True
+	assert outcomes[0][1]['quota'] == 10.0
+	assert outcomes[0][1]['skipped']
+
+
+def test_skipped_accounts_count_towards_run_totals(tmp_path):
+	path = str(tmp_path / 'state.db')
+	with StateStore(path) as store:
+		store.begin_run()
+		record(store, 'anyrouter:1', True, 10.0)
+		store.finish_run()
+
+		# 所有账号都已签到而被跳过的运行
+		store.begin_run()
+		run_id = store.finish_run({'total': 2, 'success': 2}, skipped=2)
+
+		store.begin_run()
+		record(store, 'anyrouter:2', False)
+		mixed_run_id = store.finish_run(skipped=1)
+
+	conn = sqlite3.connect(path)
+	assert conn.execute('SELECT total, success FROM runs WHERE id = ?', (run_id,)).fetchone() == (2, 2)
+	assert conn.execute('SELECT total, success FROM runs WHERE id = ?', (mixed_run_id,)).fetchone() == (2, 1)
+
+
+def test_diff_balances_uses_account_keys():
+	import checkin
+
+	previous = {
+		'anyrouter:1': {'quota': 10.0},
+		'anyrouter:2': {'quota': 5.0},
+		'anyrouter:3': {'quota': None},
+	}
+	records = [
+		{'key': 'anyrouter:2', 'quota': 5.0, 'skipped': False},
+		{'key': 'anyrouter:1', 'quota': 12.0, 'skipped': False},
+		{'key': 'anyrouter:3', 'quota': 1.0, 'skipped': False},
+		{'key': 'anyrouter:4', 'quota': 2.0, 'skipped': False},
+		{'key': 'anyrouter:5', 'quota': None, 'skipped': False},
+		{'key': 'anyrouter:6', 'quota': 3.0, 'skipped': True},
+	]
+
+	changed = checkin.diff_balances(records, previous)
+
+	assert [(r['key'], r['previous_quota']) for r in changed] == [
+		('anyrouter:1', 10.0),
+		('anyrouter:3', None),
+		('anyrouter:4', None),
+	]
+
+
+def test_send_report_lists_each_account_once(monkeypatch):
+	import asyncio
+
+	import checkin
+	from utils.config import AccountConfig
+
+	sent = []
+
+	class FakeNotify:
+		async def send_html_email_async(self, title, data, state_store=None):
+			sent.append(('email', data))
+
+		async def push_message_async(self, title, content, msg_type='text', skip_email=False, data=None):
+			sent.append(('text', content))
+
+	monkeypatch.setattr(checkin, 'get_notify', lambda: FakeNotify())
+
+	user_info = {'success': True, 'quota': 12.0, 'used_quota': 1.0}
+	records = [
+		checkin.build_account_record(AccountConfig(cookies={}, api_user='1'), 0, (False, user_info)),
+		checkin.build_account_record(AccountConfig(cookies={}, api_user='2'), 1, (True, {**user_info, 'quota': 3.0})),
+	]
+	changed = checkin.diff_balances(records, {'anyrouter:1': {'quota': 10.0}, 'anyrouter:2': {'quota': 2.0}})
+
+	asyncio.run(checkin.send_report(records, changed))
+
+	content = dict(sent)['text']
+	accounts = dict(sent)['email']['accounts']
+	assert content.count('Account 1') == 1
+	assert (
+		'[FAIL] Account 1\n:money: Current balance: $12.0, Used: $1.0 (was $10.0)\nCheck-in request failed' in content
+	)
+	assert 'Unknown error' not in content
+	assert '[BALANCE] Account 2' in content
+	assert [(a['name'], a['success'], a['quota']) for a in accounts] == [
+		('Account 1', False, 12.0),
+		('Account 2', True, 3.0),
+	]
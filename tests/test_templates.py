@@ -0,0 +1,58 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.templates import TemplateRenderer
+
+REPORT_DATA = {
+	'accounts': [
+		{'name': 'ok <1>', 'success': True, 'quota': 12.5, 'used_quota': 1},
+		{'name': 'bad', 'success': False, 'quota': 0, 'used_quota': 0, 'error': 'HTTP 401 & expired'},
+	],
+	'summary': {'total': 2, 'success_count': 1, 'failed_count': 1, 'success_rate': 50.0},
+	'timestamp': '2025-01-01 08:00:00',
+}
+
+
+def test_jinja2_is_imported_lazily():
+	code = 'import sys; import utils.notify; print("jinja2" in sys.modules)'
+	result = subprocess.run([sys.executable, '-c', code], cwd=project_root, capture_output=True, text=True)
+	assert result.stdout.strip() == 'False'
+
+
+def test_templates_are_compiled_once(tmp_path):
+	renderer = TemplateRenderer(template_dir='', bytecode_cache_dir='')
+
+	html = renderer.render('email.html', **REPORT_DATA)
+	assert renderer.get_template('email.html') is renderer.get_template('email.html')
+	assert 'ok &lt;1&gt;' in html
+	assert '$12.50' in html
+
+	feishu = renderer.render('feishu.md', **REPORT_DATA)
+	assert '**ok <1>**' in feishu
+	assert 'HTTP 401 & expired' in feishu
+
+	telegram = renderer.render('telegram.html', **REPORT_DATA)
+	assert '<b>ok &lt;1&gt;</b>' in telegram
+	assert 'HTTP 401 &amp; expired' in telegram
+
+
+def test_user_templates_and_bytecode_cache(tmp_path):
+	template_dir = tmp_path / 'templates'
+	template_dir.mkdir()
+	(template_dir / 'dingtalk.txt').write_text('{{ summary.success_count }}/{{ summary.total }} ok', encoding='utf-8')
+	cache_dir = tmp_path / 'cache'
+
+	renderer = TemplateRenderer(template_dir=str(template_dir), bytecode_cache_dir=str(cache_dir))
+	assert renderer.has_template('dingtalk.txt')
+	assert not renderer.has_template('wecom.txt')
+	assert renderer.render('dingtalk.txt', **REPORT_DATA) == '1/2 ok'
+	assert list(cache_dir.iterdir())
+
+	# 新进程从磁盘字节码缓存加载
+	reloaded = TemplateRenderer(template_dir=str(template_dir), bytecode_cache_dir=str(cache_dir))
+	assert reloaded.render('dingtalk.txt', **REPORT_DATA) == '1/2 ok'
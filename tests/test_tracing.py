@@ -0,0 +1,73 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.tracing import Tracer
+
+
+def read_spans(path: Path) -> list[dict]:
+	return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_disabled_tracer_writes_nothing(tmp_path):
+	tracer = Tracer(path='')
+	with tracer.bind(account='a'), tracer.span('noop') as current:
+		current.set(ignored=True)
+	tracer.close()
+	assert list(tmp_path.iterdir()) == []
+
+
+def test_spans_inherit_bound_attributes_per_task(tmp_path):
+	path = tmp_path / 'trace.jsonl'
+	tracer = Tracer(path=str(path))
+
+	async def attempt(account: str, delay: float):
+		with tracer.bind(account=account, provider='p', attempt=1), tracer.span('account.attempt'):
+			await asyncio.sleep(delay)
+			with tracer.span('get_user_info') as current:
+				current.set(kind='waf')
+
+	async def run():
+		await asyncio.gather(attempt('a', 0.02), attempt('b', 0))
+
+	asyncio.run(run())
+	with pytest.raises(ValueError):
+		with tracer.span('broken'):
+			raise ValueError('boom')
+	tracer.close()
+
+	spans = read_spans(path)
+	by_account = {}
+	for record in spans[:-1]:
+		by_account.setdefault(record['attributes']['account'], {})[record['name']] = record
+
+	for account in ('a', 'b'):
+		parent = by_account[account]['account.attempt']
+		child = by_account[account]['get_user_info']
+		assert child['parent_id'] == parent['span_id']
+		assert child['attributes'] == {'account': account, 'provider': 'p', 'attempt': 1, 'kind': 'waf'}
+		assert parent['parent_id'] is None
+	assert by_account['a']['account.attempt']['duration_ms'] >= 20
+	assert spans[-1]['status'] == 'error'
+	assert 'boom' in spans[-1]['error']
+
+
+def test_otlp_format(tmp_path):
+	path = tmp_path / 'trace.json'
+	tracer = Tracer(path=str(path), format='otlp')
+	with tracer.bind(account='a', attempt=2), tracer.span('outer'), tracer.span('inner'):
+		pass
+	tracer.close()
+
+	inner, outer = [r['resourceSpans'][0]['scopeSpans'][0]['spans'][0] for r in read_spans(path)]
+	assert inner['parentSpanId'] == outer['spanId']
+	assert inner['traceId'] == outer['traceId'] == tracer.trace_id
+	assert {'key': 'attempt', 'value': {'intValue': '2'}} in inner['attributes']
+	assert int(inner['endTimeUnixNano']) >= int(inner['startTimeUnixNano'])
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+from utils.config import ProviderConfig
+from utils.runtime import RunContext
+from utils.waf_cache import WafCookieCache
+
+
+def test_cache_roundtrip_across_instances(tmp_path):
+	path = tmp_path / 'cache.json'
+	WafCookieCache(str(path), ttl=60).set('https://a.example', {'acw_tc': 'x'})
+
+	cache = WafCookieCache(str(path), ttl=60)
+	assert cache.get('https://a.example') == {'acw_tc': 'x'}
+	assert cache.get('https://b.example') is None
+
+
+def test_cache_respects_cookie_expiry(tmp_path):
+	path = tmp_path / 'cache.json'
+	cache = WafCookieCache(str(path), ttl=60)
+	cache.set('https://a.example', {'acw_tc': 'x'}, expires=[time.time() - 1, -1])
+
+	assert cache.get('https://a.example') is None
+	assert json.loads(path.read_text()) == {}
+
+
+def test_cache_invalidate(tmp_path):
+	path = tmp_path / 'cache.json'
+	cache = WafCookieCache(str(path), ttl=60)
+	cache.set('https://a.example', {'acw_tc': 'x'})
+	cache.invalidate('https://a.example')
+
+	assert WafCookieCache(str(path), ttl=60).get('https://a.example') is None
+	assert not list(tmp_path.glob('.waf_cookies_*'))
+
+
+def test_cache_disabled_with_zero_ttl(tmp_path):
+	path = tmp_path / 'cache.json'
+	cache = WafCookieCache(str(path), ttl=0)
+	cache.set('https://a.example', {'acw_tc': 'x'})
+
+	assert cache.get('https://a.example') is None
+	assert not path.exists()
+
+
+def test_concurrent_misses_fetch_waf_cookies_once(monkeypatch, tmp_path):
+	calls = []
+
+	async def fake_playwright(account_name, login_url, browser_pool):
+		calls.append(account_name)
+		await asyncio.sleep(0.02)
+		return {'acw_tc': 'x'}, [-1]
+
+	monkeypatch.setattr(checkin, 'get_waf_cookies_with_playwright', fake_playwright)
+
+	async def run():
+		provider = ProviderConfig(name='test', domain='https://test.example', bypass_method='waf_cookies')
+		run_context = RunContext(waf_cache=WafCookieCache(str(tmp_path / 'cache.json'), ttl=60))
+		return await asyncio.gather(
+			*(checkin.prepare_cookies(f'Account {i}', provider, {'session': str(i)}, run_context) for i in range(5))
+		)
+
+	results = asyncio.run(run())
+
+	assert len(calls) == 1
+	assert [cookies['acw_tc'] for cookies in results] == ['x'] * 5
+	assert [cookies['session'] for cookies in results] == ['0', '1', '2', '3', '4']
+
+
+def test_disabled_cache_fetches_concurrently(monkeypatch, tmp_path):
+	active = 0
+	peak = 0
+	calls = []
+
+	async def fake_playwright(account_name, login_url, browser_pool):
+		nonlocal active, peak
+		calls.append(account_name)
+		active += 1
+		peak = max(peak, active)
+		await asyncio.sleep(0.02)
+		active -= 1
+		return {'acw_tc': account_name}, [-1]
+
+	monkeypatch.setattr(checkin, 'get_waf_cookies_with_playwright', fake_playwright)
+
+	async def run():
+		provider = ProviderConfig(name='test', domain='https://test.example', bypass_method='waf_cookies')
+		run_context = RunContext(waf_cache=WafCookieCache(str(tmp_path / 'cache.json'), ttl=0))
+		return await asyncio.gather(
+			*(checkin.prepare_cookies(f'Account {i}', provider, {'session': str(i)}, run_context) for i in range(5))
+		)
+
+	results = asyncio.run(run())
+
+	# 缓存关闭时没有可共享的结果，各账号各自获取且互不等待
+	assert len(calls) == 5
+	assert peak == 5
+	assert [cookies['acw_tc'] for cookies in results] == [f'Account {i}' for i in range(5)]
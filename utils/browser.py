@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+浏览器池模块
+
+- BROWSER_HEADLESS: 是否以无头模式启动 Chromium，默认 true（Linux 上无需显示器或 Xvfb）
+- BROWSER_BLOCK_RESOURCES: 是否拦截图片、字体、样式表与媒体请求，默认 true
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from utils.tracing import span
+
+DEFAULT_USER_AGENT = (
+	'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36'
+)
+
+PLAYWRIGHT_INSTALL_HINT = (
+	'Playwright is not installed. Install the browser extra with `uv sync --extra browser` '
+	'and run `uv run playwright install chromium`'
+)
+
+# 获取 WAF cookies 不需要的资源类型，在 context 内直接拦截
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'stylesheet', 'media'})
+
+BROWSER_ARGS = [
+	'--disable-blink-features=AutomationControlled',
+	'--disable-dev-shm-usage',
+	'--disable-web-security',
+	'--disable-features=VizDisplayCompositor',
+	'--no-sandbox',
+]
+
+
+@dataclass
+class BrowserPoolStats:
+	"""浏览器池统计"""
+
+	launches: int = 0
+	contexts: int = 0
+	reuses: int = 0
+	wait_time: float = 0.0
+
+	def summary(self) -> str:
+		"""生成统计摘要"""
+		return (
+			f'browser launches: {self.launches}, contexts: {self.contexts}, '
+			f'reuses: {self.reuses}, wait time: {self.wait_time:.2f}s'
+		)
+
+
+class BrowserPool:
+	"""单次运行共享的 Chromium 实例，按需分发隔离的 BrowserContext
+
+	浏览器在第一次 acquire 时才启动，之后所有账号复用同一个进程；
+	每个账号拿到的是全新的 BrowserContext（独立 cookies/storage），用完即关闭。
+	同时存在的 context 数量由 size 限制。
+	"""
+
+	def __init__(self, size: int | None = None, headless: bool | None = None, block_resources: bool | None = None):
+		if size is None:
+			size = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+		if headless is None:
+			headless = os.getenv('BROWSER_HEADLESS', 'true').lower() == 'true'
+		if block_resources is None:
+			block_resources = os.getenv('BROWSER_BLOCK_RESOURCES', 'true').lower() == 'true'
+		self.size = max(1, size)
+		self.headless = headless
+		self.block_resources = block_resources
+		self.stats = BrowserPoolStats()
+		self._semaphore = asyncio.Semaphore(self.size)
+		self._launch_lock = asyncio.Lock()
+		self._playwright = None
+		self._browser = None
+
+	async def _ensure_browser(self):
+		"""确保浏览器已启动"""
+		async with self._launch_lock:
+			if self._browser is not None and self._browser.is_connected():
+				self.stats.reuses += 1
+				return self._browser
+
+			if self._playwright is None:
+				# 延迟导入：只有真正需要浏览器时才加载 Playwright（可选依赖）
+				try:
+					from playwright.async_api import async_playwright
+				except ImportError as e:
+					raise ImportError(PLAYWRIGHT_INSTALL_HINT) from e
+				self._playwright = await async_playwright().start()
+
+			with span('browser.launch', headless=self.headless):
+				self._browser = await self._playwright.chromium.launch(headless=self.headless, args=BROWSER_ARGS)
+			self.stats.launches += 1
+			return self._browser
+
+	@asynccontextmanager
+	async def context(self):
+		"""获取一个隔离的 BrowserContext，退出时自动关闭"""
+		start = time.perf_counter()
+		async with self._semaphore:
+			wait_time = time.perf_counter() - start
+			self.stats.wait_time += wait_time
+
+			with span('browser.new_context', pool_wait_ms=round(wait_time * 1000, 3)):
+				browser = await self._ensure_browser()
+				context = await browser.new_context(
+					user_agent=DEFAULT_USER_AGENT,
+					viewport={'width': 1920, 'height': 1080},
+				)
+				if self.block_resources:
+					await context.route('**/*', _block_resources)
+			self.stats.contexts += 1
+
+			try:
+				yield context
+			finally:
+				try:
+					await context.close()
+				except Exception:
+					pass
+
+	async def close(self):
+		"""关闭浏览器和 Playwright 驱动"""
+		if self._browser is not None:
+			try:
+				await self._browser.close()
+			except Exception:
+				pass
+			self._browser = None
+
+		if self._playwright is not None:
+			try:
+				await self._playwright.stop()
+			except Exception:
+				pass
+			self._playwright = None
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, exc_type, exc, tb):
+		await self.close()
+
+
+async def _block_resources(route):
+	"""拦截不影响 WAF 挑战的资源请求"""
+	if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+		await route.abort()
+	else:
+		await route.continue_()
+
+
+async def _is_challenge_page(page) -> bool:
+	"""当前页面是否仍是 WAF 挑战页（页面正在跳转时也视为未完成）"""
+	try:
+		return 'arg1=' in await page.content()
+	except Exception:
+		return True
+
+
+async def capture_cookies(context, url: str, names: list[str], timeout: float) -> list[dict]:
+	"""打开 url 并等待指定的 cookies 出现
+
+	每次收到响应或页面加载完成时检查 context 中的 cookies：names 全部出现，
+	或页面加载完成、已不是挑战页且至少拿到一个时立即返回；超过 timeout 秒后返回已获取到的部分。
+	timeout 同时限制打开页面、读取 cookies 与页面内容等浏览器调用。
+	"""
+	loop = asyncio.get_running_loop()
+	deadline = loop.time() + timeout
+	changed = asyncio.Event()
+	loaded = False
+	cookies: list[dict] = []
+	navigation = None
+
+	def on_load(_):
+		nonlocal loaded
+		loaded = True
+		changed.set()
+
+	try:
+		async with asyncio.timeout_at(deadline):
+			page = await context.new_page()
+			page.on('response', lambda _: changed.set())
+			page.on('load', on_load)
+			navigation = asyncio.create_task(page.goto(url, wait_until='commit', timeout=timeout * 1000))
+			navigation.add_done_callback(lambda _: changed.set())
+			while True:
+				changed.clear()
+				cookies = [
+					cookie
+					for cookie in await context.cookies()
+					if cookie.get('name') in names and cookie.get('value') is not None
+				]
+				found = {cookie['name'] for cookie in cookies}
+				if found >= set(names):
+					return cookies
+				if loaded:
+					loaded = False
+					if found and not await _is_challenge_page(page):
+						return cookies
+				if navigation.done() and navigation.exception():
+					raise navigation.exception()
+				await changed.wait()
+	except TimeoutError:
+		return cookies
+	finally:
+		if navigation is not None and not navigation.done():
+			navigation.cancel()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+HTTP 录制/回放
+
+- HTTP_RECORD=<文件>: 记录签到流程经过连接池的所有请求（登录页、WAF 挑战、用户信息、签到），运行结束时写入 cassette 文件
+- HTTP_REPLAY=<文件>: 不访问网络，由本地 transport 按录制顺序返回响应，并按原始耗时等待
+- REPLAY_LATENCY_SCALE: 回放耗时的缩放系数，默认 1（0 表示不等待）
+
+cassette 为 JSONL（.gz 结尾时 gzip 压缩），每行一个请求/响应。只保存方法、地址（不含查询参数）、
+状态码、少量响应头与响应体，不保存请求头；Set-Cookie 的值与响应 JSON 中的敏感字段会被替换为 REDACTED。
+请求中的账号标识头（new-api-user）只保存加盐哈希（每个 cassette 随机生成盐并保存在首行），
+回放时优先返回同一账号录制的响应。
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import secrets
+import time
+from typing import Literal
+
+import httpx
+
+CASSETTE_VERSION = 1
+REDACTED = 'REDACTED'
+
+# 回放时需要的响应头，其余（包括 Content-Encoding / Content-Length）不保存
+KEPT_RESPONSE_HEADERS = ('content-type', 'location', 'set-cookie')
+# 用于区分账号的请求头，只保存哈希
+IDENTITY_HEADERS = ('new-api-user',)
+# 响应 JSON 中需要脱敏的字段
+REDACTED_FIELDS = frozenset(
+	{'access_token', 'token', 'password', 'email', 'username', 'display_name', 'aff_code', 'github_id', 'oidc_id'}
+)
+
+
+def _request_key(method: str, url: httpx.URL) -> str:
+	return f'{method.upper()} {url.scheme}://{url.netloc.decode("ascii")}{url.path}'
+
+
+def _request_identity(request: httpx.Request, salt: str = '') -> str | None:
+	"""账号标识头的哈希；api_user 多为较小的数字，不加盐的哈希可被直接枚举还原"""
+	for name in IDENTITY_HEADERS:
+		value = request.headers.get(name)
+		if value:
+			return hashlib.sha256(f'{salt}{value}'.encode('utf-8')).hexdigest()[:16]
+	return None
+
+
+def _redact_json(value):
+	if isinstance(value, dict):
+		return {
+			key: REDACTED if key in REDACTED_FIELDS and item not in (None, '') else _redact_json(item)
+			for key, item in value.items()
+		}
+	if isinstance(value, list):
+		return [_redact_json(item) for item in value]
+	return value
+
+
+def _redact_set_cookie(value: str) -> str:
+	"""保留 cookie 名与属性，只替换值"""
+	pair, _, attributes = value.partition(';')
+	name = pair.split('=', 1)[0]
+	return f'{name}={REDACTED}' + (f';{attributes}' if attributes else '')
+
+
+def _encode_body(content: bytes, content_type: str) -> dict:
+	if 'json' in content_type:
+		try:
+			return {'body': json.dumps(_redact_json(json.loads(content)), ensure_ascii=False)}
+		except ValueError:
+			pass
+	try:
+		return {'body': content.decode('utf-8')}
+	except UnicodeDecodeError:
+		return {'body_b64': base64.b64encode(content).decode('ascii')}
+
+
+def _decode_body(interaction: dict) -> bytes:
+	if 'body_b64' in interaction:
+		return base64.b64decode(interaction['body_b64'])
+	return interaction.get('body', '').encode('utf-8')
+
+
+class Cassette:
+	"""录制的请求/响应集合"""
+
+	def __init__(self, path: str, mode: Literal['record', 'replay'], latency_scale: float = 1.0):
+		self.path = path
+		self.mode = mode
+		self.latency_scale = max(0.0, latency_scale)
+		self.interactions: list[dict] = []
+		# 账号标识哈希的盐，回放时从 cassette 首行读取（旧 cassette 没有盐）
+		self.salt = secrets.token_hex(16) if mode == 'record' else ''
+		self._index: dict[tuple[str, str | None], list[dict]] = {}
+		self._positions: dict[tuple[str, str | None], int] = {}
+		if mode == 'replay':
+			self.load()
+
+	@classmethod
+	def from_env(cls) -> 'Cassette | None':
+		"""根据 HTTP_REPLAY / HTTP_RECORD 创建，均未设置时返回 None（回放优先）"""
+		replay = os.getenv('HTTP_REPLAY')
+		if replay:
+			return cls(replay, 'replay', float(os.getenv('REPLAY_LATENCY_SCALE', '1')))
+		record = os.getenv('HTTP_RECORD')
+		if record:
+			return cls(record, 'record')
+		return None
+
+	@staticmethod
+	def _open(path: str, mode: str):
+		if path.endswith('.gz'):
+			return gzip.open(path, mode + 't', encoding='utf-8')
+		return open(path, mode, encoding='utf-8')
+
+	def load(self):
+		with self._open(self.path, 'r') as f:
+			header = json.loads(f.readline() or '{}')
+			if header.get('version') != CASSETTE_VERSION:
+				raise ValueError(f'Unsupported cassette version in {self.path}: {header.get("version")}')
+			self.salt = header.get('salt', '')
+			self.interactions = [json.loads(line) for line in f if line.strip()]
+
+		# 按 (地址, 账号) 与 (地址, 任意账号) 建立索引
+		self._index = {}
+		self._positions = {}
+		for interaction in self.interactions:
+			self._index.setdefault((interaction['request'], interaction.get('identity')), []).append(interaction)
+			self._index.setdefault((interaction['request'], '*'), []).append(interaction)
+		print(f'[REPLAY] Loaded {len(self.interactions)} recorded exchange(s) from {self.path}')
+
+	def save(self):
+		"""写入 cassette（先写临时文件再替换）"""
+		os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+		tmp_path = self.path + '.tmp' + ('.gz' if self.path.endswith('.gz') else '')
+		with self._open(tmp_path, 'w') as f:
+			f.write(json.dumps({'version': CASSETTE_VERSION, 'recorded_at': time.time(), 'salt': self.salt}) + '\n')
+			for interaction in self.interactions:
+				f.write(json.dumps(interaction, ensure_ascii=False, separators=(',', ':')) + '\n')
+		os.replace(tmp_path, self.path)
+		print(f'[RECORD] Saved {len(self.interactions)} exchange(s) to {self.path}')
+
+	def record(self, request: httpx.Request, response: httpx.Response, content: bytes, latency: float):
+		content_type = response.headers.get('content-type', '')
+		headers = []
+		for name in KEPT_RESPONSE_HEADERS:
+			for value in response.headers.get_list(name):
+				headers.append([name, _redact_set_cookie(value) if name == 'set-cookie' else value])
+		self.interactions.append(
+			{
+				'request': _request_key(request.method, request.url),
+				'identity': _request_identity(request, self.salt),
+				'status': response.status_code,
+				'headers': headers,
+				'latency': round(latency, 4),
+				**_encode_body(content, content_type),
+			}
+		)
+
+	def match(self, request: httpx.Request) -> dict | None:
+		"""按录制顺序返回同一方法、地址（及账号）的下一个响应，用完后从头循环"""
+		key = (_request_key(request.method, request.url), _request_identity(request, self.salt))
+		if key not in self._index:
+			# 该账号没有录制时，使用同一地址的其他响应
+			key = (key[0], '*')
+		candidates = self._index.get(key)
+		if not candidates:
+			return None
+		position = self._positions.get(key, 0)
+		self._positions[key] = position + 1
+		return candidates[position % len(candidates)]
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+	"""转发请求并记录响应"""
+
+	def __init__(self, transport: httpx.AsyncBaseTransport, cassette: Cassette):
+		self.transport = transport
+		self.cassette = cassette
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		start = time.perf_counter()
+		response = await self.transport.handle_async_request(request)
+		try:
+			content = b''.join([chunk async for chunk in response.stream])
+		finally:
+			await response.aclose()
+		self.cassette.record(request, response, _decoded(response, content), time.perf_counter() - start)
+		return httpx.Response(
+			response.status_code,
+			headers=response.headers,
+			content=content,
+			extensions=response.extensions,
+			request=request,
+		)
+
+	async def aclose(self):
+		await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+	"""从 cassette 返回录制的响应，不访问网络"""
+
+	def __init__(self, cassette: Cassette):
+		self.cassette = cassette
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		interaction = self.cassette.match(request)
+		if interaction is None:
+			raise httpx.ConnectError(f'No recorded response for {request.method} {request.url}', request=request)
+		delay = interaction['latency'] * self.cassette.latency_scale
+		if delay > 0:
+			await asyncio.sleep(delay)
+		return httpx.Response(
+			interaction['status'],
+			headers=[tuple(header) for header in interaction['headers']],
+			content=_decode_body(interaction),
+			request=request,
+		)
+
+
+def _decoded(response: httpx.Response, content: bytes) -> bytes:
+	"""按 Content-Encoding 解压原始响应体，cassette 中只保存解压后的内容"""
+	decoded = httpx.Response(response.status_code, headers=response.headers, content=content)
+	return decoded.content
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+按 provider 的熔断器
+
+provider 连续出现 threshold 次 provider 级失败（网络错误、5xx、403/429、WAF 拦截）后熔断（open），
+此后该 provider 的账号直接失败，不再启动浏览器或发起请求；cooldown 秒后进入半开（half_open），
+只放行一个账号作为探测：成功则恢复（closed），失败则重新熔断。
+账号级失败（如 cookies 失效）说明 provider 仍可访问，视为成功。
+"""
+
+import os
+import time
+from collections.abc import Callable
+from typing import Literal
+
+CircuitState = Literal['closed', 'open', 'half_open']
+
+# 表示 provider 本身不可用的失败类型
+PROVIDER_FAILURE_KINDS = frozenset({'waf', 'transport', 'server'})
+
+
+class CircuitBreaker:
+	"""单个 provider 的熔断器
+
+	threshold 不大于 0 时不熔断。
+	"""
+
+	def __init__(
+		self, name: str, threshold: int = 5, cooldown: float = 60.0, clock: Callable[[], float] = time.monotonic
+	):
+		self.name = name
+		self.threshold = threshold
+		self.cooldown = max(0.0, cooldown)
+		self.clock = clock
+		self.state: CircuitState = 'closed'
+		self.failures = 0
+		self.reason: str | None = None
+		self._opened_at = 0.0
+		self._probing = False
+
+	def allow(self) -> bool:
+		"""是否放行一次请求（半开状态下只放行一个探测请求）"""
+		if self.state == 'closed':
+			return True
+		if self.state == 'open':
+			if self.clock() - self._opened_at < self.cooldown:
+				return False
+			self.state = 'half_open'
+			self._probing = False
+			print(f'[CIRCUIT] Provider "{self.name}": cooldown elapsed, probing with next account')
+		if self._probing:
+			return False
+		self._probing = True
+		return True
+
+	def is_open(self) -> bool:
+		"""当前是否会拒绝请求（不占用半开状态的探测名额）"""
+		if self.state == 'open':
+			return self.clock() - self._opened_at < self.cooldown
+		return self.state == 'half_open' and self._probing
+
+	def describe(self) -> str:
+		"""熔断原因，用于账号的失败信息"""
+		retry_in = max(0.0, self._opened_at + self.cooldown - self.clock())
+		return (
+			f'Provider "{self.name}" circuit open after {self.failures} consecutive failure(s) '
+			f'(last: {self.reason}), retry in {retry_in:.0f}s'
+		)
+
+	def record_success(self):
+		if self.state != 'closed':
+			print(f'[CIRCUIT] Provider "{self.name}": recovered, closing circuit')
+		self.state = 'closed'
+		self.failures = 0
+		self.reason = None
+		self._probing = False
+
+	def record_failure(self, reason: str):
+		self.failures += 1
+		self.reason = reason
+		if self.threshold <= 0:
+			return
+		if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.threshold):
+			self.state = 'open'
+			self._opened_at = self.clock()
+			self._probing = False
+			print(f'[CIRCUIT] Provider "{self.name}": opened after {self.failures} consecutive failure(s): {reason}')
+
+	def release_probe(self):
+		"""探测请求既未成功也未失败（如账号级格式错误）时归还探测名额"""
+		self._probing = False
+
+
+def breaker_from_env(name: str, threshold: int | None = None, cooldown: float | None = None) -> CircuitBreaker:
+	"""创建熔断器，未指定的参数使用 CIRCUIT_BREAKER_THRESHOLD（默认 5）/ CIRCUIT_BREAKER_COOLDOWN（默认 60 秒）"""
+	return CircuitBreaker(
+		name,
+		threshold=threshold if threshold is not None else int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '5')),
+		cooldown=cooldown if cooldown is not None else float(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '60')),
+	)
+
+
+def build_breakers(providers: dict) -> dict[str, CircuitBreaker]:
+	"""根据 provider 配置创建熔断器"""
+	return {
+		name: breaker_from_env(name, provider.circuit_threshold, provider.circuit_cooldown)
+		for name, provider in providers.items()
+	}
@@ -3,10 +3,35 @@
 配置管理模块
 """
 
+import glob
 import json
 import os
+import re
+from collections.abc import Iterator
 from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
 from typing import Dict, Literal
+from zoneinfo import ZoneInfo
+
+_UTC_OFFSET_PATTERN = re.compile(r'^(?:UTC|GMT)?([+-])(\d{1,2})(?::?(\d{2}))?$', re.IGNORECASE)
+
+
+def parse_timezone(value: str) -> tzinfo:
+	"""解析时区配置，支持固定偏移（如 "+08:00"、"UTC+8"）与 IANA 名称（如 "Asia/Shanghai"）"""
+	if value.upper() in ('UTC', 'GMT', 'Z'):
+		return timezone.utc
+
+	match = _UTC_OFFSET_PATTERN.match(value.strip())
+	if match:
+		sign, hours, minutes = match.groups()
+		offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+		return timezone(-offset if sign == '-' else offset)
+
+	try:
+		return ZoneInfo(value)
+	except Exception:
+		print(f'[WARNING] Unknown timezone "{value}", falling back to UTC+8')
+		return timezone(timedelta(hours=8))
 
 
 @dataclass
@@ -19,7 +44,13 @@ class ProviderConfig:
 	sign_in_path: str | None = '/api/user/sign_in'
 	user_info_path: str = '/api/user/self'
 	api_user_key: str = 'new-api-user'
-	bypass_method: Literal['waf_cookies'] | None = None
+	bypass_method: Literal['waf_cookies', 'waf_cookies_http'] | None = None
+	max_concurrency: int = 1
+	requests_per_second: float | None = None
+	reset_timezone: str = '+08:00'
+	reset_hour: int = 0
+	circuit_threshold: int | None = None
+	circuit_cooldown: float | None = None
 
 	@classmethod
 	def from_dict(cls, name: str, data: dict) -> 'ProviderConfig':
@@ -28,6 +59,9 @@ class ProviderConfig:
 		配置格式:
 		- 基础: {"domain": "https://example.com"}
 		- 完整: {"domain": "https://example.com", "login_path": "/login", "api_user_key": "x-api-user", "bypass_method": "waf_cookies", ...}
+		- 限流: {"domain": "https://example.com", "max_concurrency": 2, "requests_per_second": 0.5}
+		- 每日重置: {"domain": "https://example.com", "reset_timezone": "Asia/Shanghai", "reset_hour": 0}
+		- 熔断: {"domain": "https://example.com", "circuit_threshold": 5, "circuit_cooldown": 60}
 		"""
 		return cls(
 			name=name,
@@ -37,15 +71,34 @@ class ProviderConfig:
 			user_info_path=data.get('user_info_path', '/api/user/self'),
 			api_user_key=data.get('api_user_key', 'new-api-user'),
 			bypass_method=data.get('bypass_method'),
+			max_concurrency=int(data.get('max_concurrency', 1)),
+			requests_per_second=float(data['requests_per_second']) if data.get('requests_per_second') else None,
+			reset_timezone=data.get('reset_timezone', '+08:00'),
+			reset_hour=int(data.get('reset_hour', 0)),
+			circuit_threshold=int(data['circuit_threshold']) if 'circuit_threshold' in data else None,
+			circuit_cooldown=float(data['circuit_cooldown']) if 'circuit_cooldown' in data else None,
 		)
 
 	def needs_waf_cookies(self) -> bool:
 		"""判断是否需要获取 WAF cookies"""
-		return self.bypass_method == 'waf_cookies'
+		return self.bypass_method in ('waf_cookies', 'waf_cookies_http')
+
+	def uses_http_waf_solver(self) -> bool:
+		"""判断是否优先使用纯 HTTP 方式求解 WAF 挑战"""
+		return self.bypass_method == 'waf_cookies_http'
+
+	def last_reset_time(self, now: datetime | None = None) -> datetime:
+		"""获取最近一次签到重置时间"""
+		tz = parse_timezone(self.reset_timezone)
+		now = now.astimezone(tz) if now else datetime.now(tz)
+		reset = now.replace(hour=self.reset_hour, minute=0, second=0, microsecond=0)
+		if reset > now:
+			reset -= timedelta(days=1)
+		return reset
 
 	def needs_manual_check_in(self) -> bool:
 		"""判断是否需要手动调用签到接口"""
-		return self.bypass_method == 'waf_cookies'
+		return self.bypass_method in ('waf_cookies', 'waf_cookies_http')
 
 
 @dataclass
@@ -111,9 +164,9 @@ class AppConfig:
 		return self.providers.get(name)
 
 
-@dataclass
+@dataclass(slots=True)
 class AccountConfig:
-	"""账号配置"""
+	"""账号配置（使用 __slots__，大量账号时更省内存）"""
 
 	cookies: dict | str
 	api_user: str
@@ -132,6 +185,21 @@ class AccountConfig:
 		"""获取显示名称"""
 		return self.name if self.name else f'Account {index + 1}'
 
+	def get_account_key(self) -> str:
+		"""获取稳定的账号标识（provider + api_user），不受账号顺序与名称影响"""
+		return f'{self.provider}:{self.api_user}'
+
+
+def validate_account_dict(data) -> str | None:
+	"""检查单个账号配置，返回错误描述，合法时返回 None"""
+	if not isinstance(data, dict):
+		return 'configuration format is incorrect'
+	if 'cookies' not in data or 'api_user' not in data:
+		return 'missing required fields (cookies, api_user)'
+	if 'name' in data and not data['name']:
+		return 'name field cannot be empty'
+	return None
+
 
 def load_accounts_config() -> list[AccountConfig] | None:
 	"""从环境变量加载账号配置"""
@@ -149,16 +217,9 @@ def load_accounts_config() -> list[AccountConfig] | None:
 
 		accounts = []
 		for i, account_dict in enumerate(accounts_data):
-			if not isinstance(account_dict, dict):
-				print(f'ERROR: Account {i + 1} configuration format is incorrect')
-				return None
-
-			if 'cookies' not in account_dict or 'api_user' not in account_dict:
-				print(f'ERROR: Account {i + 1} missing required fields (cookies, api_user)')
-				return None
-
-			if 'name' in account_dict and not account_dict['name']:
-				print(f'ERROR: Account {i + 1} name field cannot be empty')
+			error = validate_account_dict(account_dict)
+			if error:
+				print(f'ERROR: Account {i + 1} {error}')
 				return None
 
 			accounts.append(AccountConfig.from_dict(account_dict, i))
@@ -167,3 +228,80 @@ def load_accounts_config() -> list[AccountConfig] | None:
 	except Exception as e:
 		print(f'ERROR: Account configuration format is incorrect: {e}')
 		return None
+
+
+def parse_account_files(value: str) -> list[str]:
+	"""解析 ACCOUNTS_FILE（逗号分隔，支持通配符）"""
+	files = []
+	for pattern in (part.strip() for part in value.split(',')):
+		if not pattern:
+			continue
+		matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+		if not matches:
+			print(f'[WARNING] No account file matches {pattern}')
+		files.extend(matches)
+	return files
+
+
+class AccountSource:
+	"""可重复迭代的账号来源
+
+	先返回 ANYROUTER_ACCOUNTS 中的账号，再逐行读取 JSONL 账号文件（每行一个账号对象，空行与 # 开头的行忽略）。
+	文件按需读取，不会一次性加载全部账号；某一行不合法时只打印警告并跳过该行，errors 记录最近一次迭代跳过的行数。
+	"""
+
+	def __init__(self, accounts: list[AccountConfig] | None = None, files: list[str] | None = None):
+		self.accounts = accounts or []
+		self.files = files or []
+		self.errors = 0
+
+	def __iter__(self) -> Iterator[AccountConfig]:
+		self.errors = 0
+		yield from self.accounts
+
+		index = len(self.accounts)
+		for path in self.files:
+			try:
+				f = open(path, encoding='utf-8')
+			except OSError as e:
+				print(f'[WARNING] Unable to open account file {path}: {e}')
+				self.errors += 1
+				continue
+
+			with f:
+				for line_number, line in enumerate(f, 1):
+					line = line.strip()
+					if not line or line.startswith('#'):
+						continue
+					try:
+						data = json.loads(line)
+					except json.JSONDecodeError as e:
+						error = f'invalid JSON ({e.msg})'
+					else:
+						error = validate_account_dict(data)
+					if error:
+						print(f'[WARNING] {path}:{line_number}: account {error}, skipping')
+						self.errors += 1
+						continue
+
+					yield AccountConfig.from_dict(data, index)
+					index += 1
+
+	def count(self) -> int:
+		"""遍历一次并返回合法账号数"""
+		return sum(1 for _ in self)
+
+
+def load_account_source() -> AccountSource | None:
+	"""从 ANYROUTER_ACCOUNTS 与 ACCOUNTS_FILE 创建账号来源，两者都未配置或 ANYROUTER_ACCOUNTS 不合法时返回 None"""
+	files = parse_account_files(os.getenv('ACCOUNTS_FILE', ''))
+	if not os.getenv('ANYROUTER_ACCOUNTS'):
+		if not files:
+			print('ERROR: Neither ANYROUTER_ACCOUNTS nor ACCOUNTS_FILE is set')
+			return None
+		return AccountSource(files=files)
+
+	accounts = load_accounts_config()
+	if accounts is None:
+		return None
+	return AccountSource(accounts, files)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+按 provider 复用的异步 HTTP 连接池
+"""
+
+import os
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import httpx
+
+from utils.cassette import Cassette, RecordingTransport, ReplayTransport
+
+MAX_REDIRECTS = 5
+
+
+def _shared_cookie_jar() -> CookieJar:
+	"""共享客户端使用的 cookie jar：拒绝保存任何 cookie，避免账号之间串 cookie"""
+	return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+class AccountSession:
+	"""单个账号的请求会话
+
+	底层复用 provider 共享的 AsyncClient（HTTP/2 多路复用），
+	cookies 保存在账号自己的 jar 中，每次请求时写入 Cookie 头并从响应中提取。
+	"""
+
+	def __init__(self, client: httpx.AsyncClient, cookies: dict | None = None):
+		self.client = client
+		self.cookies = httpx.Cookies(cookies or {})
+
+	async def request(
+		self, method: str, url: str, follow_redirects: bool = False, stream: bool = False, **kwargs
+	) -> httpx.Response:
+		"""发送请求（重定向由会话自行跟随，以便每一跳都带上账号 cookies）
+
+		stream=True 时不预先读取响应体，由调用方按需读取并负责关闭响应。
+		"""
+		request = self.client.build_request(method, url, **kwargs)
+
+		for _ in range(MAX_REDIRECTS + 1):
+			request.headers.pop('Cookie', None)
+			self.cookies.set_cookie_header(request)
+			response = await self.client.send(request, stream=stream)
+			self.cookies.extract_cookies(response)
+
+			if not follow_redirects or response.next_request is None:
+				return response
+
+			await response.aclose()
+			request = response.next_request
+
+		raise httpx.TooManyRedirects('Exceeded maximum allowed redirects', request=request)
+
+	async def get(self, url: str, **kwargs) -> httpx.Response:
+		return await self.request('GET', url, **kwargs)
+
+	async def post(self, url: str, **kwargs) -> httpx.Response:
+		return await self.request('POST', url, **kwargs)
+
+
+class ClientPool:
+	"""每个 provider 域名一个长连接 AsyncClient"""
+
+	def __init__(
+		self,
+		max_connections: int | None = None,
+		max_keepalive_connections: int | None = None,
+		keepalive_expiry: float | None = None,
+		timeout: float = 30.0,
+		cassette: Cassette | None = None,
+	):
+		self.limits = httpx.Limits(
+			max_connections=max_connections or int(os.getenv('HTTP_MAX_CONNECTIONS', '20')),
+			max_keepalive_connections=max_keepalive_connections or int(os.getenv('HTTP_MAX_KEEPALIVE', '10')),
+			keepalive_expiry=keepalive_expiry or float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30')),
+		)
+		self.timeout = timeout
+		# HTTP_RECORD / HTTP_REPLAY 设置时录制或回放经过连接池的所有请求
+		self.cassette = cassette if cassette is not None else Cassette.from_env()
+		self._clients: dict[str, httpx.AsyncClient] = {}
+
+	def _transport(self) -> httpx.AsyncBaseTransport | None:
+		if self.cassette is None:
+			return None
+		if self.cassette.mode == 'replay':
+			return ReplayTransport(self.cassette)
+		return RecordingTransport(httpx.AsyncHTTPTransport(http2=True, limits=self.limits), self.cassette)
+
+	def get(self, domain: str) -> httpx.AsyncClient:
+		"""获取（或创建）指定域名的共享客户端"""
+		client = self._clients.get(domain)
+		if client is None or client.is_closed:
+			client = httpx.AsyncClient(
+				http2=True,
+				timeout=self.timeout,
+				limits=self.limits,
+				cookies=_shared_cookie_jar(),
+				transport=self._transport(),
+			)
+			self._clients[domain] = client
+		return client
+
+	def session(self, domain: str, cookies: dict | None = None) -> AccountSession:
+		"""为账号创建绑定独立 cookie jar 的会话"""
+		return AccountSession(self.get(domain), cookies)
+
+	async def close(self):
+		"""关闭所有客户端"""
+		for client in self._clients.values():
+			try:
+				await client.aclose()
+			except Exception:
+				pass
+		self._clients.clear()
+
+		if self.cassette is not None and self.cassette.mode == 'record':
+			try:
+				self.cassette.save()
+			except Exception as e:
+				print(f'[WARNING] Failed to save HTTP cassette: {e}')
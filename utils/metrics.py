@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Prometheus 指标导出（不依赖 prometheus_client）
+
+- METRICS_TEXTFILE: 写入 node-exporter textfile collector 目录中的 .prom 文件
+- METRICS_PUSHGATEWAY: 推送到 Pushgateway（如 http://localhost:9091）
+- METRICS_JOB / METRICS_GROUP: 推送时使用的 job 名与分组标签，多个账号组分别推送互不覆盖
+
+指标只在内存中做字典累加，运行结束时统一导出，不影响签到流程本身。
+"""
+
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+	return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = '') -> str:
+	pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+	if extra:
+		pairs.append(extra)
+	return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+	if value == float('inf'):
+		return '+Inf'
+	return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+	type = ''
+
+	def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = tuple(labelnames)
+		self._values: dict[tuple, object] = {}
+
+	def _key(self, labels: dict) -> tuple:
+		return tuple(labels.get(name, '') for name in self.labelnames)
+
+	def clear(self):
+		self._values.clear()
+
+	def samples(self) -> list[str]:
+		raise NotImplementedError
+
+	def render(self) -> str:
+		lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+		lines.extend(self.samples())
+		return '\n'.join(lines)
+
+
+class Counter(_Metric):
+	"""只增不减的计数器"""
+
+	type = 'counter'
+
+	def inc(self, amount: float = 1, **labels):
+		key = self._key(labels)
+		self._values[key] = self._values.get(key, 0) + amount
+
+	def get(self, **labels) -> float:
+		return self._values.get(self._key(labels), 0)
+
+	def samples(self) -> list[str]:
+		return [
+			f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+			for key, value in sorted(self._values.items())
+		]
+
+
+class Gauge(_Metric):
+	"""可任意设置的数值"""
+
+	type = 'gauge'
+
+	def set(self, value: float, **labels):
+		self._values[self._key(labels)] = value
+
+	def get(self, **labels) -> float | None:
+		return self._values.get(self._key(labels))
+
+	def samples(self) -> list[str]:
+		return [
+			f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+			for key, value in sorted(self._values.items())
+		]
+
+
+class Histogram(_Metric):
+	"""按固定分桶统计耗时分布"""
+
+	type = 'histogram'
+
+	def __init__(
+		self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple = DEFAULT_BUCKETS
+	):
+		super().__init__(name, documentation, labelnames)
+		self.buckets = tuple(sorted(buckets))
+
+	def observe(self, value: float, **labels):
+		key = self._key(labels)
+		data = self._values.get(key)
+		if data is None:
+			# [各分桶计数..., 总数, 总和]
+			data = self._values[key] = [0] * len(self.buckets) + [0, 0.0]
+		index = bisect_left(self.buckets, value)
+		if index < len(self.buckets):
+			data[index] += 1
+		data[-2] += 1
+		data[-1] += value
+
+	@contextmanager
+	def time(self, **labels):
+		"""统计 with 块的耗时"""
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.observe(time.perf_counter() - start, **labels)
+
+	def get_count(self, **labels) -> int:
+		data = self._values.get(self._key(labels))
+		return data[-2] if data else 0
+
+	def samples(self) -> list[str]:
+		lines = []
+		for key, data in sorted(self._values.items()):
+			cumulative = 0
+			for bound, count in zip(self.buckets, data):
+				cumulative += count
+				le = 'le="%s"' % _format_value(bound)
+				lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+			le = 'le="+Inf"'
+			lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {data[-2]}')
+			lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {data[-2]}')
+			lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(data[-1])}')
+		return lines
+
+
+class Registry:
+	"""指标注册表"""
+
+	def __init__(self):
+		self._metrics: dict[str, _Metric] = {}
+
+	def register(self, metric: _Metric) -> _Metric:
+		self._metrics[metric.name] = metric
+		return metric
+
+	def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+		return self.register(Counter(name, documentation, labelnames))
+
+	def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+		return self.register(Gauge(name, documentation, labelnames))
+
+	def histogram(
+		self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple = DEFAULT_BUCKETS
+	) -> Histogram:
+		return self.register(Histogram(name, documentation, labelnames, buckets))
+
+	def render(self) -> str:
+		"""生成 Prometheus 文本格式"""
+		return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+	def clear(self):
+		for metric in self._metrics.values():
+			metric.clear()
+
+
+REGISTRY = Registry()
+
+CHECKIN_SUCCESS = REGISTRY.counter('checkin_success_total', 'Accounts checked in successfully', ('provider',))
+CHECKIN_FAILURE = REGISTRY.counter('checkin_failure_total', 'Accounts that failed to check in', ('provider', 'kind'))
+WAF_DETECTIONS = REGISTRY.counter('checkin_waf_detections_total', 'WAF verification pages detected', ('provider',))
+RETRIES = REGISTRY.counter('checkin_retries_total', 'Accounts deferred to the retry queue', ('provider', 'kind'))
+CIRCUIT_REJECTIONS = REGISTRY.counter(
+	'checkin_circuit_rejections_total', 'Accounts failed fast while the provider circuit was open', ('provider',)
+)
+USER_INFO_SECONDS = REGISTRY.histogram('checkin_user_info_seconds', 'User info request latency', ('provider',))
+SIGN_IN_SECONDS = REGISTRY.histogram('checkin_sign_in_seconds', 'Sign-in request latency', ('provider',))
+WAF_COOKIE_SECONDS = REGISTRY.histogram(
+	'checkin_waf_cookie_seconds', 'WAF cookie acquisition latency', ('provider', 'method')
+)
+ACCOUNT_QUOTA = REGISTRY.gauge('checkin_account_quota_dollars', 'Account balance', ('provider', 'api_user'))
+ACCOUNT_USED_QUOTA = REGISTRY.gauge(
+	'checkin_account_used_quota_dollars', 'Account used quota', ('provider', 'api_user')
+)
+RUN_DURATION = REGISTRY.gauge('checkin_run_duration_seconds', 'Duration of the last run')
+LAST_RUN = REGISTRY.gauge('checkin_last_run_timestamp_seconds', 'Unix time the last run finished')
+
+
+def write_textfile(path: str, registry: Registry = REGISTRY):
+	"""原子写入 textfile（node-exporter 只会读到完整文件）"""
+	directory = os.path.dirname(os.path.abspath(path))
+	fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics_', suffix='.tmp')
+	try:
+		with os.fdopen(fd, 'w', encoding='utf-8') as f:
+			f.write(registry.render())
+		os.replace(tmp_path, path)
+	except Exception:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		raise
+
+
+async def push_to_gateway(
+	url: str, job: str, group: str | None = None, registry: Registry = REGISTRY, timeout: float = 10
+):
+	"""推送到 Pushgateway（PUT 替换该 job/group 下的全部指标），异步请求不阻塞事件循环"""
+	import httpx
+
+	target = f'{url.rstrip("/")}/metrics/job/{job}'
+	if group:
+		target += f'/group/{group}'
+	async with httpx.AsyncClient(timeout=timeout) as client:
+		response = await client.put(
+			target,
+			content=registry.render().encode('utf-8'),
+			headers={'Content-Type': 'text/plain; version=0.0.4'},
+		)
+	response.raise_for_status()
+
+
+async def export_metrics(registry: Registry = REGISTRY):
+	"""按环境变量配置导出指标，失败只打印警告"""
+	textfile = os.getenv('METRICS_TEXTFILE')
+	if textfile:
+		try:
+			write_textfile(textfile, registry)
+			print(f'[METRICS] Wrote metrics to {textfile}')
+		except Exception as e:
+			print(f'[WARNING] Failed to write metrics textfile: {e}')
+
+	gateway = os.getenv('METRICS_PUSHGATEWAY')
+	if gateway:
+		try:
+			await push_to_gateway(
+				gateway, os.getenv('METRICS_JOB', 'anyrouter_checkin'), os.getenv('METRICS_GROUP'), registry
+			)
+			print(f'[METRICS] Pushed metrics to {gateway}')
+		except Exception as e:
+			print(f'[WARNING] Failed to push metrics: {e}')
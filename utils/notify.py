@@ -1,409 +1,51 @@
+import asyncio
+import json
 import os
-import smtplib
-from email.mime.text import MIMEText
-from typing import Literal, Any
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Literal
 
 import httpx
 
+from utils.templates import get_renderer
 
-# ==================== HTML 模板  ====================
-DEFAULT_HTML_TEMPLATE = """<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AgentRouter 签到结果</title>
-    <style>
-        * {
-            box-sizing: border-box;
-        }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'PingFang SC', 'Microsoft YaHei', sans-serif;
-            margin: 0;
-            padding: 20px;
-            background-color: #e2e8f0;
-            -webkit-font-smoothing: antialiased;
-            -moz-osx-font-smoothing: grayscale;
-        }
-        @media screen and (max-width: 768px) {
-            body {
-                padding: 0;
-            }
-        }
-        .container {
-            max-width: 800px;
-            margin: 0 auto;
-            background-color: #ffffff;
-            border-radius: 16px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.07), 0 2px 4px rgba(0, 0, 0, 0.05);
-            overflow: hidden;
-        }
-        @media screen and (max-width: 768px) {
-            .container {
-                border-radius: 0;
-                box-shadow: none;
-            }
-        }
-        .header {
-            background: #fafbfc;
-            color: #1e293b;
-            padding: 40px 20px 30px;
-            text-align: center;
-            position: relative;
-            overflow: hidden;
-            border-bottom: 1px solid #f1f5f9;
-        }
-        @media screen and (max-width: 768px) {
-            .header {
-                padding: 30px 15px 20px;
-            }
-        }
-        .header h1 {
-            margin: 0;
-            font-size: 28px;
-            font-weight: 700;
-            position: relative;
-            z-index: 1;
-            text-shadow: none;
-            letter-spacing: -0.02em;
-            color: #0f172a;
-        }
-        @media screen and (max-width: 768px) {
-            .header h1 {
-                font-size: 22px;
-            }
-        }
-        .summary {
-            background-color: #ffffff;
-            padding: 25px 20px;
-            border-bottom: none;
-        }
-        .summary h2 {
-            margin: 0 0 20px 0;
-            font-size: 18px;
-            color: #0f172a;
-            font-weight: 700;
-            letter-spacing: -0.02em;
-        }
-        .stats {
-            display: grid;
-            grid-template-columns: repeat(4, 1fr);
-            gap: 10px;
-        }
-        @media screen and (max-width: 768px) {
-            .summary {
-                padding: 20px 16px;
-            }
-            .summary h2 {
-                font-size: 17px;
-                margin-bottom: 16px;
-            }
-            .stats {
-                gap: 8px;
-            }
-        }
-        .stat-item {
-            padding: 18px 12px;
-            background: #fafbfc;
-            border-radius: 12px;
-            border: 1px solid #f1f5f9;
-            text-align: center;
-            box-shadow: none;
-            transition: transform 0.15s ease, box-shadow 0.15s ease;
-        }
-        .stat-item:active {
-            transform: translateY(1px);
-            background: #f1f5f9;
-        }
-        @media screen and (max-width: 768px) {
-            .stat-item {
-                padding: 14px 8px;
-                border-radius: 10px;
-            }
-        }
-        .stat-label {
-            font-size: 13px;
-            color: #64748b;
-            margin-bottom: 8px;
-            font-weight: 500;
-            white-space: nowrap;
-            overflow: hidden;
-            text-overflow: ellipsis;
-            letter-spacing: -0.01em;
-        }
-        .stat-value {
-            font-size: 28px;
-            font-weight: 700;
-            color: #0f172a;
-            line-height: 1;
-            letter-spacing: -0.03em;
-        }
-        @media screen and (max-width: 768px) {
-            .stat-label {
-                font-size: 11px;
-                margin-bottom: 5px;
-            }
-            .stat-value {
-                font-size: 22px;
-            }
-        }
-        .accounts {
-            padding: 25px 20px 30px;
-            background-color: #ffffff;
-        }
-        .accounts h2 {
-            margin: 0 0 20px 0;
-            font-size: 18px;
-            font-weight: 700;
-            color: #0f172a;
-            letter-spacing: -0.02em;
-        }
-        @media screen and (max-width: 768px) {
-            .accounts {
-                padding: 20px 16px 25px;
-            }
-            .accounts h2 {
-                font-size: 17px;
-                margin-bottom: 16px;
-            }
-        }
-        .account {
-            padding: 18px 20px;
-            margin-bottom: 12px;
-            border-radius: 12px;
-            background-color: #fafbfc;
-            border: 1px solid #f1f5f9;
-            box-shadow: none;
-            transition: transform 0.15s ease, background-color 0.15s ease;
-        }
-        .account:active {
-            transform: translateY(1px);
-            background-color: #f1f5f9;
-        }
-        @media screen and (max-width: 768px) {
-            .account {
-                padding: 16px 16px;
-                margin-bottom: 10px;
-                border-radius: 14px;
-            }
-        }
-        .account.success {
-            background: #fafbfc;
-            border-left: 4px solid #10b981;
-        }
-        .account.failed {
-            background: #fafbfc;
-            border-left: 4px solid #ef4444;
-        }
-        .account-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 10px;
-        }
-        .account-name {
-            font-size: 15px;
-            font-weight: 600;
-            color: #333;
-        }
-        .account-status {
-            font-size: 12px;
-            padding: 4px 10px;
-            border-radius: 20px;
-            font-weight: 600;
-            white-space: nowrap;
-        }
-        @media screen and (max-width: 768px) {
-            .account-name {
-                font-size: 14px;
-                max-width: 60%;
-                overflow: hidden;
-                text-overflow: ellipsis;
-                white-space: nowrap;
-            }
-            .account-status {
-                font-size: 11px;
-                padding: 3px 8px;
-            }
-        }
-        .status-success {
-            background-color: #28a745;
-            color: white;
-        }
-        .status-failed {
-            background-color: #dc3545;
-            color: white;
-        }
-        .account-detail {
-            font-size: 13px;
-            color: #666;
-            line-height: 1.8;
-            word-break: break-word;
-        }
-        .account-detail strong {
-            color: #333;
-            font-weight: 600;
-        }
-        @media screen and (max-width: 768px) {
-            .account-detail {
-                font-size: 12px;
-                line-height: 1.6;
-            }
-        }
-        .error-message {
-            color: #dc3545;
-            font-size: 13px;
-            margin-top: 8px;
-            padding: 10px 12px;
-            background-color: rgba(220, 53, 69, 0.08);
-            border-radius: 8px;
-            border-left: 3px solid #dc3545;
-            word-break: break-word;
-        }
-        @media screen and (max-width: 768px) {
-            .error-message {
-                font-size: 12px;
-                padding: 8px 10px;
-            }
-        }
-        .warning {
-            background-color: #fff3cd;
-            border: 2px solid #ffc107;
-            border-radius: 10px;
-            padding: 15px;
-            margin: 15px 15px;
-        }
-        @media screen and (max-width: 768px) {
-            .warning {
-                margin: 12px 12px;
-                padding: 12px;
-            }
-        }
-        .warning h3 {
-            margin: 0 0 8px 0;
-            color: #856404;
-            font-size: 14px;
-            font-weight: 600;
-        }
-        .warning p {
-            margin: 5px 0;
-            color: #856404;
-            font-size: 13px;
-            line-height: 1.5;
-        }
-        .warning ul {
-            margin: 8px 0;
-            padding-left: 18px;
-        }
-        .warning li {
-            color: #856404;
-            margin: 4px 0;
-            font-size: 13px;
-        }
-        @media screen and (max-width: 768px) {
-            .warning h3 {
-                font-size: 13px;
-            }
-            .warning p, .warning li {
-                font-size: 12px;
-            }
-        }
-        .footer {
-            background-color: #fafbfc;
-            padding: 20px 20px;
-            text-align: center;
-            border-top: 1px solid #f1f5f9;
-        }
-        .footer p {
-            margin: 4px 0;
-            font-size: 12px;
-            color: #666;
-        }
-        @media screen and (max-width: 768px) {
-            .footer {
-                padding: 12px 15px;
-            }
-            .footer p {
-                font-size: 11px;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🔔 AgentRouter 签到结果</h1>
-        </div>
-
-        <div class="summary">
-            <h2>📊 统计摘要</h2>
-            <div class="stats">
-                <div class="stat-item">
-                    <div class="stat-label">总账号数</div>
-                    <div class="stat-value">{{ summary.total }}</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">成功</div>
-                    <div class="stat-value" style="color: #10b981;">{{ summary.success_count }}</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">失败</div>
-                    <div class="stat-value" style="color: #ef4444;">{{ summary.failed_count }}</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">成功率</div>
-                    <div class="stat-value" style="color: #06b6d4;">{{ "%.0f"|format(summary.success_rate) }}%</div>
-                </div>
-            </div>
-        </div>
-
-        <div class="accounts">
-            <h2>📋 账号详情</h2>
-            {% for account in accounts %}
-            <div class="account {% if account.success %}success{% else %}failed{% endif %}">
-                <div class="account-header">
-                    <div class="account-name">{{ account.name }}</div>
-                    <div class="account-status {% if account.success %}status-success{% else %}status-failed{% endif %}">
-                        {% if account.success %}✅ 成功{% else %}[FAIL] 失败{% endif %}
-                    </div>
-                </div>
-                {% if account.success %}
-                <div class="account-detail">
-                    <strong>💰 余额:</strong> ${{ "%.2f"|format(account.quota) }} |
-                    <strong>已用:</strong> ${{ "%.2f"|format(account.used_quota) }}
-                </div>
-                {% else %}
-                <div class="error-message">
-                    [WARNING] {{ account.error }}
-                </div>
-                {% endif %}
-            </div>
-            {% endfor %}
-        </div>
-
-        {% if cookie_expired_accounts %}
-        <div class="warning">
-            <h3>[WARNING] Cookie 过期警告</h3>
-            <p>以下账号的 Cookie 已过期，请尽快更新以确保后续签到正常：</p>
-            <ul>
-            {% for account in cookie_expired_accounts %}
-                <li><strong>{{ account }}</strong></li>
-            {% endfor %}
-            </ul>
-            <p style="margin-top: 15px; font-size: 13px;">
-                [INFO] 提示：请参考 README.md 中的「获取 Cookies」章节重新获取 Cookie 并更新 GitHub Secrets。
-            </p>
-        </div>
-        {% endif %}
-
-        <div class="footer">
-            <p>⏰ 执行时间：{{ timestamp }}</p>
-            <p style="color: #999;">🤖 由 AnyRouter Check-in 自动生成</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
+if TYPE_CHECKING:
+	import smtplib
+
+SMTP_PORTS = {'ssl': 465, 'starttls': 587}
+SMTP_TIMEOUT = 10
+
+NOTIFY_CHANNELS = ('Email', 'PushPlus', 'Server Push', 'DingTalk', 'Feishu', 'WeChat Work', 'Telegram')
+
+# 各渠道的消息模板（不存在时直接发送纯文本内容），可在 NOTIFY_TEMPLATE_DIR 中提供同名文件覆盖或补充
+CHANNEL_TEMPLATES = {
+	'PushPlus': 'pushplus.html',
+	'Server Push': 'serverpush.md',
+	'DingTalk': 'dingtalk.txt',
+	'Feishu': 'feishu.md',
+	'WeChat Work': 'wecom.txt',
+	'Telegram': 'telegram.html',
+}
+
+
+@dataclass
+class NotifyResult:
+	"""单个通知渠道的发送结果"""
+
+	channel: str
+	status: Literal['success', 'failed', 'skipped']
+	latency: float = 0.0
+	status_code: int | None = None
+	error: str | None = None
+
+	def describe(self) -> str:
+		parts = [f'{self.latency:.2f}s']
+		if self.status_code is not None:
+			parts.append(f'HTTP {self.status_code}')
+		return ', '.join(parts)
 
 
 class NotificationKit:
@@ -420,7 +62,7 @@ class NotificationKit:
 		self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
 		self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
 
-	def send_html_email(self, title: str, data: dict[str, Any]):
+	def send_html_email(self, title: str, data: dict[str, Any], preferred_transport: str | None = None) -> str | None:
 		"""发送 HTML 邮件（使用 jinja2 模板渲染）
 
 		Args:
@@ -430,76 +72,132 @@ class NotificationKit:
 				- summary: 统计摘要 {'total': int, 'success_count': int, 'failed_count': int, 'success_rate': float}
 				- timestamp: 执行时间 str
 				- cookie_expired_accounts: Cookie 过期账号列表 (可选)
+			preferred_transport: 上次发送成功的连接方式（'ssl' 或 'starttls'），优先直接使用
+
+		Returns:
+			本次发送成功使用的连接方式，失败或未配置时返回 None
 		"""
 		if not self.email_user or not self.email_pass or not self.email_to:
 			print('[INFO] 邮件通知未配置，跳过')
-			return
+			return None
 
 		try:
 			print('[INFO] 正在渲染邮件模板...')
-			# 使用 jinja2 渲染 HTML 模板
-			from jinja2 import Template
-			template = Template(DEFAULT_HTML_TEMPLATE)
-			html_content = template.render(**data)
+			html_content = get_renderer().render('email.html', **data)
 			print('[INFO] [OK] 邮件模板渲染完成')
 
 			# 创建邮件
-			print('[INFO] 正在创建邮件...')
+			recipients = parse_recipients(self.email_to)
+			from email.mime.text import MIMEText
+
 			msg = MIMEText(html_content, 'html', 'utf-8')
 			msg['From'] = f'AnyRouter Assistant <{self.email_user}>'
-			msg['To'] = self.email_to
+			msg['To'] = ', '.join(recipients)
 			msg['Subject'] = title
-			print('[INFO] [OK] 邮件创建完成')
 
-			# 发送邮件
-			smtp_server = self.smtp_server if self.smtp_server else f'smtp.{self.email_user.split("@")[1]}'
+			# 发送邮件（所有收件人共用一次登录的会话）
+			smtp_server = self._get_smtp_server()
 			print(f'[INFO] 正在连接 SMTP 服务器: {smtp_server}...')
+			transport, server = self._connect_smtp(smtp_server, preferred_transport)
+			try:
+				print(f'[INFO] 正在发送邮件给 {len(recipients)} 个收件人...')
+				server.send_message(msg, to_addrs=recipients)
+			except Exception as e:
+				if not _is_qq_quirk(e):
+					raise
+			finally:
+				_close_smtp(server)
+			print(f'[INFO] [OK] 邮件通知发送成功 ({transport}:{SMTP_PORTS[transport]})')
+			return transport
+
+		except Exception as e:
+			print(f'[ERROR] 邮件发送失败: {e}')
+			return None
+
+	async def send_html_email_async(self, title: str, data: dict[str, Any], state_store=None) -> str | None:
+		"""在线程中发送 HTML 邮件，不阻塞事件循环
+
+		state_store 用于记住上次发送成功的连接方式（按 SMTP 服务器区分），下次直接使用而不再竞速。
+		"""
+		if not self.email_user or not self.email_pass or not self.email_to:
+			print('[INFO] 邮件通知未配置，跳过')
+			return None
+
+		meta_key = f'smtp_transport:{self._get_smtp_server()}'
+		preferred = state_store.get_meta(meta_key) if state_store else None
+		transport = await asyncio.to_thread(self.send_html_email, title, data, preferred)
+		if transport and state_store and transport != preferred:
+			state_store.set_meta(meta_key, transport)
+		return transport
+
+	def _get_smtp_server(self) -> str:
+		return self.smtp_server if self.smtp_server else f'smtp.{self.email_user.split("@")[1]}'
+
+	def _open_smtp(self, smtp_server: str, transport: str) -> 'smtplib.SMTP':
+		"""按指定方式建立 SMTP 连接并登录"""
+		import smtplib
+
+		if transport == 'ssl':
+			server = smtplib.SMTP_SSL(smtp_server, SMTP_PORTS['ssl'], timeout=SMTP_TIMEOUT)
+		else:
+			server = smtplib.SMTP(smtp_server, SMTP_PORTS['starttls'], timeout=SMTP_TIMEOUT)
+		try:
+			if transport == 'starttls':
+				server.starttls()
+			server.login(self.email_user, self.email_pass)
+		except Exception:
+			_close_smtp(server)
+			raise
+		return server
+
+	def _connect_smtp(self, smtp_server: str, preferred: str | None = None) -> tuple[str, 'smtplib.SMTP']:
+		"""建立已登录的 SMTP 连接
 
+		优先使用上次成功的连接方式；没有记录或失败时同时尝试 SSL (465) 与 STARTTLS (587)，取先成功的一个，
+		端口被过滤的主机不再需要先等待 465 超时。
+		"""
+		if preferred in SMTP_PORTS:
 			try:
-				print(f'[INFO] 尝试使用 SMTP_SSL (端口 465)...')
-				with smtplib.SMTP_SSL(smtp_server, 465, timeout=10) as server:
-					print(f'[INFO] 正在登录...')
-					server.login(self.email_user, self.email_pass)
-					print(f'[INFO] 正在发送邮件...')
-					server.send_message(msg)
-				print(f'[INFO] [OK] 邮件通知发送成功 (SMTP_SSL:465)')
-				return
+				return preferred, self._open_smtp(smtp_server, preferred)
 			except Exception as e:
-				error_str = str(e)
-				# QQ邮箱在 SMTP_SSL 可能返回 (-1, b'\x00\x00\x00')，但邮件已发送成功
-				if '(-1,' in error_str or "b'\\x00\\x00\\x00'" in error_str:
-					print(f'[INFO] [OK] 邮件通知发送成功 (SMTP_SSL:465, QQ 邮箱兼容模式)')
-					return
-				# 其他错误，尝试 STARTTLS
-				print(f'[WARNING] SMTP_SSL (465) 失败: {e}，尝试 STARTTLS')
+				print(f'[WARNING] Remembered SMTP transport {preferred} failed: {e}, racing all transports')
 
-			# 尝试 STARTTLS
+		results: queue.Queue = queue.Queue()
+		lock = threading.Lock()
+		winner: list[str] = []
+
+		def attempt(transport: str):
 			try:
-				print(f'[INFO] 尝试使用 SMTP + STARTTLS (端口 587)...')
-				with smtplib.SMTP(smtp_server, 587, timeout=10) as server:
-					print(f'[INFO] 正在启动 TLS...')
-					server.starttls()
-					print(f'[INFO] 正在登录...')
-					server.login(self.email_user, self.email_pass)
-					print(f'[INFO] 正在发送邮件...')
-					server.send_message(msg)
-				print(f'[INFO] [OK] 邮件通知发送成功 (STARTTLS:587)')
+				server = self._open_smtp(smtp_server, transport)
 			except Exception as e:
-				error_str = str(e)
-				# QQ邮箱等某些邮件服务器在发送成功后会返回 (-1, b'\x00\x00\x00')
-				if '(-1,' in error_str or "b'\\x00\\x00\\x00'" in error_str:
-					print(f'[INFO] [OK] 邮件通知发送成功 (STARTTLS:587, QQ 邮箱兼容模式)')
+				results.put((transport, None, e))
+				return
+			with lock:
+				if not winner:
+					winner.append(transport)
+					results.put((transport, server, None))
 					return
-				# 真实错误，抛出
-				raise
+			# 已有其他连接方式胜出，关闭多余连接
+			_close_smtp(server)
 
-		except Exception as e:
-			print(f'[ERROR] 邮件发送失败: {e}')
+		for transport in SMTP_PORTS:
+			threading.Thread(target=attempt, args=(transport,), daemon=True).start()
+
+		errors = []
+		for _ in SMTP_PORTS:
+			transport, server, error = results.get()
+			if server is not None:
+				return transport, server
+			errors.append(f'{transport}:{SMTP_PORTS[transport]} {error}')
+		raise ConnectionError(f'All SMTP transports failed: {"; ".join(errors)}')
 
 	def send_email(self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text'):
 		if not self.email_user or not self.email_pass or not self.email_to:
 			raise ValueError('Email configuration not set')
 
+		import smtplib
+		from email.mime.text import MIMEText
+
 		# MIMEText 需要 'plain' 或 'html'，而不是 'text'
 		mime_subtype = 'plain' if msg_type == 'text' else 'html'
 		msg = MIMEText(content, mime_subtype, 'utf-8')
@@ -512,31 +210,28 @@ class NotificationKit:
 			server.login(self.email_user, self.email_pass)
 			server.send_message(msg)
 
-	def send_pushplus(self, title: str, content: str):
+	def _pushplus_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.pushplus_token:
 			raise ValueError('PushPlus Token not configured')
 
 		data = {'token': self.pushplus_token, 'title': title, 'content': content, 'template': 'html'}
-		with httpx.Client(timeout=30.0) as client:
-			client.post('http://www.pushplus.plus/send', json=data)
+		return 'http://www.pushplus.plus/send', data
 
-	def send_serverPush(self, title: str, content: str):
+	def _server_push_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.server_push_key:
 			raise ValueError('Server Push key not configured')
 
 		data = {'title': title, 'desp': content}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(f'https://sctapi.ftqq.com/{self.server_push_key}.send', json=data)
+		return f'https://sctapi.ftqq.com/{self.server_push_key}.send', data
 
-	def send_dingtalk(self, title: str, content: str):
+	def _dingtalk_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.dingding_webhook:
 			raise ValueError('DingTalk Webhook not configured')
 
 		data = {'msgtype': 'text', 'text': {'content': f'{title}\n{content}'}}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.dingding_webhook, json=data)
+		return self.dingding_webhook, data
 
-	def send_feishu(self, title: str, content: str):
+	def _feishu_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.feishu_webhook:
 			raise ValueError('Feishu Webhook not configured')
 
@@ -547,27 +242,45 @@ class NotificationKit:
 				'header': {'template': 'blue', 'title': {'content': title, 'tag': 'plain_text'}},
 			},
 		}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.feishu_webhook, json=data)
+		return self.feishu_webhook, data
 
-	def send_wecom(self, title: str, content: str):
+	def _wecom_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.weixin_webhook:
 			raise ValueError('WeChat Work Webhook not configured')
 
 		data = {'msgtype': 'text', 'text': {'content': f'{title}\n{content}'}}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.weixin_webhook, json=data)
+		return self.weixin_webhook, data
 
-	def send_telegram(self, title: str, content: str):
+	def _telegram_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.telegram_bot_token or not self.telegram_chat_id:
 			raise ValueError('Telegram Bot Token or Chat ID not configured')
 
 		message = f'<b>{title}</b>\n\n{content}'
 		data = {'chat_id': self.telegram_chat_id, 'text': message, 'parse_mode': 'HTML'}
-		url = f'https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage'
+		return f'https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage', data
+
+	def _post(self, url: str, data: dict):
 		with httpx.Client(timeout=30.0) as client:
 			client.post(url, json=data)
 
+	def send_pushplus(self, title: str, content: str):
+		self._post(*self._pushplus_request(title, content))
+
+	def send_serverPush(self, title: str, content: str):
+		self._post(*self._server_push_request(title, content))
+
+	def send_dingtalk(self, title: str, content: str):
+		self._post(*self._dingtalk_request(title, content))
+
+	def send_feishu(self, title: str, content: str):
+		self._post(*self._feishu_request(title, content))
+
+	def send_wecom(self, title: str, content: str):
+		self._post(*self._wecom_request(title, content))
+
+	def send_telegram(self, title: str, content: str):
+		self._post(*self._telegram_request(title, content))
+
 	def push_message(self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text', skip_email: bool = False):
 		"""发送通知到所有配置的渠道
 
@@ -597,6 +310,158 @@ class NotificationKit:
 			except Exception as e:
 				print(f'[{name}]: Message push failed! Reason: {str(e)}')
 
+	def _webhook_requests(self) -> list[tuple[str, Callable[[str, str], tuple[str, dict]]]]:
+		return [
+			('PushPlus', self._pushplus_request),
+			('Server Push', self._server_push_request),
+			('DingTalk', self._dingtalk_request),
+			('Feishu', self._feishu_request),
+			('WeChat Work', self._wecom_request),
+			('Telegram', self._telegram_request),
+		]
+
+	def _is_configured(self, name: str) -> bool:
+		configured = {
+			'Email': self.email_user and self.email_pass and self.email_to,
+			'PushPlus': self.pushplus_token,
+			'Server Push': self.server_push_key,
+			'DingTalk': self.dingding_webhook,
+			'Feishu': self.feishu_webhook,
+			'WeChat Work': self.weixin_webhook,
+			'Telegram': self.telegram_bot_token and self.telegram_chat_id,
+		}
+		return bool(configured.get(name))
+
+	def _render_channel(self, name: str, content: str, data: dict[str, Any] | None) -> str:
+		"""使用渠道模板渲染消息内容，没有模板或渲染失败时返回原始内容"""
+		template_name = CHANNEL_TEMPLATES.get(name)
+		renderer = get_renderer()
+		if data is None or not template_name or not renderer.has_template(template_name):
+			return content
+		try:
+			return renderer.render(template_name, content=content, **data)
+		except Exception as e:
+			print(f'[WARNING] Failed to render {template_name} for {name}: {e}, sending plain content')
+			return content
+
+	async def _send_webhook(
+		self, client: httpx.AsyncClient, name: str, url: str, data: dict, timeout: float
+	) -> NotifyResult:
+		start = time.perf_counter()
+		try:
+			response = await asyncio.wait_for(client.post(url, json=data, timeout=timeout), timeout)
+			latency = time.perf_counter() - start
+			if response.status_code >= 400:
+				return NotifyResult(name, 'failed', latency, response.status_code, f'HTTP {response.status_code}')
+			return NotifyResult(name, 'success', latency, response.status_code)
+		except (asyncio.TimeoutError, httpx.TimeoutException):
+			return NotifyResult(name, 'failed', time.perf_counter() - start, error=f'Timed out after {timeout}s')
+		except Exception as e:
+			return NotifyResult(name, 'failed', time.perf_counter() - start, error=str(e))
+
+	async def _send_email_async(self, title: str, content: str, msg_type: str, timeout: float) -> NotifyResult:
+		start = time.perf_counter()
+		try:
+			await asyncio.wait_for(asyncio.to_thread(self.send_email, title, content, msg_type), timeout)
+			return NotifyResult('Email', 'success', time.perf_counter() - start)
+		except asyncio.TimeoutError:
+			return NotifyResult('Email', 'failed', time.perf_counter() - start, error=f'Timed out after {timeout}s')
+		except Exception as e:
+			return NotifyResult('Email', 'failed', time.perf_counter() - start, error=str(e))
+
+	async def push_message_async(
+		self,
+		title: str,
+		content: str,
+		msg_type: Literal['text', 'html'] = 'text',
+		skip_email: bool = False,
+		client: httpx.AsyncClient | None = None,
+		data: dict[str, Any] | None = None,
+	) -> list[NotifyResult]:
+		"""并发发送通知到所有配置的渠道，返回每个渠道的发送结果
+
+		所有 webhook 渠道共用一个 AsyncClient，每个渠道有独立的超时时间（见 NOTIFY_TIMEOUT / NOTIFY_TIMEOUTS），
+		总耗时取决于最慢的渠道而不是所有渠道之和。未配置的渠道标记为 skipped。
+		传入 data（与 send_html_email 相同的模板数据）时，有模板的渠道使用模板渲染的内容。
+		"""
+		timeouts = load_notify_timeouts()
+		results: list[NotifyResult] = []
+		tasks = []
+
+		owns_client = client is None
+		if owns_client:
+			client = httpx.AsyncClient(timeout=max(timeouts.values()))
+
+		try:
+			if not skip_email:
+				if self._is_configured('Email'):
+					tasks.append(self._send_email_async(title, content, msg_type, timeouts['Email']))
+				else:
+					results.append(NotifyResult('Email', 'skipped'))
+
+			for name, build_request in self._webhook_requests():
+				if not self._is_configured(name):
+					results.append(NotifyResult(name, 'skipped'))
+					continue
+				url, payload = build_request(title, self._render_channel(name, content, data))
+				tasks.append(self._send_webhook(client, name, url, payload, timeouts[name]))
+
+			results.extend(await asyncio.gather(*tasks))
+		finally:
+			if owns_client:
+				await client.aclose()
+
+		for result in results:
+			if result.status == 'success':
+				print(f'[{result.channel}]: Message push successful! ({result.describe()})')
+			elif result.status == 'failed':
+				print(f'[{result.channel}]: Message push failed! Reason: {result.error} ({result.describe()})')
+		return results
+
+
+def parse_recipients(value: str) -> list[str]:
+	"""解析 EMAIL_TO，支持用逗号、分号或空白分隔多个收件人"""
+	return [address for address in re.split(r'[,;\s]+', value) if address]
+
+
+def _is_qq_quirk(error: Exception) -> bool:
+	"""QQ 邮箱等服务器在发送成功后可能返回 (-1, b'\\x00\\x00\\x00')"""
+	error_str = str(error)
+	return '(-1,' in error_str or "b'\\x00\\x00\\x00'" in error_str
+
+
+def _close_smtp(server: 'smtplib.SMTP'):
+	try:
+		server.quit()
+	except Exception:
+		try:
+			server.close()
+		except Exception:
+			pass
+
+
+def load_notify_timeouts() -> dict[str, float]:
+	"""加载每个通知渠道的超时时间
+
+	默认值来自 NOTIFY_TIMEOUT（秒，默认 30），可通过 NOTIFY_TIMEOUTS（JSON）按渠道覆盖，例如：
+	{"Telegram": 20, "DingTalk": 5}
+	"""
+	default = float(os.getenv('NOTIFY_TIMEOUT', '30'))
+	timeouts = {name: default for name in NOTIFY_CHANNELS}
+
+	timeouts_str = os.getenv('NOTIFY_TIMEOUTS')
+	if timeouts_str:
+		try:
+			for name, value in json.loads(timeouts_str).items():
+				if name not in timeouts:
+					print(f'[WARNING] Unknown notification channel "{name}" in NOTIFY_TIMEOUTS, skipping')
+					continue
+				timeouts[name] = float(value)
+		except Exception as e:
+			print(f'[WARNING] Failed to parse NOTIFY_TIMEOUTS: {e}, using default timeouts')
+
+	return timeouts
+
 
 # 延迟初始化单例（解决 .env 加载时机问题）
 _notify_instance = None
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+有界读取的响应分类
+
+只读取响应体的前 RESPONSE_MAX_BYTES 字节（默认 64 KiB），据此判断响应是 JSON、WAF 验证页面、登录跳转还是错误页面，
+只有 Content-Type 允许时才解析 JSON。WAF 返回的大体积 HTML 页面不会被完整下载、解码与扫描。
+DEBUG_RESPONSE_PREVIEW=true 时打印响应预览。
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import httpx
+
+ResponseKind = Literal['json', 'waf', 'login', 'error', 'text']
+
+DEFAULT_MAX_BYTES = 64 * 1024
+# 只在响应开头查找的 WAF 特征，以及在已读取前缀中查找的拦截页特征
+WAF_HEAD_MARKERS = (b'<html', b'verification', b'cloudflare', b'acw_tc', b'arg1=')
+WAF_BODY_MARKERS = (b'sorry, you have been blocked', b'access denied')
+# 5xx 响应只有带这些特征（挑战脚本或拦截页文字）时才视为 WAF，普通的 nginx 错误页属于服务端错误
+WAF_CHALLENGE_MARKERS = (b'arg1=', b'acw_sc__v2') + WAF_BODY_MARKERS
+WAF_HEAD_BYTES = 200
+
+
+@dataclass(slots=True)
+class ClassifiedResponse:
+	"""分类后的响应"""
+
+	status_code: int
+	content_type: str
+	kind: ResponseKind
+	body: bytes
+	truncated: bool = False
+	data: Any = None
+
+	def text(self) -> str:
+		"""已读取前缀的文本（可能不完整）"""
+		return self.body.decode('utf-8', errors='replace')
+
+	def preview(self, limit: int = 300) -> str:
+		return self.body[:limit].decode('utf-8', errors='replace')
+
+
+def get_max_bytes() -> int:
+	return int(os.getenv('RESPONSE_MAX_BYTES', str(DEFAULT_MAX_BYTES)))
+
+
+def preview_enabled() -> bool:
+	return os.getenv('DEBUG_RESPONSE_PREVIEW', 'false').lower() == 'true'
+
+
+async def read_prefix(response: httpx.Response, max_bytes: int) -> tuple[bytes, bool]:
+	"""读取最多 max_bytes 字节的响应体（已解压），返回 (前缀, 是否被截断)，读取后关闭响应"""
+	chunks = []
+	size = 0
+	truncated = False
+	try:
+		async for chunk in response.aiter_bytes():
+			chunks.append(chunk)
+			size += len(chunk)
+			if size > max_bytes:
+				truncated = True
+				break
+	finally:
+		await response.aclose()
+	return b''.join(chunks)[:max_bytes], truncated
+
+
+def is_login_redirect(status_code: int, headers: httpx.Headers) -> bool:
+	return 300 <= status_code < 400 and 'login' in headers.get('Location', '').lower()
+
+
+def is_waf_page(content_type: str, body: bytes, status_code: int = 200) -> bool:
+	"""根据 Content-Type 与响应前缀判断是否为 WAF 验证/拦截页面"""
+	lowered = body.lower()
+	if status_code >= 500:
+		return any(marker in lowered for marker in WAF_CHALLENGE_MARKERS)
+	head = lowered[:WAF_HEAD_BYTES]
+	return (
+		'html' in content_type
+		or any(marker in head for marker in WAF_HEAD_MARKERS)
+		or any(marker in lowered for marker in WAF_BODY_MARKERS)
+	)
+
+
+def classify(status_code: int, headers: httpx.Headers, body: bytes, truncated: bool = False) -> ClassifiedResponse:
+	"""对已读取的响应前缀分类"""
+	content_type = headers.get('Content-Type', '').lower()
+	result = ClassifiedResponse(status_code, content_type, 'error', body, truncated)
+
+	if is_login_redirect(status_code, headers):
+		result.kind = 'login'
+		return result
+
+	# 只有声明为 JSON（或纯文本/未声明类型且看起来像 JSON）并且完整读取时才解析
+	plain = not content_type or content_type.startswith('text/plain')
+	looks_like_json = body.lstrip()[:1] in (b'{', b'[')
+	if ('json' in content_type or (plain and looks_like_json)) and not truncated:
+		try:
+			result.data = json.loads(body)
+			result.kind = 'json'
+			return result
+		except ValueError:
+			pass
+
+	if is_waf_page(content_type, body, status_code):
+		result.kind = 'waf'
+	elif status_code < 400 and 'json' not in content_type:
+		result.kind = 'text'
+	return result
+
+
+async def classify_response(
+	response: httpx.Response, max_bytes: int | None = None, label: str = ''
+) -> ClassifiedResponse:
+	"""读取响应前缀并分类，DEBUG_RESPONSE_PREVIEW=true 时打印预览"""
+	body, truncated = await read_prefix(response, max_bytes or get_max_bytes())
+	result = classify(response.status_code, response.headers, body, truncated)
+	if preview_enabled():
+		suffix = ' (truncated)' if truncated else ''
+		print(f'[DEBUG] {label}: {result.kind} response{suffix}, preview: {result.preview()}...')
+	return result
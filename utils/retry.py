@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+按失败类型区分的重试策略
+"""
+
+import heapq
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+import httpx
+
+FailureKind = Literal['waf', 'auth', 'transport', 'server', 'format']
+
+FAILURE_KINDS: tuple[FailureKind, ...] = ('waf', 'auth', 'transport', 'server', 'format')
+
+
+def classify_status(status_code: int) -> FailureKind:
+	"""根据 HTTP 状态码判断失败类型"""
+	if status_code in (401, 403):
+		return 'auth'
+	if status_code == 429 or status_code >= 500:
+		return 'server'
+	return 'format'
+
+
+def classify_exception(error: BaseException) -> FailureKind:
+	"""根据异常判断失败类型"""
+	if isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError)):
+		return 'transport'
+	return 'format'
+
+
+@dataclass
+class RetryRule:
+	"""单个失败类型的重试预算与退避参数"""
+
+	max_retries: int
+	base_delay: float
+	max_delay: float = 60.0
+
+	def backoff(self, retry: int) -> float:
+		"""第 retry 次重试前的等待时间：指数退避 + 随机抖动（取上限的 50%~100%）"""
+		delay = min(self.max_delay, self.base_delay * (2 ** (retry - 1)))
+		return delay / 2 + random.uniform(0, delay / 2)
+
+
+@dataclass
+class RetryPolicy:
+	"""重试策略
+
+	- waf: WAF 验证页面，唯一需要重新获取 WAF cookies 的类型
+	- auth: 登录失效/未授权，重试无意义，默认不重试
+	- transport: 网络错误、超时
+	- server: HTTP 5xx / 429
+	- format: 响应格式异常
+	"""
+
+	rules: dict[str, RetryRule] = field(default_factory=dict)
+
+	@classmethod
+	def from_env(cls) -> 'RetryPolicy':
+		"""从环境变量加载重试策略
+
+		默认值来自 MAX_RETRIES 与 RETRY_DELAY，可通过 RETRY_POLICY（JSON）按类型覆盖，例如：
+		{"waf": {"max_retries": 3, "base_delay": 10}, "server": {"max_retries": 1}}
+		"""
+		max_retries = int(os.getenv('MAX_RETRIES', '2'))
+		base_delay = float(os.getenv('RETRY_DELAY', '5'))
+
+		rules = {
+			'waf': RetryRule(max_retries, base_delay),
+			'auth': RetryRule(0, base_delay),
+			'transport': RetryRule(max_retries, base_delay),
+			'server': RetryRule(max_retries, base_delay * 2),
+			'format': RetryRule(min(max_retries, 1), base_delay),
+		}
+
+		policy_str = os.getenv('RETRY_POLICY')
+		if policy_str:
+			try:
+				overrides = json.loads(policy_str)
+				for kind, data in overrides.items():
+					if kind not in rules:
+						print(f'[WARNING] Unknown failure kind "{kind}" in RETRY_POLICY, skipping')
+						continue
+					rule = rules[kind]
+					rules[kind] = RetryRule(
+						max_retries=int(data.get('max_retries', rule.max_retries)),
+						base_delay=float(data.get('base_delay', rule.base_delay)),
+						max_delay=float(data.get('max_delay', rule.max_delay)),
+					)
+			except Exception as e:
+				print(f'[WARNING] Failed to parse RETRY_POLICY: {e}, using default retry policy')
+
+		return cls(rules=rules)
+
+	def can_retry(self, kind: str, retries: dict[str, int]) -> bool:
+		"""判断 kind 类型的失败是否还有重试预算"""
+		rule = self.rules.get(kind)
+		return rule is not None and retries.get(kind, 0) < rule.max_retries
+
+	def next_delay(self, kind: str, retries: dict[str, int]) -> float | None:
+		"""登记一次 kind 类型的失败，返回下次重试前的等待时间；预算用尽时返回 None"""
+		rule = self.rules.get(kind)
+		used = retries.get(kind, 0)
+		if rule is None or used >= rule.max_retries:
+			return None
+
+		retries[kind] = used + 1
+		return rule.backoff(used + 1)
+
+
+@dataclass
+class RetryState:
+	"""单个账号跨轮次的重试状态"""
+
+	retries: dict[str, int] = field(default_factory=dict)
+	attempts: int = 0
+	# 上次准备好的 cookies（含 WAF cookies），非 WAF 失败重试时直接复用
+	cookies: dict | None = None
+	# 重试队列已不再接受该账号，本轮失败后不会再重试
+	last_attempt: bool = False
+
+
+@dataclass(order=True)
+class RetryEntry:
+	"""重试队列中的条目，按 not_before 排序"""
+
+	not_before: float
+	seq: int
+	index: int = field(compare=False)
+	account: Any = field(compare=False)
+
+
+class RetryQueue:
+	"""延后重试队列
+
+	第一轮处理完所有账号后再统一重试失败账号，避免失败账号阻塞健康账号。
+	- min_gap: 账号失败后至少等待多久才重试（秒），与重试策略的退避时间取较大值
+	- max_attempts: 每个账号最多进入队列的次数
+	"""
+
+	def __init__(self, min_gap: float | None = None, max_attempts: int | None = None):
+		self.min_gap = min_gap if min_gap is not None else float(os.getenv('RETRY_QUEUE_MIN_GAP', '30'))
+		self.max_attempts = (
+			max_attempts if max_attempts is not None else int(os.getenv('RETRY_QUEUE_MAX_ATTEMPTS', '2'))
+		)
+		self._heap: list[RetryEntry] = []
+		self._seq = 0
+		self._attempts: dict[int, int] = {}
+
+	def __len__(self) -> int:
+		return len(self._heap)
+
+	def can_push(self, index: int) -> bool:
+		"""账号是否还能进入队列"""
+		return self._attempts.get(index, 0) < self.max_attempts
+
+	def push(self, index: int, account: Any, delay: float = 0) -> bool:
+		"""加入队列；超过次数上限时返回 False"""
+		if not self.can_push(index):
+			return False
+
+		self._attempts[index] = self._attempts.get(index, 0) + 1
+		self._seq += 1
+		heapq.heappush(self._heap, RetryEntry(time.monotonic() + max(self.min_gap, delay), self._seq, index, account))
+		return True
+
+	def next_ready_in(self) -> float:
+		"""距离最早一个条目可重试还需等待的时间"""
+		if not self._heap:
+			return 0.0
+		return max(0.0, self._heap[0].not_before - time.monotonic())
+
+	def pop_ready(self) -> list[RetryEntry]:
+		"""取出所有已到重试时间的条目"""
+		now = time.monotonic()
+		ready = []
+		while self._heap and self._heap[0].not_before <= now:
+			ready.append(heapq.heappop(self._heap))
+		return ready
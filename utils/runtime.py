@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+运行期共享资源
+"""
+
+from dataclasses import dataclass, field
+
+from utils.browser import BrowserPool
+from utils.circuit import CircuitBreaker, breaker_from_env
+from utils.http_pool import ClientPool
+from utils.retry import RetryPolicy
+from utils.scheduler import ProviderLimiter
+from utils.waf_cache import WafCookieCache
+
+
+@dataclass
+class RunContext:
+	"""一次运行中各账号共享的资源"""
+
+	browser_pool: BrowserPool = field(default_factory=BrowserPool)
+	waf_cache: WafCookieCache = field(default_factory=WafCookieCache)
+	limiters: dict[str, ProviderLimiter] = field(default_factory=dict)
+	breakers: dict[str, CircuitBreaker] = field(default_factory=dict)
+	http_pool: ClientPool = field(default_factory=ClientPool)
+	retry_policy: RetryPolicy = field(default_factory=RetryPolicy.from_env)
+
+	def limiter(self, provider: str) -> ProviderLimiter:
+		"""获取 provider 对应的限流器（未配置时创建不限速的默认限流器）"""
+		if provider not in self.limiters:
+			self.limiters[provider] = ProviderLimiter(provider)
+		return self.limiters[provider]
+
+	def breaker(self, provider: str) -> CircuitBreaker:
+		"""获取 provider 对应的熔断器（未配置时按环境变量创建）"""
+		if provider not in self.breakers:
+			self.breakers[provider] = breaker_from_env(provider)
+		return self.breakers[provider]
+
+	async def close(self):
+		"""释放共享资源"""
+		await self.http_pool.close()
+		await self.browser_pool.close()
+		print(f'[INFO] Browser pool stats: {self.browser_pool.stats.summary()}')
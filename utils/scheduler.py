@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+按 provider 限流的并发调度模块
+"""
+
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+
+# 用户信息请求返回这些状态码时视为被限流，增大账号间隔
+THROTTLE_STATUS_CODES = frozenset({403, 429})
+# 运行状态中保存学到的账号间隔的键前缀
+PACING_META_PREFIX = 'pacing_gap:'
+
+
+class TokenBucket:
+	"""令牌桶限速器
+
+	rate 为每秒补充的令牌数，capacity 为桶容量（允许的突发请求数）。
+	rate 为 None 或不大于 0 时不限速。
+	"""
+
+	def __init__(self, rate: float | None, capacity: int = 1):
+		self.rate = rate if rate and rate > 0 else None
+		self.capacity = max(1, capacity)
+		self._tokens = float(self.capacity)
+		self._updated = time.monotonic()
+		self._lock = asyncio.Lock()
+
+	async def acquire(self):
+		"""获取一个令牌，令牌不足时等待"""
+		if self.rate is None:
+			return
+
+		async with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+			self._updated = now
+
+			if self._tokens < 1:
+				wait = (1 - self._tokens) / self.rate
+				await asyncio.sleep(wait)
+				self._updated = time.monotonic()
+				self._tokens = 0.0
+			else:
+				self._tokens -= 1
+
+
+class AimdPacer:
+	"""账号间隔的 AIMD 自适应控制
+
+	响应正常时每次把间隔减少 step 秒（加性减小，不低于 min_gap）；
+	检测到 WAF 页面或 429/403 时把间隔乘以 factor（乘性增大，不超过 max_gap）。
+	一次退避后的一个间隔内不再重复退避，避免并发中的多个请求同时触发导致间隔暴涨。
+	samples 为收到的信号数，为 0 时说明本次运行没有该 provider 的请求，间隔不需要保存。
+	"""
+
+	def __init__(
+		self,
+		gap: float,
+		min_gap: float = 0.0,
+		max_gap: float = 60.0,
+		step: float = 0.5,
+		factor: float = 2.0,
+		clock: Callable[[], float] = time.monotonic,
+	):
+		self.min_gap = max(0.0, min_gap)
+		self.max_gap = max(self.min_gap, max_gap)
+		self.step = max(0.0, step)
+		self.factor = max(1.0, factor)
+		self.gap = min(self.max_gap, max(self.min_gap, gap))
+		self.clock = clock
+		self.samples = 0
+		self._last_backoff: float | None = None
+
+	@classmethod
+	def from_env(cls, gap: float, min_gap: float = 0.0) -> 'AimdPacer':
+		"""PACING_MIN_GAP / PACING_MAX_GAP / PACING_STEP / PACING_BACKOFF 分别默认 min_gap / 60 / 0.5 / 2"""
+		return cls(
+			gap,
+			min_gap=float(os.getenv('PACING_MIN_GAP', str(min_gap))),
+			max_gap=float(os.getenv('PACING_MAX_GAP', '60')),
+			step=float(os.getenv('PACING_STEP', '0.5')),
+			factor=float(os.getenv('PACING_BACKOFF', '2')),
+		)
+
+	def on_clean(self):
+		self.samples += 1
+		self.gap = max(self.min_gap, self.gap - self.step)
+
+	def on_throttle(self) -> bool:
+		"""退避，返回是否实际调整了间隔"""
+		self.samples += 1
+		now = self.clock()
+		if self._last_backoff is not None and now - self._last_backoff < self.gap:
+			return False
+		self._last_backoff = now
+		# 间隔为 0 时至少退避到 step
+		self.gap = min(self.max_gap, max(self.gap * self.factor, self.step, self.min_gap))
+		return True
+
+
+class ProviderLimiter:
+	"""单个 provider 的并发与速率限制
+
+	- max_concurrency: 同时处理的账号数上限
+	- requests_per_second: 对该 provider 发起请求的令牌桶速率
+	- account_gap: 相邻两个账号开始处理的最小间隔（秒），指定 pacer 时由其自适应调整
+	"""
+
+	def __init__(
+		self,
+		name: str,
+		max_concurrency: int = 1,
+		requests_per_second: float | None = None,
+		account_gap: float = 0,
+		pacer: AimdPacer | None = None,
+	):
+		self.name = name
+		self.max_concurrency = max(1, max_concurrency)
+		self.pacer = pacer
+		self._account_gap = max(0.0, account_gap)
+		self.bucket = TokenBucket(requests_per_second, capacity=self.max_concurrency)
+		self._semaphore = asyncio.Semaphore(self.max_concurrency)
+		self._gap_lock = asyncio.Lock()
+		self._last_start: float | None = None
+
+	@property
+	def account_gap(self) -> float:
+		return self.pacer.gap if self.pacer else self._account_gap
+
+	def record_clean(self):
+		"""响应正常（自适应间隔时缩短间隔）"""
+		if self.pacer:
+			self.pacer.on_clean()
+
+	def record_throttle(self, reason: str):
+		"""检测到 WAF 或限流响应（自适应间隔时增大间隔）"""
+		if not self.pacer:
+			return
+		previous = self.pacer.gap
+		if self.pacer.on_throttle():
+			print(f'[PACING] Provider "{self.name}": {reason}, gap {previous:.1f}s -> {self.pacer.gap:.1f}s')
+
+	async def _wait_account_gap(self):
+		"""保证同一 provider 相邻账号的开始时间间隔"""
+		if self.account_gap <= 0:
+			# 自适应间隔可能从 0 增大，仍记录开始时间
+			self._last_start = time.monotonic()
+			return
+
+		async with self._gap_lock:
+			if self._last_start is not None:
+				wait = self._last_start + self.account_gap - time.monotonic()
+				if wait > 0:
+					print(f'[INFO] Provider "{self.name}": waiting {wait:.1f} seconds before next account...')
+					await asyncio.sleep(wait)
+			self._last_start = time.monotonic()
+
+	@asynccontextmanager
+	async def slot(self, skip_gap: Callable[[], bool] | None = None):
+		"""占用一个账号处理槽位
+
+		skip_gap 返回 True 时（如 provider 已熔断、账号将直接失败）不等待账号间隔。
+		"""
+		async with self._semaphore:
+			if skip_gap is None or not skip_gap():
+				await self._wait_account_gap()
+			yield
+
+	async def acquire(self):
+		"""发起请求前获取令牌"""
+		await self.bucket.acquire()
+
+
+def build_limiters(
+	providers: dict, account_gap: float = 0, adaptive: bool = False, learned_gaps: dict[str, float] | None = None
+) -> dict[str, ProviderLimiter]:
+	"""根据 provider 配置创建限流器
+
+	adaptive 为 True 时账号间隔由 AIMD 控制，初始值优先使用上次运行学到的间隔（learned_gaps），否则为 account_gap；
+	间隔不低于 account_gap（可用 PACING_MIN_GAP 调整），只在被限流时增大。
+	"""
+	learned_gaps = learned_gaps or {}
+	return {
+		name: ProviderLimiter(
+			name,
+			max_concurrency=provider.max_concurrency,
+			requests_per_second=provider.requests_per_second,
+			account_gap=account_gap,
+			pacer=AimdPacer.from_env(learned_gaps.get(name, account_gap), min_gap=account_gap) if adaptive else None,
+		)
+		for name, provider in providers.items()
+	}
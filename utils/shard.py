@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+分片执行与结果合并
+
+- --shard i/N: 按稳定账号标识（provider:api_user）的哈希把账号分到 N 个分片之一（i 从 1 开始），
+  分片只执行签到并把结果写入 SHARD_RESULT_DIR 下的 JSON 文件，不发送通知、不写入运行状态
+- merge: 读取全部分片结果，统一计算余额变化、写入运行状态并只发送一次通知
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from collections.abc import Iterable
+
+SHARD_RESULT_DIR = 'shard_results'
+SHARD_RESULT_VERSION = 1
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+	"""解析 "i/N" 格式的分片参数，返回 (i, N)"""
+	try:
+		index, count = (int(part) for part in value.split('/'))
+	except ValueError:
+		raise ValueError(f'Shard must look like i/N, got {value!r}') from None
+	if count < 1 or not 1 <= index <= count:
+		raise ValueError(f'Shard index must be between 1 and {count}, got {value!r}')
+	return index, count
+
+
+def shard_of(account_key: str, count: int) -> int:
+	"""账号所属分片（1..N），与账号顺序、进程及 PYTHONHASHSEED 无关"""
+	digest = hashlib.sha256(account_key.encode('utf-8')).digest()
+	return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def select_shard(accounts: Iterable, index: int, count: int) -> set[int]:
+	"""返回属于指定分片的账号序号"""
+	return {i for i, account in enumerate(accounts) if shard_of(account.get_account_key(), count) == index}
+
+
+def get_result_path(index: int, count: int, result_dir: str | None = None) -> str:
+	"""分片结果文件路径"""
+	result_dir = result_dir or os.getenv('SHARD_RESULT_DIR', SHARD_RESULT_DIR)
+	return os.path.join(result_dir, f'shard-{index}-of-{count}.json')
+
+
+def write_shard_result(
+	path: str, index: int, count: int, records: list[dict], started_at: float, pacing: dict[str, float] | None = None
+):
+	"""原子写入分片结果，pacing 为该分片结束时各 provider 的账号间隔"""
+	directory = os.path.dirname(os.path.abspath(path))
+	os.makedirs(directory, exist_ok=True)
+	result = {
+		'version': SHARD_RESULT_VERSION,
+		'shard': index,
+		'total_shards': count,
+		'started_at': started_at,
+		'finished_at': time.time(),
+		'github_run_id': os.getenv('GITHUB_RUN_ID'),
+		'records': records,
+		'pacing': pacing or {},
+	}
+	tmp_path = f'{path}.tmp'
+	with open(tmp_path, 'w', encoding='utf-8') as f:
+		json.dump(result, f, ensure_ascii=False, indent=2)
+	os.replace(tmp_path, path)
+
+
+def expand_result_paths(paths: list[str]) -> list[str]:
+	"""展开目录参数为其中的分片结果文件"""
+	files = []
+	for path in paths:
+		if os.path.isdir(path):
+			files.extend(sorted(glob.glob(os.path.join(path, 'shard-*-of-*.json'))))
+		else:
+			files.append(path)
+	return files
+
+
+def load_shard_results(paths: list[str]) -> tuple[list[dict], dict]:
+	"""读取并合并分片结果
+
+	返回 (records, info)，info 包含 total_shards、已读取分片、缺失分片与各 provider 的账号间隔（取各分片最大值）。
+	同一分片出现多次时使用最后结束的一份；读取失败的文件只打印警告。
+	"""
+	shards: dict[int, dict] = {}
+	total_shards = None
+
+	for path in expand_result_paths(paths):
+		try:
+			with open(path, encoding='utf-8') as f:
+				result = json.load(f)
+			if result.get('version') != SHARD_RESULT_VERSION:
+				raise ValueError(f'unsupported version {result.get("version")}')
+			index, count = int(result['shard']), int(result['total_shards'])
+		except Exception as e:
+			print(f'[WARNING] Failed to read shard result {path}: {e}')
+			continue
+
+		if total_shards is None:
+			total_shards = count
+		elif count != total_shards:
+			print(f'[WARNING] Ignoring {path}: shard count {count} does not match {total_shards}')
+			continue
+
+		previous = shards.get(index)
+		if previous and previous['finished_at'] >= result['finished_at']:
+			continue
+		shards[index] = result
+
+	records = [record for index in sorted(shards) for record in shards[index]['records']]
+	pacing: dict[str, float] = {}
+	for result in shards.values():
+		for name, gap in (result.get('pacing') or {}).items():
+			pacing[name] = max(pacing.get(name, 0.0), float(gap))
+	missing = [i for i in range(1, (total_shards or 0) + 1) if i not in shards]
+	info = {
+		'total_shards': total_shards or 0,
+		'shards': sorted(shards),
+		'missing': missing,
+		'started_at': min((result['started_at'] for result in shards.values()), default=None),
+		'pacing': pacing,
+	}
+	return records, info
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+启动耗时报告（基于 python -X importtime）
+"""
+
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 只应在实际使用时才加载的模块，出现在启动导入中视为回归
+LAZY_MODULES = ('playwright', 'jinja2', 'smtplib', 'email.mime')
+
+
+@dataclass
+class ImportTiming:
+	"""单个模块的导入耗时（微秒）"""
+
+	module: str
+	self_us: int
+	cumulative_us: int
+	depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+	"""解析 -X importtime 输出"""
+	timings = []
+	for line in output.splitlines():
+		if not line.startswith('import time:'):
+			continue
+		parts = line[len('import time:') :].split('|')
+		if len(parts) != 3 or not parts[0].strip().isdigit():
+			continue
+		name = parts[2].rstrip()
+		module = name.lstrip()
+		timings.append(
+			ImportTiming(
+				module=module,
+				self_us=int(parts[0]),
+				cumulative_us=int(parts[1]),
+				depth=(len(name) - len(module) - 1) // 2,
+			)
+		)
+	return timings
+
+
+def measure_imports(module: str = 'checkin') -> list[ImportTiming]:
+	"""在新的解释器中导入 module 并收集导入耗时"""
+	result = subprocess.run(
+		[sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+		cwd=PROJECT_ROOT,
+		capture_output=True,
+		text=True,
+	)
+	if result.returncode != 0:
+		raise RuntimeError(f'Failed to import {module}: {result.stderr.strip().splitlines()[-1:]}')
+	return parse_importtime(result.stderr)
+
+
+def print_startup_report(module: str = 'checkin', top: int = 15) -> int:
+	"""打印启动导入耗时报告，发现应延迟加载的模块被提前导入时返回 1"""
+	timings = measure_imports(module)
+	total = next((t.cumulative_us for t in timings if t.module == module and t.depth == 0), 0)
+
+	print(f'[STARTUP] import {module}: {total / 1000:.1f} ms, {len(timings)} modules')
+	print(f'[STARTUP] Top {top} modules by self time:')
+	for timing in sorted(timings, key=lambda t: t.self_us, reverse=True)[:top]:
+		print(f'  {timing.self_us / 1000:8.1f} ms  (cumulative {timing.cumulative_us / 1000:8.1f} ms)  {timing.module}')
+
+	eager = sorted(
+		{t.module for t in timings if any(t.module == name or t.module.startswith(f'{name}.') for name in LAZY_MODULES)}
+	)
+	if eager:
+		print(f'[WARNING] Modules that should be lazily imported were loaded at startup: {", ".join(eager)}')
+		return 1
+
+	print('[STARTUP] No lazily loaded modules imported at startup')
+	return 0
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+基于 SQLite 的运行状态存储
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+STATE_DB_FILE = 'checkin_state.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	started_at REAL NOT NULL,
+	finished_at REAL NOT NULL,
+	total INTEGER NOT NULL,
+	success INTEGER NOT NULL,
+	metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs (started_at);
+
+CREATE TABLE IF NOT EXISTS account_state (
+	account_key TEXT PRIMARY KEY,
+	provider TEXT NOT NULL,
+	api_user TEXT NOT NULL,
+	name TEXT,
+	last_run_id INTEGER,
+	last_result TEXT,
+	last_error TEXT,
+	last_attempt_at REAL,
+	last_success_at REAL,
+	quota REAL,
+	used_quota REAL
+);
+CREATE INDEX IF NOT EXISTS idx_account_state_provider ON account_state (provider);
+
+CREATE TABLE IF NOT EXISTS balance_history (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	account_key TEXT NOT NULL,
+	run_id INTEGER NOT NULL,
+	recorded_at REAL NOT NULL,
+	quota REAL NOT NULL,
+	used_quota REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_balance_history_account ON balance_history (account_key, recorded_at);
+
+CREATE TABLE IF NOT EXISTS meta (
+	key TEXT PRIMARY KEY,
+	value TEXT
+);
+"""
+
+
+class StateStore:
+	"""账号与运行状态存储
+
+	- runs: 每次运行的元数据
+	- account_state: 每个账号最近一次签到结果、最近成功时间与余额
+	- balance_history: 余额历史
+	- meta: 其他键值状态
+
+	账号结果在运行期间先缓存在内存中，finish_run 时在一个事务内批量写入。
+	"""
+
+	def __init__(self, path: str | None = None):
+		self.path = path or os.getenv('STATE_DB_PATH', STATE_DB_FILE)
+		self._conn: sqlite3.Connection | None = None
+		self._run_started_at: float | None = None
+		self._pending_accounts: list[dict] = []
+		self._pending_meta: dict[str, str] = {}
+
+	@property
+	def conn(self) -> sqlite3.Connection:
+		"""延迟打开数据库连接并初始化表结构"""
+		if self._conn is None:
+			self._conn = sqlite3.connect(self.path)
+			self._conn.row_factory = sqlite3.Row
+			self._conn.execute('PRAGMA journal_mode=WAL')
+			self._conn.execute('PRAGMA synchronous=NORMAL')
+			self._conn.executescript(SCHEMA)
+		return self._conn
+
+	def get_meta(self, key: str) -> str | None:
+		"""读取键值状态（包含本次运行尚未写入的值）"""
+		if key in self._pending_meta:
+			return self._pending_meta[key]
+		row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+		return row['value'] if row else None
+
+	def set_meta(self, key: str, value: str):
+		"""写入键值状态（随 finish_run 一起提交）"""
+		self._pending_meta[key] = value
+
+	def get_account(self, account_key: str) -> dict | None:
+		"""读取单个账号状态"""
+		row = self.conn.execute('SELECT * FROM account_state WHERE account_key = ?', (account_key,)).fetchone()
+		return dict(row) if row else None
+
+	def get_accounts(self) -> dict[str, dict]:
+		"""读取所有账号状态"""
+		rows = self.conn.execute('SELECT * FROM account_state').fetchall()
+		return {row['account_key']: dict(row) for row in rows}
+
+	def begin_run(self, started_at: float | None = None):
+		"""开始一次运行（合并分片结果时使用最早分片的开始时间）"""
+		self._run_started_at = started_at or time.time()
+		self._pending_accounts = []
+
+	def record_account(
+		self, account_key: str, provider: str, api_user: str, name: str, success: bool, user_info: dict | None
+	):
+		"""记录单个账号本次运行结果（仅缓存在内存中）"""
+		has_balance = bool(user_info and user_info.get('success'))
+		self._pending_accounts.append(
+			{
+				'account_key': account_key,
+				'provider': provider,
+				'api_user': api_user,
+				'name': name,
+				'success': bool(success),
+				'error': None if success else (user_info or {}).get('error', 'Unknown error'),
+				'recorded_at': time.time(),
+				'quota': user_info['quota'] if has_balance else None,
+				'used_quota': user_info['used_quota'] if has_balance else None,
+			}
+		)
+
+	def finish_run(self, metadata: dict | None = None, skipped: int = 0) -> int:
+		"""在一个事务中写入本次运行的所有结果，返回 run id
+
+		skipped 为本次因已签到而跳过的账号数，计入运行的 total 与 success（这些账号不重复写入账号状态）。
+		"""
+		finished_at = time.time()
+		started_at = self._run_started_at or finished_at
+		accounts = self._pending_accounts
+		total = len(accounts) + skipped
+		success_count = sum(1 for a in accounts if a['success']) + skipped
+
+		conn = self.conn
+		with conn:
+			cursor = conn.execute(
+				'INSERT INTO runs (started_at, finished_at, total, success, metadata) VALUES (?, ?, ?, ?, ?)',
+				(started_at, finished_at, total, success_count, json.dumps(metadata or {}, ensure_ascii=False)),
+			)
+			run_id = cursor.lastrowid
+
+			conn.executemany(
+				"""
+				INSERT INTO account_state (
+					account_key, provider, api_user, name, last_run_id, last_result, last_error,
+					last_attempt_at, last_success_at, quota, used_quota
+				) VALUES (
+					:account_key, :provider, :api_user, :name, :run_id, :result, :error,
+					:recorded_at, :success_at, :quota, :used_quota
+				)
+				ON CONFLICT (account_key) DO UPDATE SET
+					provider = excluded.provider,
+					api_user = excluded.api_user,
+					name = excluded.name,
+					last_run_id = excluded.last_run_id,
+					last_result = excluded.last_result,
+					last_error = excluded.last_error,
+					last_attempt_at = excluded.last_attempt_at,
+					last_success_at = COALESCE(excluded.last_success_at, account_state.last_success_at),
+					quota = COALESCE(excluded.quota, account_state.quota),
+					used_quota = COALESCE(excluded.used_quota, account_state.used_quota)
+				""",
+				[
+					{
+						**a,
+						'run_id': run_id,
+						'result': 'success' if a['success'] else 'failed',
+						'success_at': a['recorded_at'] if a['success'] else None,
+					}
+					for a in accounts
+				],
+			)
+
+			conn.executemany(
+				'INSERT INTO balance_history (account_key, run_id, recorded_at, quota, used_quota) VALUES (?, ?, ?, ?, ?)',
+				[
+					(a['account_key'], run_id, a['recorded_at'], a['quota'], a['used_quota'])
+					for a in accounts
+					if a['quota'] is not None
+				],
+			)
+
+			conn.executemany(
+				'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+				list(self._pending_meta.items()),
+			)
+
+		self._pending_accounts = []
+		self._pending_meta = {}
+		self._run_started_at = None
+		return run_id
+
+	def close(self):
+		"""合并 WAL 并关闭连接，保证单个 .db 文件即包含全部数据"""
+		if self._conn is None:
+			return
+		try:
+			self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+		except Exception:
+			pass
+		self._conn.close()
+		self._conn = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		self.close()
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+通知模板渲染模块（按需加载 jinja2，模板只编译一次）
+"""
+
+import os
+
+# ==================== HTML 模板  ====================
+DEFAULT_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>AgentRouter 签到结果</title>
+    <style>
+        * {
+            box-sizing: border-box;
+        }
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'PingFang SC', 'Microsoft YaHei', sans-serif;
+            margin: 0;
+            padding: 20px;
+            background-color: #e2e8f0;
+            -webkit-font-smoothing: antialiased;
+            -moz-osx-font-smoothing: grayscale;
+        }
+        @media screen and (max-width: 768px) {
+            body {
+                padding: 0;
+            }
+        }
+        .container {
+            max-width: 800px;
+            margin: 0 auto;
+            background-color: #ffffff;
+            border-radius: 16px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.07), 0 2px 4px rgba(0, 0, 0, 0.05);
+            overflow: hidden;
+        }
+        @media screen and (max-width: 768px) {
+            .container {
+                border-radius: 0;
+                box-shadow: none;
+            }
+        }
+        .header {
+            background: #fafbfc;
+            color: #1e293b;
+            padding: 40px 20px 30px;
+            text-align: center;
+            position: relative;
+            overflow: hidden;
+            border-bottom: 1px solid #f1f5f9;
+        }
+        @media screen and (max-width: 768px) {
+            .header {
+                padding: 30px 15px 20px;
+            }
+        }
+        .header h1 {
+            margin: 0;
+            font-size: 28px;
+            font-weight: 700;
+            position: relative;
+            z-index: 1;
+            text-shadow: none;
+            letter-spacing: -0.02em;
+            color: #0f172a;
+        }
+        @media screen and (max-width: 768px) {
+            .header h1 {
+                font-size: 22px;
+            }
+        }
+        .summary {
+            background-color: #ffffff;
+            padding: 25px 20px;
+            border-bottom: none;
+        }
+        .summary h2 {
+            margin: 0 0 20px 0;
+            font-size: 18px;
+            color: #0f172a;
+            font-weight: 700;
+            letter-spacing: -0.02em;
+        }
+        .stats {
+            display: grid;
+            grid-template-columns: repeat(4, 1fr);
+            gap: 10px;
+        }
+        @media screen and (max-width: 768px) {
+            .summary {
+                padding: 20px 16px;
+            }
+            .summary h2 {
+                font-size: 17px;
+                margin-bottom: 16px;
+            }
+            .stats {
+                gap: 8px;
+            }
+        }
+        .stat-item {
+            padding: 18px 12px;
+            background: #fafbfc;
+            border-radius: 12px;
+            border: 1px solid #f1f5f9;
+            text-align: center;
+            box-shadow: none;
+            transition: transform 0.15s ease, box-shadow 0.15s ease;
+        }
+        .stat-item:active {
+            transform: translateY(1px);
+            background: #f1f5f9;
+        }
+        @media screen and (max-width: 768px) {
+            .stat-item {
+                padding: 14px 8px;
+                border-radius: 10px;
+            }
+        }
+        .stat-label {
+            font-size: 13px;
+            color: #64748b;
+            margin-bottom: 8px;
+            font-weight: 500;
+            white-space: nowrap;
+            overflow: hidden;
+            text-overflow: ellipsis;
+            letter-spacing: -0.01em;
+        }
+        .stat-value {
+            font-size: 28px;
+            font-weight: 700;
+            color: #0f172a;
+            line-height: 1;
+            letter-spacing: -0.03em;
+        }
+        @media screen and (max-width: 768px) {
+            .stat-label {
+                font-size: 11px;
+                margin-bottom: 5px;
+            }
+            .stat-value {
+                font-size: 22px;
+            }
+        }
+        .accounts {
+            padding: 25px 20px 30px;
+            background-color: #ffffff;
+        }
+        .accounts h2 {
+            margin: 0 0 20px 0;
+            font-size: 18px;
+            font-weight: 700;
+            color: #0f172a;
+            letter-spacing: -0.02em;
+        }
+        @media screen and (max-width: 768px) {
+            .accounts {
+                padding: 20px 16px 25px;
+            }
+            .accounts h2 {
+                font-size: 17px;
+                margin-bottom: 16px;
+            }
+        }
+        .account {
+            padding: 18px 20px;
+            margin-bottom: 12px;
+            border-radius: 12px;
+            background-color: #fafbfc;
+            border: 1px solid #f1f5f9;
+            box-shadow: none;
+            transition: transform 0.15s ease, background-color 0.15s ease;
+        }
+        .account:active {
+            transform: translateY(1px);
+            background-color: #f1f5f9;
+        }
+        @media screen and (max-width: 768px) {
+            .account {
+                padding: 16px 16px;
+                margin-bottom: 10px;
+                border-radius: 14px;
+            }
+        }
+        .account.success {
+            background: #fafbfc;
+            border-left: 4px solid #10b981;
+        }
+        .account.failed {
+            background: #fafbfc;
+            border-left: 4px solid #ef4444;
+        }
+        .account-header {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            margin-bottom: 10px;
+        }
+        .account-name {
+            font-size: 15px;
+            font-weight: 600;
+            color: #333;
+        }
+        .account-status {
+            font-size: 12px;
+            padding: 4px 10px;
+            border-radius: 20px;
+            font-weight: 600;
+            white-space: nowrap;
+        }
+        @media screen and (max-width: 768px) {
+            .account-name {
+                font-size: 14px;
+                max-width: 60%;
+                overflow: hidden;
+                text-overflow: ellipsis;
+                white-space: nowrap;
+            }
+            .account-status {
+                font-size: 11px;
+                padding: 3px 8px;
+            }
+        }
+        .status-success {
+            background-color: #28a745;
+            color: white;
+        }
+        .status-failed {
+            background-color: #dc3545;
+            color: white;
+        }
+        .account-detail {
+            font-size: 13px;
+            color: #666;
+            line-height: 1.8;
+            word-break: break-word;
+        }
+        .account-detail strong {
+            color: #333;
+            font-weight: 600;
+        }
+        @media screen and (max-width: 768px) {
+            .account-detail {
+                font-size: 12px;
+                line-height: 1.6;
+            }
+        }
+        .error-message {
+            color: #dc3545;
+            font-size: 13px;
+            margin-top: 8px;
+            padding: 10px 12px;
+            background-color: rgba(220, 53, 69, 0.08);
+            border-radius: 8px;
+            border-left: 3px solid #dc3545;
+            word-break: break-word;
+        }
+        @media screen and (max-width: 768px) {
+            .error-message {
+                font-size: 12px;
+                padding: 8px 10px;
+            }
+        }
+        .warning {
+            background-color: #fff3cd;
+            border: 2px solid #ffc107;
+            border-radius: 10px;
+            padding: 15px;
+            margin: 15px 15px;
+        }
+        @media screen and (max-width: 768px) {
+            .warning {
+                margin: 12px 12px;
+                padding: 12px;
+            }
+        }
+        .warning h3 {
+            margin: 0 0 8px 0;
+            color: #856404;
+            font-size: 14px;
+            font-weight: 600;
+        }
+        .warning p {
+            margin: 5px 0;
+            color: #856404;
+            font-size: 13px;
+            line-height: 1.5;
+        }
+        .warning ul {
+            margin: 8px 0;
+            padding-left: 18px;
+        }
+        .warning li {
+            color: #856404;
+            margin: 4px 0;
+            font-size: 13px;
+        }
+        @media screen and (max-width: 768px) {
+            .warning h3 {
+                font-size: 13px;
+            }
+            .warning p, .warning li {
+                font-size: 12px;
+            }
+        }
+        .footer {
+            background-color: #fafbfc;
+            padding: 20px 20px;
+            text-align: center;
+            border-top: 1px solid #f1f5f9;
+        }
+        .footer p {
+            margin: 4px 0;
+            font-size: 12px;
+            color: #666;
+        }
+        @media screen and (max-width: 768px) {
+            .footer {
+                padding: 12px 15px;
+            }
+            .footer p {
+                font-size: 11px;
+            }
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🔔 AgentRouter 签到结果</h1>
+        </div>
+
+        <div class="summary">
+            <h2>📊 统计摘要</h2>
+            <div class="stats">
+                <div class="stat-item">
+                    <div class="stat-label">总账号数</div>
+                    <div class="stat-value">{{ summary.total }}</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">成功</div>
+                    <div class="stat-value" style="color: #10b981;">{{ summary.success_count }}</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">失败</div>
+                    <div class="stat-value" style="color: #ef4444;">{{ summary.failed_count }}</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">成功率</div>
+                    <div class="stat-value" style="color: #06b6d4;">{{ "%.0f"|format(summary.success_rate) }}%</div>
+                </div>
+            </div>
+        </div>
+
+        <div class="accounts">
+            <h2>📋 账号详情</h2>
+            {% for account in accounts %}
+            <div class="account {% if account.success %}success{% else %}failed{% endif %}">
+                <div class="account-header">
+                    <div class="account-name">{{ account.name }}</div>
+                    <div class="account-status {% if account.success %}status-success{% else %}status-failed{% endif %}">
+                        {% if account.success %}✅ 成功{% else %}[FAIL] 失败{% endif %}
+                    </div>
+                </div>
+                {% if account.success %}
+                <div class="account-detail">
+                    <strong>💰 余额:</strong> ${{ "%.2f"|format(account.quota) }} |
+                    <strong>已用:</strong> ${{ "%.2f"|format(account.used_quota) }}
+                </div>
+                {% else %}
+                <div class="error-message">
+                    [WARNING] {{ account.error }}
+                </div>
+                {% endif %}
+            </div>
+            {% endfor %}
+        </div>
+
+        {% if cookie_expired_accounts %}
+        <div class="warning">
+            <h3>[WARNING] Cookie 过期警告</h3>
+            <p>以下账号的 Cookie 已过期，请尽快更新以确保后续签到正常：</p>
+            <ul>
+            {% for account in cookie_expired_accounts %}
+                <li><strong>{{ account }}</strong></li>
+            {% endfor %}
+            </ul>
+            <p style="margin-top: 15px; font-size: 13px;">
+                [INFO] 提示：请参考 README.md 中的「获取 Cookies」章节重新获取 Cookie 并更新 GitHub Secrets。
+            </p>
+        </div>
+        {% endif %}
+
+        <div class="footer">
+            <p>⏰ 执行时间：{{ timestamp }}</p>
+            <p style="color: #999;">🤖 由 AnyRouter Check-in 自动生成</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
+# ==================== 渠道模板  ====================
+FEISHU_MARKDOWN_TEMPLATE = """**[TIME]** {{ timestamp }}
+
+{% for account in accounts %}
+{% if account.success %}✅{% else %}❌{% endif %} **{{ account.name }}**
+{% if account.success %}
+余额 ${{ "%.2f"|format(account.quota) }}，已用 ${{ "%.2f"|format(account.used_quota) }}
+{% else %}
+<font color='red'>{{ account.error }}</font>
+{% endif %}
+
+{% endfor %}
+---
+成功 {{ summary.success_count }}/{{ summary.total }}，失败 {{ summary.failed_count }}/{{ summary.total }}
+"""
+
+TELEGRAM_HTML_TEMPLATE = """<i>{{ timestamp }}</i>
+
+{% for account in accounts %}
+{% if account.success %}✅{% else %}❌{% endif %} <b>{{ account.name }}</b>
+{% if account.success %}
+余额 <code>${{ "%.2f"|format(account.quota) }}</code>，已用 <code>${{ "%.2f"|format(account.used_quota) }}</code>
+{% else %}
+<code>{{ account.error }}</code>
+{% endif %}
+
+{% endfor %}
+成功 {{ summary.success_count }}/{{ summary.total }}，失败 {{ summary.failed_count }}/{{ summary.total }}
+"""
+
+BUILTIN_TEMPLATES = {
+	'email.html': DEFAULT_HTML_TEMPLATE,
+	'feishu.md': FEISHU_MARKDOWN_TEMPLATE,
+	'telegram.html': TELEGRAM_HTML_TEMPLATE,
+}
+
+
+class TemplateRenderer:
+	"""通知模板渲染器
+
+	- 模板按名称查找：优先使用用户模板目录（NOTIFY_TEMPLATE_DIR）中的同名文件，其次使用内置模板
+	- 每个模板在进程内只解析编译一次
+	- 设置 TEMPLATE_CACHE_DIR 后，编译结果以字节码形式缓存到磁盘，跨运行复用
+	- jinja2 只在第一次渲染时导入
+	"""
+
+	def __init__(self, template_dir: str | None = None, bytecode_cache_dir: str | None = None):
+		self.template_dir = template_dir if template_dir is not None else os.getenv('NOTIFY_TEMPLATE_DIR', '')
+		self.bytecode_cache_dir = (
+			bytecode_cache_dir if bytecode_cache_dir is not None else os.getenv('TEMPLATE_CACHE_DIR', '')
+		)
+		self._env = None
+		self._compiled = {}
+
+	@property
+	def env(self):
+		"""延迟创建 jinja2 Environment"""
+		if self._env is None:
+			from jinja2 import ChoiceLoader, DictLoader, Environment, FileSystemLoader, select_autoescape
+
+			loaders = [DictLoader(BUILTIN_TEMPLATES)]
+			if self.template_dir:
+				loaders.insert(0, FileSystemLoader(self.template_dir))
+
+			bytecode_cache = None
+			if self.bytecode_cache_dir:
+				from jinja2 import FileSystemBytecodeCache
+
+				os.makedirs(self.bytecode_cache_dir, exist_ok=True)
+				bytecode_cache = FileSystemBytecodeCache(self.bytecode_cache_dir)
+
+			self._env = Environment(
+				loader=ChoiceLoader(loaders),
+				autoescape=select_autoescape(enabled_extensions=('html',), default_for_string=False),
+				bytecode_cache=bytecode_cache,
+				auto_reload=False,
+				trim_blocks=True,
+				lstrip_blocks=True,
+			)
+		return self._env
+
+	def has_template(self, name: str) -> bool:
+		"""判断模板是否存在（不导入 jinja2）"""
+		if name in BUILTIN_TEMPLATES:
+			return True
+		return bool(self.template_dir) and os.path.isfile(os.path.join(self.template_dir, name))
+
+	def get_template(self, name: str):
+		"""获取编译后的模板（每个模板只编译一次）"""
+		template = self._compiled.get(name)
+		if template is None:
+			template = self.env.get_template(name)
+			self._compiled[name] = template
+		return template
+
+	def render(self, name: str, **data) -> str:
+		"""渲染指定模板"""
+		return self.get_template(name).render(**data)
+
+
+# 延迟初始化单例（保证 load_dotenv() 之后再读取环境变量）
+_renderer_instance = None
+
+
+def get_renderer() -> TemplateRenderer:
+	"""获取 TemplateRenderer 单例（延迟初始化）"""
+	global _renderer_instance
+	if _renderer_instance is None:
+		_renderer_instance = TemplateRenderer()
+	return _renderer_instance
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+按阶段记录耗时的轻量 tracing 模块
+
+设置 TRACE_FILE 后启用，每个 span 结束时写入一行 JSON：
+- TRACE_FORMAT=jsonl（默认）：扁平的 span 记录
+- TRACE_FORMAT=otlp：OTLP/JSON 格式（每行一个 ExportTraceServiceRequest，与 OpenTelemetry Collector 的 file exporter 相同）
+
+account / provider / attempt 等属性通过 contextvars 绑定，嵌套的 span 自动继承，并发任务之间互不影响。
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+SERVICE_NAME = 'anyrouter-check-in'
+
+_current_span: ContextVar['Span | None'] = ContextVar('current_span', default=None)
+_bound_attributes: ContextVar[dict] = ContextVar('bound_attributes', default={})
+
+
+class Span:
+	"""一个计时区间"""
+
+	__slots__ = ('name', 'span_id', 'parent_id', 'attributes', 'start', 'start_ns', 'status', 'error')
+
+	def __init__(self, name: str, parent_id: str | None, attributes: dict):
+		self.name = name
+		self.span_id = secrets.token_hex(8)
+		self.parent_id = parent_id
+		self.attributes = attributes
+		self.start = time.perf_counter()
+		self.start_ns = time.time_ns()
+		self.status = 'ok'
+		self.error = None
+
+	def set(self, **attributes):
+		"""补充 span 属性（如状态码、失败类型）"""
+		self.attributes.update(attributes)
+
+
+class _NoopSpan:
+	"""未启用 tracing 时使用的空 span"""
+
+	def set(self, **attributes):
+		pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+	"""span 写入器"""
+
+	def __init__(self, path: str | None = None, format: str | None = None):
+		self.path = path if path is not None else os.getenv('TRACE_FILE', '')
+		self.format = (format or os.getenv('TRACE_FORMAT', 'jsonl')).lower()
+		self.trace_id = secrets.token_hex(16)
+		self._file = None
+		self._lock = threading.Lock()
+
+	@property
+	def enabled(self) -> bool:
+		return bool(self.path)
+
+	@contextmanager
+	def bind(self, **attributes):
+		"""为当前上下文中后续创建的 span 绑定公共属性"""
+		if not self.enabled:
+			yield
+			return
+
+		token = _bound_attributes.set({**_bound_attributes.get(), **attributes})
+		try:
+			yield
+		finally:
+			_bound_attributes.reset(token)
+
+	@contextmanager
+	def span(self, name: str, **attributes):
+		"""记录一个阶段的耗时，异常会标记为 error 后继续抛出"""
+		if not self.enabled:
+			yield _NOOP_SPAN
+			return
+
+		parent = _current_span.get()
+		span = Span(name, parent.span_id if parent else None, {**_bound_attributes.get(), **attributes})
+		token = _current_span.set(span)
+		try:
+			yield span
+		except BaseException as e:
+			span.status = 'error'
+			span.error = f'{type(e).__name__}: {e}'[:200]
+			raise
+		finally:
+			_current_span.reset(token)
+			self._write(span, time.perf_counter() - span.start)
+
+	def _write(self, span: Span, duration: float):
+		if self.format == 'otlp':
+			record = self._to_otlp(span, duration)
+		else:
+			record = {
+				'trace_id': self.trace_id,
+				'span_id': span.span_id,
+				'parent_id': span.parent_id,
+				'name': span.name,
+				'start': span.start_ns / 1e9,
+				'duration_ms': round(duration * 1000, 3),
+				'status': span.status,
+				'attributes': span.attributes,
+			}
+			if span.error:
+				record['error'] = span.error
+
+		line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+		with self._lock:
+			try:
+				if self._file is None:
+					self._file = open(self.path, 'a', encoding='utf-8')
+				self._file.write(line)
+			except Exception as e:
+				print(f'[WARNING] Failed to write trace span, tracing disabled: {e}')
+				self.path = ''
+
+	def _to_otlp(self, span: Span, duration: float) -> dict:
+		"""转换为 OTLP/JSON 的 ExportTraceServiceRequest"""
+		otlp_span = {
+			'traceId': self.trace_id,
+			'spanId': span.span_id,
+			'name': span.name,
+			'kind': 1,
+			'startTimeUnixNano': str(span.start_ns),
+			'endTimeUnixNano': str(span.start_ns + int(duration * 1e9)),
+			'attributes': [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+			'status': {'code': 2, 'message': span.error} if span.status == 'error' else {'code': 1},
+		}
+		if span.parent_id:
+			otlp_span['parentSpanId'] = span.parent_id
+
+		return {
+			'resourceSpans': [
+				{
+					'resource': {'attributes': [_otlp_attribute('service.name', SERVICE_NAME)]},
+					'scopeSpans': [{'scope': {'name': 'checkin'}, 'spans': [otlp_span]}],
+				}
+			]
+		}
+
+	def new_trace(self):
+		"""开始新的 trace（常驻模式下每轮一个 trace）"""
+		self.trace_id = secrets.token_hex(16)
+
+	def flush(self):
+		"""将已结束的 span 写入磁盘"""
+		with self._lock:
+			if self._file is not None:
+				self._file.flush()
+
+	def close(self):
+		"""刷新并关闭 trace 文件"""
+		with self._lock:
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+
+
+def _otlp_attribute(key: str, value) -> dict:
+	if isinstance(value, bool):
+		return {'key': key, 'value': {'boolValue': value}}
+	if isinstance(value, int):
+		return {'key': key, 'value': {'intValue': str(value)}}
+	if isinstance(value, float):
+		return {'key': key, 'value': {'doubleValue': value}}
+	return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+# 延迟初始化单例（保证 load_dotenv() 之后再读取环境变量）
+_tracer_instance = None
+
+
+def get_tracer() -> Tracer:
+	"""获取 Tracer 单例（延迟初始化）"""
+	global _tracer_instance
+	if _tracer_instance is None:
+		_tracer_instance = Tracer()
+	return _tracer_instance
+
+
+def span(name: str, **attributes):
+	"""在全局 Tracer 上记录一个 span"""
+	return get_tracer().span(name, **attributes)
+
+
+def bind(**attributes):
+	"""在全局 Tracer 上绑定公共属性"""
+	return get_tracer().bind(**attributes)
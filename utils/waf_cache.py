@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+WAF cookies 持久化缓存模块
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+
+WAF_COOKIE_CACHE_FILE = 'waf_cookies_cache.json'
+
+
+class WafCookieCache:
+	"""按 provider 域名缓存 WAF cookies，跨进程运行共享
+
+	缓存文件为 JSON 格式：{domain: {"cookies": {...}, "expires_at": float}}。
+	每次写入都先写临时文件再 os.replace，避免中途退出导致文件损坏。
+	"""
+
+	def __init__(self, path: str | None = None, ttl: float | None = None):
+		self.path = path or os.getenv('WAF_COOKIE_CACHE_FILE', WAF_COOKIE_CACHE_FILE)
+		self.ttl = ttl if ttl is not None else float(os.getenv('WAF_COOKIE_TTL', '1800'))
+		self._entries: dict[str, dict] | None = None
+		self._locks: dict[str, asyncio.Lock] = {}
+
+	def _load(self) -> dict[str, dict]:
+		"""加载缓存文件（仅加载一次）"""
+		if self._entries is not None:
+			return self._entries
+
+		self._entries = {}
+		try:
+			if os.path.exists(self.path):
+				with open(self.path, 'r', encoding='utf-8') as f:
+					data = json.load(f)
+				if isinstance(data, dict):
+					self._entries = data
+		except Exception as e:
+			print(f'[WARNING] Failed to load WAF cookie cache: {e}')
+		return self._entries
+
+	def _save(self):
+		"""原子写入缓存文件"""
+		entries = self._load()
+		directory = os.path.dirname(os.path.abspath(self.path))
+		try:
+			fd, temp_path = tempfile.mkstemp(prefix='.waf_cookies_', suffix='.tmp', dir=directory)
+			try:
+				with os.fdopen(fd, 'w', encoding='utf-8') as f:
+					json.dump(entries, f, separators=(',', ':'))
+				os.replace(temp_path, self.path)
+			except Exception:
+				os.unlink(temp_path)
+				raise
+		except Exception as e:
+			print(f'[WARNING] Failed to save WAF cookie cache: {e}')
+
+	def lock(self, domain: str) -> asyncio.Lock | contextlib.nullcontext:
+		"""同一域名获取 WAF cookies 的锁，保证缓存未命中时只有一个账号去获取
+
+		缓存关闭（ttl 不大于 0）时获取结果无法共享，返回空的上下文管理器，各账号并发获取。
+		"""
+		if self.ttl <= 0:
+			return contextlib.nullcontext()
+		if domain not in self._locks:
+			self._locks[domain] = asyncio.Lock()
+		return self._locks[domain]
+
+	def get(self, domain: str) -> dict | None:
+		"""获取未过期的 WAF cookies"""
+		if self.ttl <= 0:
+			return None
+
+		entry = self._load().get(domain)
+		if not entry:
+			return None
+
+		if entry.get('expires_at', 0) <= time.time():
+			self.invalidate(domain)
+			return None
+
+		cookies = entry.get('cookies')
+		return dict(cookies) if cookies else None
+
+	def set(self, domain: str, cookies: dict, expires: list[float] | None = None):
+		"""写入 WAF cookies
+
+		Args:
+			domain: provider 域名
+			cookies: WAF cookies
+			expires: 浏览器返回的各 cookie 过期时间戳（-1 表示会话 cookie），取最早者与 TTL 的较小值
+		"""
+		if self.ttl <= 0 or not cookies:
+			return
+
+		expires_at = time.time() + self.ttl
+		for expire in expires or []:
+			if expire and expire > 0:
+				expires_at = min(expires_at, expire)
+
+		self._load()[domain] = {'cookies': cookies, 'expires_at': expires_at}
+		self._save()
+
+	def invalidate(self, domain: str):
+		"""删除指定域名的缓存"""
+		entries = self._load()
+		if domain in entries:
+			del entries[domain]
+			self._save()